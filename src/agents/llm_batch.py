@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, List, Sequence
+
+import pandas as pd
+
+# (ticker, name, region, features, technical_indicators)
+ThesisRequest = tuple
+
+BATCH_SYSTEM = (
+    "あなたは株式アナリストです。ファンダメンタル指標とテクニカル指標の両方を考慮して、"
+    "複数銘柄それぞれの投資分析を行ってください。事実ベースで簡潔に日本語で回答し、推測は避けます。\n"
+    "出力は次の形式のJSONのみで返してください: "
+    "{\"results\": [{\"ticker\": str, \"thesis\": str, \"risks\": [str, ...]}]}\n"
+    "入力の全銘柄について1件ずつ、tickerは入力と同じ表記で返します。"
+    "thesisは1〜2文、risksは最大3件です。"
+)
+
+_DEFAULT_RISKS = ["需給悪化", "規制変更", "マクロ下振れ"]
+
+
+def _fmt(value: Any, spec: str) -> str:
+    """数値は固定の桁数で、それ以外はそのまま文字列にする（プロンプト＝キャッシュキーを安定させる）。"""
+    if isinstance(value, bool):
+        return str(value)
+    try:
+        return format(float(value), spec)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def ticker_lines(
+    ticker: str,
+    name: str,
+    region: str,
+    features: dict[str, Any],
+    technical_indicators: dict[str, Any] | None = None,
+) -> list[str]:
+    """1銘柄分の指標をプロンプト用の行に整形する。
+
+    数値はすべて固定の桁数に丸める（スコア・その他の指標は小数3桁、モメンタムは%表示、出来高トレンドは小数2桁）。
+    """
+    lines = [
+        f"ティッカー: {ticker}",
+        f"名称: {name}",
+        f"地域: {region}",
+        "ファンダメンタル指標 (0..1 正規化):",
+    ]
+    for k, v in features.items():
+        if k != "technical":
+            lines.append(f"- {k}: {_fmt(v, '.3f')}")
+    if technical_indicators:
+        lines.append("\nテクニカル指標:")
+        for k, v in technical_indicators.items():
+            if v is not None and not pd.isna(v):
+                if str(k).startswith("mom_"):
+                    lines.append(f"- {k}: {_fmt(v, '.1%')}")
+                elif k == "volume_trend":
+                    lines.append(f"- {k}: {_fmt(v, '.2f')}")
+                else:
+                    lines.append(f"- {k}: {_fmt(v, '.3f')}")
+            else:
+                lines.append(f"- {k}: N/A")
+    return lines
+
+
+def build_batch_prompt(items: Sequence[ThesisRequest]) -> str:
+    """複数銘柄の指標を1つのユーザープロンプトにまとめる。"""
+    blocks = []
+    for i, (ticker, name, region, features, technical_indicators) in enumerate(items, 1):
+        blocks.append(f"## 銘柄{i}\n" + "\n".join(ticker_lines(ticker, name, region, features, technical_indicators)))
+    return (
+        "\n\n".join(blocks)
+        + "\n\n上記の各銘柄について、包括的な投資仮説(thesis)と主なリスク(risks)をJSONで返してください。"
+        + "テクニカル指標から読み取れる価格動向と出来高の特徴も考慮してください。"
+    )
+
+
+def parse_batch_response(text: str, tickers: Sequence[str]) -> dict[str, tuple[str, List[str]]]:
+    """バッチ応答（JSON）を ticker → (thesis, risks) に変換する。
+
+    パースできない・入力にない ticker・thesis が空の項目は含めない（呼び出し側で個別に再生成）。
+    """
+    content = (text or "").strip()
+    start, end = content.find("{"), content.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        obj = json.loads(content[start : end + 1])
+    except Exception:
+        return {}
+    results = obj.get("results") if isinstance(obj, dict) else None
+    if not isinstance(results, list):
+        return {}
+    wanted = set(tickers)
+    out: dict[str, tuple[str, List[str]]] = {}
+    for entry in results:
+        if not isinstance(entry, dict):
+            continue
+        ticker = str(entry.get("ticker", "")).strip()
+        thesis = entry.get("thesis")
+        if ticker not in wanted or ticker in out or not isinstance(thesis, str) or not thesis.strip():
+            continue
+        rk = entry.get("risks")
+        risks = [str(x).lstrip("- ・* ").strip() for x in rk if str(x).strip()][:3] if isinstance(rk, list) else []
+        out[ticker] = (thesis.strip(), risks or list(_DEFAULT_RISKS))
+    return out
+
+
+def generate_batch(
+    items: Sequence[ThesisRequest],
+    chat: Callable[[str, str], str],
+    single: Callable[..., tuple[str, List[str]]],
+) -> dict[str, tuple[str, List[str]]]:
+    """複数銘柄を1リクエストで生成し、応答に含まれなかった銘柄だけ single で個別生成する。"""
+    if not items:
+        return {}
+    if len(items) == 1:
+        return {items[0][0]: single(*items[0])}
+    text = chat(BATCH_SYSTEM, build_batch_prompt(items))
+    out = parse_batch_response(text, [it[0] for it in items]) if text else {}
+    for it in items:
+        if it[0] not in out:
+            out[it[0]] = single(*it)
+    return out
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+
+@dataclass
+class LLMCache:
+    """LLM 応答のディスクキャッシュ（内容アドレス方式）。
+
+    キーは (provider, model, system, user) の SHA-256。プロンプトには特徴量が丸めた値
+    （0..1 スコアは小数3桁、モメンタムは 0.1%）で埋め込まれるため、入力がほぼ変わらない
+    銘柄は同じキーになり API 呼び出しを省略できる。
+    1エントリ1ファイル（JSON）。ttl 秒を過ぎたものは無効、件数が max_entries を超えたら
+    最終アクセスの古い順に削除する。
+    """
+
+    root: str | Path
+    ttl: float = 7 * 24 * 3600.0
+    max_entries: int = 10000
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _count: Optional[int] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.root = Path(self.root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(provider: str, model: str, system: str, user: str) -> str:
+        payload = json.dumps([provider, model, system, user], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return Path(self.root) / key[:2] / f"{key}.json"
+
+    def _entries(self) -> list[Path]:
+        return list(Path(self.root).glob("*/*.json"))
+
+    def get(self, key: str) -> Optional[str]:
+        """キャッシュ済みの応答を返す。未保存・期限切れ・破損時は None。"""
+        p = self.path_for(key)
+        try:
+            with open(p, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Failed to read LLM cache entry {p.name}: {type(e).__name__}: {e}")
+            return None
+        if self.ttl > 0 and time.time() - float(entry.get("created", 0.0)) > self.ttl:
+            self._remove(p)
+            return None
+        try:
+            os.utime(p)  # 最終アクセス時刻（mtime）を更新して LRU 順に反映
+        except OSError:
+            pass
+        text = entry.get("text")
+        return text if isinstance(text, str) else None
+
+    def put(self, key: str, text: str, **meta) -> None:
+        """応答を書き込む（一時ファイル経由で置換）。上限超過時は古いものから削除。"""
+        p = self.path_for(key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        existed = p.exists()
+        tmp = p.with_name(p.name + f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"created": time.time(), "text": text, **meta}, f, ensure_ascii=False)
+            os.replace(tmp, p)
+        except Exception as e:
+            logging.warning(f"Failed to write LLM cache entry {p.name}: {type(e).__name__}: {e}")
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            return
+        with self._lock:
+            if self._count is None:
+                self._count = len(self._entries())
+            elif not existed:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        """件数を上限の 9 割まで減らす（mtime の古い順）。呼び出し側でロック済み。"""
+        entries = []
+        for p in self._entries():
+            try:
+                entries.append((p.stat().st_mtime, p))
+            except OSError:
+                continue
+        entries.sort()
+        keep = int(self.max_entries * 0.9)
+        for _, p in entries[: max(0, len(entries) - keep)]:
+            self._remove(p)
+        self._count = min(len(entries), keep)
+
+    @staticmethod
+    def _remove(p: Path) -> None:
+        try:
+            p.unlink()
+        except OSError:
+            pass
+
+
+_cache: Optional[LLMCache] = None
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """プロセス共有の LLM キャッシュを返す（未設定なら None = キャッシュなし）。"""
+    return _cache
+
+
+def configure_llm_cache(
+    root: Optional[str],
+    ttl: float = 7 * 24 * 3600.0,
+    max_entries: int = 10000,
+) -> Optional[LLMCache]:
+    """プロセス共有の LLM キャッシュを設定する。root が空なら無効化。"""
+    global _cache
+    cache = None
+    if root:
+        try:
+            cache = LLMCache(root, ttl=ttl, max_entries=max_entries)
+        except Exception as e:
+            logging.warning(f"LLM cache disabled: {type(e).__name__}: {e}")
+    _cache = cache
+    return cache
+
+
+def cached_completion(provider: str, model: str, system: str, user: str, fetch: Callable[[], str]) -> str:
+    """キャッシュにあればそれを返し、なければ fetch() の結果（空でなければ）を保存して返す。"""
+    cache = get_llm_cache()
+    if cache is None:
+        return fetch()
+    key = cache.key(provider, model, system, user)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit
+    text = fetch()
+    if text:
+        cache.put(key, text, provider=provider, model=model)
+    return text
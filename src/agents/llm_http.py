@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+import os
+
+
+def llm_http_settings() -> tuple[int, float]:
+    """LLM API 用 HTTP クライアントの (接続プールサイズ, タイムアウト秒)。
+
+    LLM_HTTP_POOL_SIZE（既定 16）と LLM_HTTP_TIMEOUT（既定 30 秒）から読む。
+    並行生成（RegionAgent.llm_workers × 地域数）以上のプールサイズにしておくと接続待ちが出ない。
+    """
+    pool_size = int(os.environ.get("LLM_HTTP_POOL_SIZE", "16"))
+    timeout = float(os.environ.get("LLM_HTTP_TIMEOUT", "30"))
+    return max(1, pool_size), timeout
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+import json
+import math
+import random
+import re
+import threading
+import time
+
+from .llm_batch import BATCH_SYSTEM
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+_TICKER_RE = re.compile(r"ティッカー: (\S+)")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def _message_text(content) -> str:
+    """メッセージ content（文字列、または {"type": "text", "text": ...} の列）を文字列に。"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(str(p.get("text", "")) for p in content if isinstance(p, dict))
+    return ""
+
+
+def _prompts(path: str, body: dict) -> tuple[str, str]:
+    """リクエストから (system, user) を取り出す（Responses API / Chat Completions 両対応）。"""
+    messages = body.get("input") if path.endswith("/responses") else body.get("messages")
+    if isinstance(messages, str):
+        return "", messages
+    system, user = "", ""
+    for m in messages or []:
+        if not isinstance(m, dict):
+            continue
+        if m.get("role") == "system":
+            system = _message_text(m.get("content"))
+        elif m.get("role") == "user":
+            user = _message_text(m.get("content"))
+    return system, user
+
+
+def canned_reply(system: str, user: str) -> str:
+    """プロンプトの形に合わせた決定的な応答（バッチは JSON、単一銘柄はテキスト、それ以外はレポート）。"""
+    tickers = _TICKER_RE.findall(user)
+    if system == BATCH_SYSTEM:
+        return json.dumps({"results": [
+            {"ticker": t, "thesis": f"{t} は指標が相対的に良好で、継続的な成長が見込まれる。",
+             "risks": ["需給悪化", "規制変更", "マクロ下振れ"]}
+            for t in tickers
+        ]}, ensure_ascii=False)
+    if tickers:
+        return f"{tickers[0]} は指標が相対的に良好で、継続的な成長が見込まれる。\n- 需給悪化\n- 規制変更\n- マクロ下振れ"
+    return "## サマリー\n\nスタブ応答です。\n\n## 地域別ハイライト\n\n- なし\n\n## 最終ポートフォリオ\n\n| ticker | weight |\n|---|---|\n"
+
+
+@dataclass
+class StubLLMServer:
+    """オフライン用の LLM スタブサーバー（ベンチマーク・CI 用）。
+
+    OpenAI 互換の /v1/responses・/v1/chat/completions と Perplexity 互換の /chat/completions を
+    受け付け、latency 秒（distribution に従う）待ってから canned（未指定ならプロンプトに合わせた
+    決定的な応答）を返す。error_rate の確率で 500 を返す。
+    OpenAI は AGENTS_BASE_URL に base_url + "/v1"、Perplexity は PPLX_BASE_URL に base_url を設定して使う。
+    """
+
+    latency: float = 0.0
+    distribution: str = "fixed"
+    error_rate: float = 0.0
+    canned: Optional[str] = None
+    seed: int = 0
+    host: str = "127.0.0.1"
+    port: int = 0
+    requests: int = field(default=0, init=False)
+    errors: int = field(default=0, init=False)
+    _server: Optional[ThreadingHTTPServer] = field(default=None, init=False, repr=False)
+    _thread: Optional[threading.Thread] = field(default=None, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _rng: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"unknown latency distribution: {self.distribution} (expected one of {LATENCY_DISTRIBUTIONS})")
+        self._rng = random.Random(self.seed)
+
+    @property
+    def base_url(self) -> str:
+        if self._server is None:
+            raise RuntimeError("stub server is not running")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _draw(self) -> tuple[float, bool]:
+        """(待ち時間, エラーにするか) を抽選する。"""
+        with self._lock:
+            self.requests += 1
+            mean = self.latency
+            if mean <= 0:
+                delay = 0.0
+            elif self.distribution == "uniform":
+                delay = self._rng.uniform(0.0, 2.0 * mean)
+            elif self.distribution == "exponential":
+                delay = self._rng.expovariate(1.0 / mean)
+            elif self.distribution == "lognormal":
+                sigma = 0.5  # 平均が mean になるよう mu を調整
+                delay = self._rng.lognormvariate(math.log(mean) - sigma * sigma / 2, sigma)
+            else:
+                delay = mean
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return delay, fail
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive（クライアント側の接続プールを再現）
+            disable_nagle_algorithm = True  # ヘッダと本文の分割送信で遅延 ACK 待ちにならないように
+
+            def log_message(self, *args) -> None:  # アクセスログは出さない
+                pass
+
+            def _send(self, status: int, payload: dict) -> None:
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self) -> None:
+                path = self.path.split("?", 1)[0].rstrip("/")
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except Exception:
+                    body = {}
+                if path not in ("/v1/responses", "/v1/chat/completions", "/chat/completions"):
+                    self._send(404, {"error": {"message": f"unknown path: {path}"}})
+                    return
+                delay, fail = stub._draw()
+                if delay > 0:
+                    time.sleep(delay)
+                if fail:
+                    self._send(500, {"error": {"message": "injected error", "type": "server_error"}})
+                    return
+                system, user = _prompts(path, body)
+                text = stub.canned if stub.canned is not None else canned_reply(system, user)
+                model = body.get("model", "stub")
+                if path == "/v1/responses":
+                    self._send(200, {
+                        "id": "resp-stub", "object": "response", "model": model, "status": "completed",
+                        "output": [{"type": "message", "role": "assistant", "id": "msg-stub", "status": "completed",
+                                    "content": [{"type": "output_text", "text": text, "annotations": []}]}],
+                    })
+                else:
+                    self._send(200, {
+                        "id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()), "model": model,
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": text}}],
+                    })
+
+        return Handler
+
+    def start(self) -> "StubLLMServer":
+        if self._server is None:
+            self._server = _Server((self.host, self.port), self._handler())
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import os
-from typing import Any, List, Tuple
+import threading
+from typing import Any, List
 
-import pandas as pd
+from .llm_batch import generate_batch, ticker_lines
+from .llm_cache import cached_completion
+from .llm_http import llm_http_settings
 
 try:
     from openai import OpenAI
@@ -18,7 +21,43 @@ def is_openai_configured() -> bool:
 def _chat(system: str, user: str, model: str = "gpt-4o-mini") -> str:
     if not is_openai_configured():
         return ""
-    client = OpenAI()
+    return cached_completion("openai", model, system, user, lambda: _request_chat(system, user, model))
+
+
+_client = None
+_client_key: tuple | None = None
+_client_lock = threading.Lock()
+
+
+def _get_client():
+    """プロセス共有の OpenAI クライアント（接続プール・keep-alive を地域スレッド間で再利用）。
+
+    プールサイズは LLM_HTTP_POOL_SIZE、タイムアウト秒は LLM_HTTP_TIMEOUT。
+    AGENTS_BASE_URL が設定されていればその URL（互換サーバー・スタブ）に接続する。
+    API キーか接続先が変わった場合のみ作り直す。
+    """
+    global _client, _client_key
+    base_url = os.environ.get("AGENTS_BASE_URL") or None
+    key = (os.environ.get("OPENAI_API_KEY"), base_url)
+    with _client_lock:
+        if _client is None or _client_key != key:
+            pool_size, timeout = llm_http_settings()
+            try:
+                import httpx
+
+                http_client = httpx.Client(
+                    limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                    timeout=timeout,
+                )
+                _client = OpenAI(base_url=base_url, http_client=http_client, timeout=timeout)
+            except ImportError:  # pragma: no cover - httpx は openai の依存
+                _client = OpenAI(base_url=base_url, timeout=timeout)
+            _client_key = key
+        return _client
+
+
+def _request_chat(system: str, user: str, model: str) -> str:
+    client = _get_client()
     # Try Responses API (Agents SDK相当) → fallback to Chat Completions
     try:
         resp = client.responses.create(
@@ -74,34 +113,8 @@ def generate_thesis_and_risks(
         "あなたは株式アナリストです。ファンダメンタル指標とテクニカル指標の両方を考慮して、"
         "包括的な投資分析を行ってください。事実ベースで簡潔に日本語で回答し、推測は避けます。"
     )
-    lines = [
-        f"ティッカー: {ticker}",
-        f"名称: {name}",
-        f"地域: {region}",
-        "ファンダメンタル指標 (0..1 正規化):",
-    ]
-    
-    # ファンダメンタル指標
-    for k, v in features.items():
-        if k != "technical":
-            lines.append(f"- {k}: {v:.3f}")
-    
-    # テクニカル指標（生データ）
-    if technical_indicators:
-        lines.append("\nテクニカル指標:")
-        for k, v in technical_indicators.items():
-            if v is not None and not pd.isna(v):
-                if k.startswith("mom_"):
-                    # モメンタムは%表示
-                    lines.append(f"- {k}: {v:.1%}")
-                elif k == "volume_trend":
-                    # 出来高トレンドは比率表示
-                    lines.append(f"- {k}: {v:.2f}")
-                else:
-                    lines.append(f"- {k}: {v}")
-            else:
-                lines.append(f"- {k}: N/A")
-    
+    lines = ticker_lines(ticker, name, region, features, technical_indicators)
+
     user = (
         "\n".join(lines)
         + "\n\nこれらの指標を基に、包括的な投資仮説(thesis)を1-2文で記述し、"
@@ -124,6 +137,14 @@ def generate_thesis_and_risks(
     return thesis, risks[:3]
 
 
+def generate_theses_batch(items: list[tuple]) -> dict[str, tuple[str, list[str]]]:
+    """複数銘柄 (ticker, name, region, features, technical_indicators) の分析を1リクエストで生成。
+
+    応答の JSON をパースできなかった銘柄は generate_thesis_and_risks で個別に生成する。
+    """
+    return generate_batch(items, lambda system, user: _chat(system, user), generate_thesis_and_risks)
+
+
 def generate_report_markdown(
     candidates_all: list[dict], portfolio: dict, max_per_region: int = 3
 ) -> str:
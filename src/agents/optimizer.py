@@ -6,25 +6,44 @@ import pandas as pd
 import numpy as np
 import logging
 
-from ..tools.optimizer_tool import MVConfig, optimize_mean_variance
-from ..tools.risk_tool import compute_returns
+from ..io.loaders import load_portfolio_weights
+from ..tools.covariance import CovarianceModel
+from ..tools.return_stats import RollingReturnStats
+from ..tools.optimizer_tool import MVConfig, optimize_frontier, solve_mean_variance
+from ..tools.risk_tool import ReturnsPanel
 
 
-def optimize_portfolio(
-    candidates_by_region: list[dict],
-    constraints: dict,
-    prices_df: Optional[pd.DataFrame] = None,
-) -> dict:
-    """Mean-Variance 最適化（P0）。
+def map_previous_weights(
+    tickers: List[str],
+    previous: dict[str, float],
+    position_limit: float,
+    invest_min: float,
+    invest_max: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """前回ポートフォリオを今回の銘柄順に写像し、(初期値 x0, 前回保有) を返す。
 
-    前処理: 各地域の候補上位から対象銘柄を選定（position_limitを満たす最大数）
-    単純に過去リターンの平均/共分散を推定してMV最適化。
+    - 継続銘柄: 前回ウェイト（銘柄上限でクリップ）
+    - 除外された銘柄: 無視（今回の変数に無い）
+    - 新規銘柄: 前回の投資比率（[invest_min, invest_max] に収める）との差を等分（銘柄上限まで）
+    前回保有は新規銘柄を 0 とした実際の保有で、回転率ペナルティの基準に使う。
     """
-    region_limits: dict[str, float] = constraints.get("region_limits", {})
-    position_limit: float = float(constraints.get("position_limit", 0.07))
-    as_of: str = constraints.get("as_of")
+    held = np.array([float(previous.get(t, 0.0)) for t in tickers])
+    held = np.clip(held, 0.0, None)
+    x0 = np.clip(held, 0.0, position_limit)
+    new = np.array([t not in previous for t in tickers])
+    target = float(np.clip(sum(previous.values()), invest_min, invest_max))
+    remaining = target - float(x0.sum())
+    if new.any() and remaining > 0:
+        x0[new] = min(position_limit, remaining / int(new.sum()))
+    return x0, held
 
-    # ティッカーと地域の収集
+
+def _select_candidates(
+    candidates_by_region: list[dict],
+    region_limits: dict[str, float],
+    position_limit: float,
+) -> List[tuple[str, str]]:
+    """各地域の候補上位から (ticker, region) を選ぶ（地域上限/銘柄上限で保有できる最大数）。"""
     selected: List[tuple[str, str]] = []
     for region_blob in candidates_by_region:
         region = region_blob["region"]
@@ -36,14 +55,24 @@ def optimize_portfolio(
         take = min(max_positions, len(candidates))
         for c in candidates[:take]:
             selected.append((c["ticker"], region))
+    return selected
 
-    if not selected:
-        return {"as_of": as_of, "weights": [], "cash_weight": 1.0, "notes": "no selection"}
 
+def _estimate_inputs(
+    selected: List[tuple[str, str]],
+    prices_df: Optional[pd.DataFrame],
+    cov_method: str = "sample",
+    return_stats: Optional[RollingReturnStats] = None,
+    returns_panel: Optional[ReturnsPanel] = None,
+) -> tuple[List[str], List[str], pd.Series, CovarianceModel, str]:
+    """価格から年率の期待リターン・共分散モデル（cov_method）を推定し (tickers, regions, mu, cov, note_flag) を返す。
+
+    returns_panel（実行内で共有するリターン・共分散）が対象銘柄を含めばそれを使い、
+    無ければ prices_df から作る（return_stats があれば sample / ewma はそこから読む）。
+    """
     # 価格に存在する銘柄のみに絞り、不足が多い場合は合成価格にフォールバック
-    selected_pairs: List[tuple[str, str]] = selected
-    all_tickers = [t for t, _ in selected_pairs]
-    ticker_to_region = {t: r for t, r in selected_pairs}
+    all_tickers = [t for t, _ in selected]
+    ticker_to_region = {t: r for t, r in selected}
 
     use_synthetic = False
     available_tickers: List[str] = []
@@ -77,25 +106,78 @@ def optimize_portfolio(
         for t in tickers:
             rets = rng.normal(0.0003, 0.01, T)
             prices[t] = 100 * (1 + pd.Series(rets)).cumprod()
-        rets = prices.pct_change().dropna()
+        panel = ReturnsPanel(prices.pct_change().dropna())
     else:
         tickers = available_tickers
         regions = [ticker_to_region[t] for t in tickers]
-        rets = prices_df[tickers].pct_change(fill_method=None).dropna(how="all")
         note_flag = "filtered missing prices"
+        if returns_panel is not None and returns_panel.covers(tickers):
+            panel = returns_panel
+        else:
+            panel = ReturnsPanel.from_prices(prices_df[tickers], return_stats=return_stats)
 
-    mu = rets.mean() * 252
-    cov = rets.cov() * 252
+    mu = panel.mean(tickers)
+    cov = panel.covariance_model(tickers, cov_method)
+    return tickers, regions, mu, cov, note_flag
+
+
+def optimize_portfolio(
+    candidates_by_region: list[dict],
+    constraints: dict,
+    prices_df: Optional[pd.DataFrame] = None,
+    return_stats: Optional[RollingReturnStats] = None,
+    returns_panel: Optional[ReturnsPanel] = None,
+) -> dict:
+    """Mean-Variance 最適化（P0）。
+
+    前処理: 各地域の候補上位から対象銘柄を選定（position_limitを満たす最大数）
+    単純に過去リターンの平均/共分散を推定してMV最適化。
+    return_stats を渡すと期待リターン・共分散は逐次更新の統計から読む。
+    returns_panel を渡すとリスク計算と同じリターン・共分散を再利用する。
+    """
+    region_limits: dict[str, float] = constraints.get("region_limits", {})
+    position_limit: float = float(constraints.get("position_limit", 0.07))
+    as_of: str = constraints.get("as_of")
+
+    selected = _select_candidates(candidates_by_region, region_limits, position_limit)
+    if not selected:
+        return {"as_of": as_of, "weights": [], "cash_weight": 1.0, "notes": "no selection"}
+
+    ticker_to_region = {t: r for t, r in selected}
+    tickers, regions, mu, cov, note_flag = _estimate_inputs(
+        selected, prices_df, constraints.get("cov_method", "sample"), return_stats, returns_panel
+    )
+
+    # 前回ポートフォリオ（パスまたは dict）があれば初期値・回転率ペナルティの基準に使う
+    cash_min = float(constraints.get("cash_min", 0.0))
+    cash_max = float(constraints.get("cash_max", 0.1))
+    x0 = prev_weights = None
+    prev_source = constraints.get("prev_portfolio")
+    if prev_source is not None:
+        try:
+            previous = load_portfolio_weights(prev_source)
+        except Exception as e:
+            logging.warning(f"Failed to load previous portfolio: {type(e).__name__}: {e}")
+            previous = {}
+        if previous:
+            x0, prev_weights = map_previous_weights(
+                tickers, previous, position_limit, 1.0 - cash_max, 1.0 - cash_min
+            )
 
     cfg = MVConfig(
         target=constraints.get("target", "min_vol"),
         region_limits=region_limits,
         position_limit=position_limit,
-        cash_bounds=(constraints.get("cash_min", 0.0), constraints.get("cash_max", 0.1)),
+        cash_bounds=(cash_min, cash_max),
         risk_aversion=float(constraints.get("risk_aversion", 0.0)),
         target_vol=(float(constraints["target_vol"]) if constraints.get("target_vol") is not None else None),
+        solver=constraints.get("solver", "slsqp"),
+        turnover_penalty=float(constraints.get("turnover_penalty", 0.0)),
     )
-    w = optimize_mean_variance(tickers, regions, mu, cov, cfg)
+    result = solve_mean_variance(tickers, regions, mu, cov, cfg, x0=x0, prev_weights=prev_weights)
+    w = result.weights
+    if not result.success:
+        logging.warning(f"Optimizer did not converge ({result.solver}: {result.status}); using initial weights projected onto the constraints")
 
     # 最適化に使用した銘柄順で結果を構築
     pairs_for_weights = [(t, ticker_to_region[t]) for t in tickers]
@@ -109,8 +191,15 @@ def optimize_portfolio(
     # notesに設定を反映
     notes_settings = (
         f"target={cfg.target} risk_aversion={cfg.risk_aversion} "
-        f"target_vol={cfg.target_vol if cfg.target_vol is not None else 'None'}"
+        f"target_vol={cfg.target_vol if cfg.target_vol is not None else 'None'} "
+        f"solver={result.solver} status={result.status} iterations={result.iterations} "
+        f"cov={constraints.get('cov_method', 'sample')}"
     )
+    if prev_weights is not None:
+        # 除外された銘柄の売却分も回転率に含める
+        dropped = sum(v for t, v in previous.items() if t not in set(tickers))
+        turnover = float(np.abs(w - prev_weights).sum()) + float(dropped)
+        notes_settings += f" warm_start=prev turnover={turnover:.4f} turnover_penalty={cfg.turnover_penalty}"
     notes = f"P0 mean-variance ({note_flag}); {notes_settings}" if note_flag else f"P0 mean-variance; {notes_settings}"
 
     return {
@@ -123,3 +212,70 @@ def optimize_portfolio(
     }
 
 
+def optimize_portfolio_frontier(
+    candidates_by_region: list[dict],
+    constraints: dict,
+    points: List[tuple[float, Optional[float]]],
+    prices_df: Optional[pd.DataFrame] = None,
+    workers: int = 1,
+    return_stats: Optional[RollingReturnStats] = None,
+    returns_panel: Optional[ReturnsPanel] = None,
+) -> dict:
+    """(risk_aversion, target_vol) の各点で最適化し、効率的フロンティアを1つの dict にまとめる。
+
+    銘柄選定と期待リターン・共分散の推定は optimize_portfolio と同じで、全点で1度だけ行う。
+    各点の重みは 1e-6 を超える銘柄のみ {ticker: weight} で持つ。
+    """
+    region_limits: dict[str, float] = constraints.get("region_limits", {})
+    position_limit: float = float(constraints.get("position_limit", 0.07))
+    as_of: str = constraints.get("as_of")
+
+    selected = _select_candidates(candidates_by_region, region_limits, position_limit)
+    if not selected:
+        return {"as_of": as_of, "tickers": [], "points": [], "notes": "no selection"}
+    tickers, regions, mu, cov, note_flag = _estimate_inputs(
+        selected, prices_df, constraints.get("cov_method", "sample"), return_stats, returns_panel
+    )
+
+    cfg = MVConfig(
+        target=constraints.get("target", "min_vol"),
+        region_limits=region_limits,
+        position_limit=position_limit,
+        cash_bounds=(float(constraints.get("cash_min", 0.0)), float(constraints.get("cash_max", 0.1))),
+        solver=constraints.get("solver", "slsqp"),
+    )
+    frontier = optimize_frontier(tickers, regions, mu, cov, cfg, points, workers=workers)
+
+    rows = []
+    for pt in frontier:
+        if not pt.success:
+            logging.warning(
+                f"Frontier point risk_aversion={pt.risk_aversion} target_vol={pt.target_vol} "
+                f"did not converge ({pt.solver}: {pt.status})"
+            )
+        rows.append({
+            "risk_aversion": pt.risk_aversion,
+            "target_vol": pt.target_vol,
+            "expected_return": round(pt.expected_return, 6),
+            "volatility": round(pt.volatility, 6),
+            "invested": round(float(pt.weights.sum()), 6),
+            "positions": int((pt.weights > 1e-6).sum()),
+            "solver": pt.solver,
+            "status": pt.status,
+            "iterations": pt.iterations,
+            "success": pt.success,
+            "weights": {t: round(float(w), 6) for t, w in zip(tickers, pt.weights) if w > 1e-6},
+        })
+
+    notes = (
+        f"P0 mean-variance frontier; target={cfg.target} solver={cfg.solver} "
+        f"cov={constraints.get('cov_method', 'sample')} points={len(rows)}"
+    )
+    return {
+        "as_of": as_of,
+        "region_limits": region_limits,
+        "position_limit": position_limit,
+        "tickers": [{"ticker": t, "region": r} for t, r in zip(tickers, regions)],
+        "points": rows,
+        "notes": f"{notes} ({note_flag})" if note_flag else notes,
+    }
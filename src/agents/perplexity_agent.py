@@ -1,15 +1,26 @@
 from __future__ import annotations
 
 import os
+import threading
 from typing import Any, List, Tuple
 
-import pandas as pd
 import requests
+import requests.adapters
 import json
 
+from .llm_batch import generate_batch, ticker_lines
+from .llm_cache import cached_completion
+from .llm_http import llm_http_settings
+
 API_URL = "https://api.perplexity.ai/chat/completions"
 
 
+def _api_url() -> str:
+    """PPLX_BASE_URL（互換サーバー・スタブ）が設定されていればそちらのエンドポイント。"""
+    base = os.environ.get("PPLX_BASE_URL")
+    return f"{base.rstrip('/')}/chat/completions" if base else API_URL
+
+
 def is_perplexity_configured() -> bool:
     """Return True if Perplexity API is configured."""
     return bool(os.environ.get("PPLX_API_KEY"))
@@ -18,6 +29,31 @@ def is_perplexity_configured() -> bool:
 def _chat(system: str, user: str, model: str = "pplx-70b-online") -> str:
     if not is_perplexity_configured():
         return ""
+    return cached_completion("perplexity", model, system, user, lambda: _request_chat(system, user, model))
+
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """プロセス共有の requests.Session（keep-alive の接続プールを地域スレッド間で再利用）。
+
+    プールサイズは LLM_HTTP_POOL_SIZE。
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            pool_size, _ = llm_http_settings()
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _request_chat(system: str, user: str, model: str) -> str:
     headers = {
         "Authorization": f"Bearer {os.environ['PPLX_API_KEY']}",
         "Content-Type": "application/json",
@@ -32,7 +68,7 @@ def _chat(system: str, user: str, model: str = "pplx-70b-online") -> str:
         "max_tokens": 600,
     }
     try:
-        resp = requests.post(API_URL, headers=headers, json=payload, timeout=30)
+        resp = _get_session().post(_api_url(), headers=headers, json=payload, timeout=llm_http_settings()[1])
         resp.raise_for_status()
         data = resp.json()
         return (
@@ -63,36 +99,7 @@ def generate_thesis_and_risks(
         "thesisは2〜4文で要点を網羅、risksは最大3件を簡潔かつ実質的に。重複や見出し語は不要で、過度に短すぎない表現にしてください。"
     )
 
-    lines: list[str] = []
-    lines.append(f"ティッカー: {ticker}")
-    lines.append(f"名称: {name}")
-    lines.append(f"地域: {region}")
-    lines.append("ファンダメンタル指標 (0..1 正規化):")
-    for k, v in features.items():
-        if k != "technical":
-            try:
-                lines.append(f"- {k}: {float(v):.3f}")
-            except Exception:
-                lines.append(f"- {k}: {v}")
-
-    if technical_indicators:
-        lines.append("\nテクニカル指標:")
-        for k, v in technical_indicators.items():
-            if v is not None and not pd.isna(v):
-                if str(k).startswith("mom_"):
-                    try:
-                        lines.append(f"- {k}: {float(v):.1%}")
-                    except Exception:
-                        lines.append(f"- {k}: {v}")
-                elif k == "volume_trend":
-                    try:
-                        lines.append(f"- {k}: {float(v):.2f}")
-                    except Exception:
-                        lines.append(f"- {k}: {v}")
-                else:
-                    lines.append(f"- {k}: {v}")
-            else:
-                lines.append(f"- {k}: N/A")
+    lines = ticker_lines(ticker, name, region, features, technical_indicators)
 
     if news_items:
         lines.append("\n最近のニュース上位:")
@@ -159,3 +166,11 @@ def generate_thesis_and_risks(
         risks = ["需給悪化", "規制変更", "マクロ下振れ"]
 
     return thesis, risks[:3]
+
+
+def generate_theses_batch(items: list[tuple]) -> dict[str, tuple[str, List[str]]]:
+    """複数銘柄 (ticker, name, region, features, technical_indicators) の分析を1リクエストで生成。
+
+    応答の JSON をパースできなかった銘柄は generate_thesis_and_risks で個別に生成する。
+    """
+    return generate_batch(items, lambda system, user: _chat(system, user), generate_thesis_and_risks)
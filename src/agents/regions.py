@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date
 from typing import Any
@@ -7,26 +8,30 @@ from typing import Any
 import numpy as np
 import pandas as pd
 
-from ..scoring.scoring import ScoreWeights, score_candidates
+from ..scoring.scoring import ScoreWeights, score_candidates, select_top_n
 from ..scoring.features import (
     build_features_from_dummy,
     build_features_from_prices,
     merge_fundamentals,
     merge_news_signal,
+    raw_technical_records,
 )
 from ..scoring.normalize import normalize_features
 from .openai_agent import (
     is_openai_configured,
     generate_thesis_and_risks as generate_thesis_and_risks_openai,
+    generate_theses_batch as generate_theses_batch_openai,
 )
 from .perplexity_agent import (
     is_perplexity_configured,
     generate_thesis_and_risks as generate_thesis_and_risks_perplexity,
+    generate_theses_batch as generate_theses_batch_perplexity,
 )
 from ..io.loaders import load_universe
 from ..tools.marketdata import MarketDataClient
 from ..tools.fundamentals import FundamentalsClient
 from ..tools.news import NewsClient
+from ..tools.fetch_engine import fetch_region_data
 
 
 @dataclass
@@ -34,6 +39,9 @@ class RegionAgent:
     name: str
     universe: str
     tools: dict
+    normalize_method: str = "minmax"  # 特徴量の正規化方式（minmax / rank / zscore）
+    llm_workers: int = 4  # 投資仮説生成（LLM）の同時リクエスト数
+    llm_batch_size: int = 1  # 1リクエストにまとめる銘柄数（1 で銘柄ごとに個別リクエスト）
 
     def run(self, as_of: date, top_n: int = 50) -> dict:
         # 実データ: ユニバースのティッカー読み込み → yfinance 取得 → 特徴量化
@@ -43,87 +51,76 @@ class RegionAgent:
             mkt = self.tools.get("marketdata") if self.tools else None
             if not isinstance(mkt, MarketDataClient):
                 mkt = MarketDataClient()
-            prices, volumes = mkt.get_prices(uni["ticker"].tolist(), lookback_days=260)
-            if prices is not None and not prices.empty:
-                df_features = build_features_from_prices(self.name, uni, prices, volumes)
-                # ファンダ
-                fcli = self.tools.get("fundamentals") if self.tools else None
-                if not isinstance(fcli, FundamentalsClient):
-                    fcli = FundamentalsClient()
-                fdf = fcli.get_fundamentals(
-                    uni["ticker"].tolist(), ["roic", "fcf_margin", "revenue_cagr", "eps_growth"]
-                )  # 成長も取得
-                df_features = merge_fundamentals(df_features, fdf)
-                # ニュース
-                ncli = self.tools.get("news") if self.tools else None
-                if not isinstance(ncli, NewsClient):
-                    ncli = NewsClient()
-                news_items = ncli.get_news(uni["ticker"].tolist(), as_of)
-                df_features = merge_news_signal(df_features, news_items)
+            fcli = self.tools.get("fundamentals") if self.tools else None
+            if not isinstance(fcli, FundamentalsClient):
+                fcli = FundamentalsClient()
+            ncli = self.tools.get("news") if self.tools else None
+            if not isinstance(ncli, NewsClient):
+                ncli = NewsClient()
+            # 価格・ファンダ（成長含む）・ニュースは互いに独立なので並行取得
+            data = fetch_region_data(
+                uni["ticker"].tolist(), as_of, mkt, fcli, ncli,
+                lookback_days=260,
+                fields=["roic", "fcf_margin", "revenue_cagr", "eps_growth"],
+                as_of=as_of,
+            )
+            if data.prices is not None and not data.prices.empty:
+                df_features = build_features_from_prices(self.name, uni, data.prices, data.volumes)
+                df_features = merge_fundamentals(df_features, data.fundamentals)
+                df_features = merge_news_signal(df_features, data.news)
         except Exception:
             df_features = None
         if df_features is None or df_features.empty:
             # フォールバック: ダミー生成
             df_features = build_features_from_dummy(region=self.name, as_of=as_of)
-        df_features = normalize_features(df_features)
+        # df_features はこの関数内で生成したものなのでコピー不要
+        df_features = normalize_features(df_features, method=self.normalize_method, inplace=True)
         df_scored = score_candidates(df_features, ScoreWeights())
 
-        df_top = (
-            df_scored.sort_values("score_overall", ascending=False).head(top_n).copy()
-        )
+        # 総合上位と成長上位（別出力用）を部分選択でまとめて取得
+        tops = select_top_n(df_scored, ["score_overall", "score_growth"], top_n)
+        df_top = tops["score_overall"]
+        df_growth_top = tops["score_growth"]
 
-        # 成長上位（別出力用）
-        df_growth_top = (
-            df_scored.sort_values("score_growth", ascending=False).head(top_n).copy()
-        )
+        def _row_inputs(row: "pd.Series") -> tuple[dict[str, float], dict[str, float]]:
+            features = {
+                "fundamental": float(row.get("score_fundamental", 0.0)),
+                "technical": float(row.get("score_technical", 0.0)),
+                "quality": float(row.get("score_quality", 0.0)),
+                "news": float(row.get("score_news", 0.0)),
+                "growth": float(row.get("score_growth", 0.0)),
+            }
+            growth_breakdown = {
+                "revenue_cagr": float(row.get("growth_revenue_cagr", 0.5)),
+                "eps_growth": float(row.get("growth_eps_growth", 0.5)),
+                "overall": float(row.get("score_growth", 0.0)),
+            }
+            return features, growth_breakdown
+
+        # 全ランキングの銘柄を重複排除してから、投資仮説をまとめて（並行に）生成する
+        thesis_inputs: dict[str, tuple] = {}
+        for rows in (df_top, df_growth_top):
+            for (_, row), technical_indicators in zip(rows.iterrows(), raw_technical_records(rows)):
+                ticker = row["ticker"]
+                if ticker not in thesis_inputs:
+                    features, _ = _row_inputs(row)
+                    thesis_inputs[ticker] = (ticker, row["name"], self.name, features, technical_indicators)
+        theses = self._generate_theses(list(thesis_inputs.values()))
 
         def _rows_to_candidates(rows: "pd.DataFrame") -> list[dict[str, Any]]:
             out: list[dict[str, Any]] = []
             rng = np.random.default_rng(42)
-            for _, row in rows.iterrows():
+            # 生のテクニカル指標（LLM分析用）は列からまとめて dict 化する
+            tech_records = raw_technical_records(rows)
+            for (_, row), technical_indicators in zip(rows.iterrows(), tech_records):
                 ticker = row["ticker"]
                 name = row["name"]
                 evidence = [
                     {"type": "metric", "name": "ROIC_TTM", "value": round(10 + 20 * rng.random(), 2)},
                 ]
-                features = {
-                    "fundamental": float(row.get("score_fundamental", 0.0)),
-                    "technical": float(row.get("score_technical", 0.0)),
-                    "quality": float(row.get("score_quality", 0.0)),
-                    "news": float(row.get("score_news", 0.0)),
-                    "growth": float(row.get("score_growth", 0.0)),
-                }
-                
-                # 成長スコアの詳細表示を追加
-                growth_breakdown = {
-                    "revenue_cagr": float(row.get("growth_revenue_cagr", 0.5)),
-                    "eps_growth": float(row.get("growth_eps_growth", 0.5)),
-                    "overall": float(row.get("score_growth", 0.0)),
-                }
-                
-                # 生のテクニカル指標を準備（LLM分析用）
-                raw_technical = row.get("_raw_technical", {})
-                technical_indicators = {}
-                if raw_technical:
-                    for k, v in raw_technical.items():
-                        if v is not None and not pd.isna(v):
-                            technical_indicators[k] = float(v)
-                        else:
-                            technical_indicators[k] = None
-                
-                if is_openai_configured():
-                    thesis, risks = generate_thesis_and_risks_openai(
-                        ticker, name, self.name, features, technical_indicators
-                    )
-                elif is_perplexity_configured():
-                    thesis, risks = generate_thesis_and_risks_perplexity(
-                        ticker, name, self.name, features, technical_indicators
-                    )
-                else:
-                    thesis, risks = (
-                        f"{name} は{self.name}市場の中で相対的に指標が良好。",
-                        ["需給変動", "規制", "マクロ要因"],
-                    )
+                # 成長スコアの詳細表示も含める
+                features, growth_breakdown = _row_inputs(row)
+                thesis, risks = theses[ticker]
 
                 out.append(
                     {
@@ -153,4 +150,37 @@ class RegionAgent:
 
         return result
 
+    def _generate_theses(self, requests: list[tuple]) -> dict[str, tuple[str, list[str]]]:
+        """(ticker, name, region, features, technical_indicators) ごとに投資仮説とリスクを生成する。
 
+        llm_batch_size > 1 なら複数銘柄を1リクエストにまとめる（パース失敗分は個別に再生成）。
+        LLM 呼び出しはネットワーク待ちが支配的なので、llm_workers 本のスレッドで並行に発行する。
+        結果は ticker をキーに返す。
+        """
+        if is_openai_configured():
+            generate, generate_batch = generate_thesis_and_risks_openai, generate_theses_batch_openai
+        elif is_perplexity_configured():
+            generate, generate_batch = generate_thesis_and_risks_perplexity, generate_theses_batch_perplexity
+        else:
+            return {
+                ticker: (f"{name} は{self.name}市場の中で相対的に指標が良好。", ["需給変動", "規制", "マクロ要因"])
+                for ticker, name, *_ in requests
+            }
+        size = max(1, self.llm_batch_size)
+        if size == 1:
+            jobs = [lambda args=args: {args[0]: generate(*args)} for args in requests]
+        else:
+            jobs = [
+                lambda batch=requests[i : i + size]: generate_batch(batch)
+                for i in range(0, len(requests), size)
+            ]
+        workers = max(1, min(self.llm_workers, len(jobs)))
+        out: dict[str, tuple[str, list[str]]] = {}
+        if workers == 1:
+            for job in jobs:
+                out.update(job())
+            return out
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for res in executor.map(lambda job: job(), jobs):
+                out.update(res)
+        return out
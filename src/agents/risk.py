@@ -5,13 +5,29 @@ from typing import Dict, List, Optional
 
 import pandas as pd
 
-from ..tools.risk_tool import compute_returns, risk_metrics
+from ..tools.return_stats import RollingReturnStats
+from ..tools.risk_tool import ReturnsPanel, compute_returns, risk_metrics
 
 
 @dataclass
 class RiskAgent:
-    def run(self, price_panels: Dict[str, pd.DataFrame], combined_prices: Optional[pd.DataFrame] = None) -> dict:
-        """地域ごとの価格パネルから統合リスク指標を計算。"""
+    cov_method: str = "sample"  # 共分散の推定方法（sample / ledoit_wolf / ewma / factor）
+
+    def run(
+        self,
+        price_panels: Dict[str, pd.DataFrame],
+        combined_prices: Optional[pd.DataFrame] = None,
+        return_stats: Optional[RollingReturnStats] = None,
+        returns_panel: Optional[ReturnsPanel] = None,
+    ) -> dict:
+        """地域ごとの価格パネルから統合リスク指標を計算（return_stats があれば共分散等はそこから読む）。
+
+        returns_panel を渡すと、最適化で計算済みのリターン・共分散をそのまま使う。
+        """
+        if returns_panel is not None:
+            if returns_panel.returns.empty:
+                return {"metrics": {}}
+            return {"metrics": risk_metrics(returns_panel, cov_method=self.cov_method)}
         # price_panels: {region: prices_df}
         combined = combined_prices.copy() if combined_prices is not None else None
         if combined is None:
@@ -27,7 +43,7 @@ class RiskAgent:
             return {"metrics": {}}
 
         rets = compute_returns(combined, method="pct")
-        metrics = risk_metrics(rets)
+        metrics = risk_metrics(rets, cov_method=self.cov_method, return_stats=return_stats)
         return {"metrics": metrics}
 
 
@@ -9,7 +9,7 @@ import threading
 
 import typer
 import pandas as pd
-from rich import print
+from rich import get_console, print
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn, TimeElapsedColumn
 from rich.panel import Panel
@@ -19,16 +19,21 @@ from rich.layout import Layout
 
 from .config import load_config
 from .io.writers import ensure_output_dir, write_json, write_text
-from .io.loaders import load_universe
+from .io.loaders import find_previous_portfolio, load_universe
 from .agents.regions import RegionAgent
 from .agents.chair import build_report
-from .agents.optimizer import optimize_portfolio
+from .agents.llm_cache import configure_llm_cache
+from .agents.optimizer import optimize_portfolio, optimize_portfolio_frontier
 from .tools.marketdata import MarketDataClient
+from .tools.price_store import PriceStore
+from .tools.return_stats import RollingReturnStats, sync_return_stats
+from .tools.ratelimit import configure_shared_limiter, get_shared_limiter
+from .tools.backends import configure_backend
 from .tools.fundamentals import FundamentalsClient
 from .tools.news import NewsClient
 from .agents.risk import RiskAgent
 from .agents.macro import MacroAgent
-from .tools.risk_tool import compute_returns
+from .tools.risk_tool import ReturnsPanel, compute_returns
 from .tools.buy_signal import evaluate_buy_signals
 
 
@@ -64,7 +69,63 @@ def _create_status_table():
     return table
 
 
-def _process_region_parallel(region: str, as_of: date, top_n: int, output_dir: Path, progress, task_id: int, workers: int = 4) -> tuple[str, dict, Any]:
+def _open_price_store(cfg) -> Optional[PriceStore]:
+    """設定に応じてローカル価格ストアを開く（失敗時はストアなしで動作）。"""
+    if not cfg.price_store_dir:
+        return None
+    try:
+        return PriceStore(cfg.price_store_dir)
+    except Exception:
+        return None
+
+
+def _sync_return_stats(cfg, prices: Optional[pd.DataFrame], cov_method: str = "sample") -> Optional[RollingReturnStats]:
+    """統合価格パネルで日次リターン統計のファイルを更新して返す（無効・失敗時は None）。"""
+    if not cfg.return_stats_path or prices is None or prices.empty:
+        return None
+    try:
+        return sync_return_stats(
+            cfg.return_stats_path, prices, window=cfg.return_stats_window,
+            halflife=63.0 if cov_method == "ewma" else None,
+        )
+    except Exception:
+        return None
+
+
+def _returns_panel(prices: Optional[pd.DataFrame], return_stats: Optional[RollingReturnStats]) -> Optional[ReturnsPanel]:
+    """最適化とリスク計算で共有する日次リターン（統合価格パネルから1度だけ計算）。"""
+    if prices is None or prices.empty:
+        return None
+    return ReturnsPanel.from_prices(prices, return_stats=return_stats)
+
+
+def _configure_llm_cache(cfg) -> None:
+    """LLM 応答のディスクキャッシュを設定に合わせて初期化する。"""
+    configure_llm_cache(cfg.llm_cache_dir, ttl=cfg.llm_cache_ttl, max_entries=cfg.llm_cache_max_entries)
+
+
+def _llm_options(cfg) -> dict:
+    """RegionAgent に渡す投資仮説生成（LLM）の並行数・バッチサイズ。"""
+    return {"llm_workers": cfg.llm_workers, "llm_batch_size": cfg.llm_batch_size}
+
+
+def _configure_data_sources(cfg) -> None:
+    """データバックエンドと共有レート制御を設定に合わせて初期化する。"""
+    configure_backend(
+        cfg.data_backend,
+        root=cfg.local_data_dir,
+        latency=cfg.local_data_latency,
+        error_rate=cfg.local_data_error_rate,
+    )
+    configure_shared_limiter(
+        rate=cfg.data_rate_limit,
+        max_in_flight=cfg.data_max_in_flight,
+        max_rate=cfg.data_rate_max,
+        tolerance=cfg.data_error_tolerance,
+    )
+
+
+def _process_region_parallel(region: str, as_of: date, top_n: int, output_dir: Path, progress, task_id: int, workers: int = 4, store: Optional[PriceStore] = None, llm_options: Optional[dict] = None) -> tuple[str, dict, Any]:
     """地域別エージェントを並列実行する関数（スレッド安全な進捗更新）"""
     def _safe_update(**kwargs) -> None:
         try:
@@ -75,14 +136,14 @@ def _process_region_parallel(region: str, as_of: date, top_n: int, output_dir: P
     try:
         # クライアントを共有（キャッシュ/接続の再利用）
         _safe_update(advance=20, description=f"[cyan]地域 {region} エージェント初期化中...")
-        mkt = MarketDataClient(max_workers=workers)
+        mkt = MarketDataClient(max_workers=workers, store=store)
         fcli = FundamentalsClient(max_workers=workers)
         ncli = NewsClient(max_workers=min(workers, 3))  # ニュースは控えめに
         agent = RegionAgent(name=region, universe="REAL", tools={
             "marketdata": mkt,
             "fundamentals": fcli,
             "news": ncli,
-        })
+        }, **(llm_options or {}))
         
         # 候補選定
         _safe_update(advance=30, description=f"[cyan]地域 {region} 候補選定中...")
@@ -110,7 +171,7 @@ def _process_region_parallel(region: str, as_of: date, top_n: int, output_dir: P
         uni_tickers = [c["ticker"] for c in out.get("candidates", [])]
         region_prices = {}
         if uni_tickers:
-            prices, _ = mkt.get_prices(uni_tickers, lookback_days=260)
+            prices, _ = mkt.get_prices(uni_tickers, lookback_days=260, as_of=as_of)
             region_prices = prices
         
         _safe_update(advance=10, description=f"[green]地域 {region} 完了")
@@ -139,6 +200,9 @@ def candidates(
     as_of = _parse_date(run_date)
     cfg = load_config(output)
     ensure_output_dir(cfg.output_dir)
+    store = _open_price_store(cfg)
+    _configure_data_sources(cfg)
+    _configure_llm_cache(cfg)
 
     region_list = [r.strip().upper() for r in regions.split(",") if r.strip()]
     
@@ -167,7 +231,7 @@ def candidates(
                     # タスクを開始
                     for region in region_list:
                         task_id = progress.add_task(f"[cyan]地域 {region} 処理中...", total=100)
-                        future = executor.submit(_process_region_parallel, region, as_of, top_n, Path(cfg.output_dir), progress, task_id)
+                        future = executor.submit(_process_region_parallel, region, as_of, top_n, Path(cfg.output_dir), progress, task_id, store=store, llm_options=_llm_options(cfg))
                         tasks[future] = (region, task_id)
                     
                     # 完了を待機
@@ -188,10 +252,10 @@ def candidates(
                     # エージェント実行
                     progress.update(task, advance=20, description=f"[cyan]地域 {region} エージェント初期化中...")
                     agent = RegionAgent(name=region, universe="REAL", tools={
-                        "marketdata": MarketDataClient(max_workers=workers),
+                        "marketdata": MarketDataClient(max_workers=workers, store=store),
                         "fundamentals": FundamentalsClient(max_workers=workers),
                         "news": NewsClient(max_workers=min(workers, 3))
-                    })
+                    }, **_llm_options(cfg))
                     
                     progress.update(task, advance=30, description=f"[cyan]地域 {region} 候補選定中...")
                     out = agent.run(as_of=as_of, top_n=top_n)
@@ -222,10 +286,10 @@ def candidates(
         results: List[dict] = []
         for region in region_list:
             agent = RegionAgent(name=region, universe="REAL", tools={
-                "marketdata": MarketDataClient(max_workers=workers),
+                "marketdata": MarketDataClient(max_workers=workers, store=store),
                 "fundamentals": FundamentalsClient(max_workers=workers),
                 "news": NewsClient(max_workers=min(workers, 3))
-            })
+            }, **_llm_options(cfg))
             out = agent.run(as_of=as_of, top_n=top_n)
             results.append(out)
             out_path = Path(cfg.output_dir) / f"candidates_{region}_{as_of.strftime('%Y%m%d')}.json"
@@ -257,6 +321,7 @@ def report(
     """最終ポートフォリオからMarkdownレポートを生成。"""
     cfg = load_config(output)
     ensure_output_dir(cfg.output_dir)
+    _configure_llm_cache(cfg)
 
     if verbose:
         console.print(Panel("[bold blue]レポート生成開始[/bold blue]", title="実行情報"))
@@ -304,6 +369,11 @@ def run(
     risk_aversion: float = typer.Option(0.0, help="リスク許容度（大きいほどリターン重視）。0でボラ最小。"),
     target_vol: Optional[float] = typer.Option(None, help="年率ボラ上限（例: 0.18）。未指定で制約なし。"),
     target: str = typer.Option("min_vol", help="目的関数: min_vol / max_return（risk_aversion>0 ならトレードオフ）。"),
+    solver: str = typer.Option("slsqp", help="最適化ソルバー: slsqp / admm（凸QP専用。失敗時は slsqp）。"),
+    cov_method: str = typer.Option("sample", help="共分散の推定: sample / ledoit_wolf / ewma / factor"),
+    prev_portfolio: Optional[str] = typer.Option(None, help="前回ポートフォリオJSONのパス（初期値・回転率の基準）。"),
+    warm_start: bool = typer.Option(False, "--warm-start/--no-warm-start", help="出力先の直近の portfolio_YYYYMMDD.json から初期化"),
+    turnover_penalty: float = typer.Option(0.0, help="前回ウェイトからの乖離へのペナルティ係数（0で無効）。"),
     macro_csv: Optional[str] = typer.Option(None, help="マクロ初期重みCSVのパス（region,weight）。未指定でデフォルト重み。"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="詳細な進捗表示"),
     parallel: bool = typer.Option(True, "--parallel/--sequential", help="並列実行（デフォルト）または逐次実行"),
@@ -313,6 +383,14 @@ def run(
     as_of = _parse_date(run_date)
     cfg = load_config(output)
     ensure_output_dir(cfg.output_dir)
+    store = _open_price_store(cfg)
+    _configure_data_sources(cfg)
+    _configure_llm_cache(cfg)
+    if prev_portfolio is None and warm_start:
+        found = find_previous_portfolio(cfg.output_dir, as_of)
+        prev_portfolio = str(found) if found is not None else None
+        if found is None:
+            print("[yellow]前回ポートフォリオが見つからないため通常の初期値で最適化します[/yellow]")
 
     region_list = [r.strip().upper() for r in regions.split(",") if r.strip()]
     
@@ -351,7 +429,7 @@ def run(
                     # タスクを開始
                     for region in region_list:
                         task_id = progress.add_task(f"[cyan]地域 {region} 処理中...", total=100)
-                        future = executor.submit(_process_region_parallel, region, as_of, top_n, Path(cfg.output_dir), progress, task_id)
+                        future = executor.submit(_process_region_parallel, region, as_of, top_n, Path(cfg.output_dir), progress, task_id, store=store, llm_options=_llm_options(cfg))
                         tasks[future] = (region, task_id)
                     
                     # 完了を待機
@@ -369,11 +447,12 @@ def run(
                     task_region = progress.add_task(f"[cyan]地域 {region} 処理中...", total=100)
                     
                     progress.update(task_region, advance=20, description=f"[cyan]地域 {region} エージェント初期化中...")
+                    mkt = MarketDataClient(max_workers=workers, store=store)
                     agent = RegionAgent(name=region, universe="REAL", tools={
-                        "marketdata": MarketDataClient(max_workers=workers),
+                        "marketdata": mkt,
                         "fundamentals": FundamentalsClient(max_workers=workers),
                         "news": NewsClient(max_workers=min(workers, 3))
-                    })
+                    }, **_llm_options(cfg))
                     
                     progress.update(task_region, advance=30, description=f"[cyan]地域 {region} 候補選定中...")
                     out = agent.run(as_of=as_of, top_n=top_n)
@@ -395,11 +474,11 @@ def run(
                         },
                     )
                     
+                    # 価格データ取得（同一クライアントを再利用し、候補分はキャッシュから組み立てる）
                     progress.update(task_region, advance=20, description=f"[cyan]地域 {region} 価格データ取得中...")
-                    mkt = MarketDataClient(max_workers=workers)
                     uni_tickers = [c["ticker"] for c in out.get("candidates", [])]
                     if uni_tickers:
-                        prices, _ = mkt.get_prices(uni_tickers, lookback_days=260)
+                        prices, _ = mkt.get_prices(uni_tickers, lookback_days=260, as_of=as_of)
                         region_prices[region] = prices
                     
                     progress.update(task_region, advance=10, description=f"[green]地域 {region} 完了")
@@ -413,6 +492,8 @@ def run(
                 if p is None or p.empty:
                     continue
                 all_prices = p if all_prices is None else all_prices.join(p, how="outer")
+            return_stats = _sync_return_stats(cfg, all_prices, cov_method)
+            returns_panel = _returns_panel(all_prices, return_stats)
             progress.update(task_prices, advance=50, description="[green]価格データ統合完了")
             
             # 最適化
@@ -429,8 +510,13 @@ def run(
                     "risk_aversion": risk_aversion,
                     "target_vol": target_vol,
                     "target": target,
+                    "solver": solver,
+                    "cov_method": cov_method,
+                    "prev_portfolio": prev_portfolio,
+                    "turnover_penalty": turnover_penalty,
                 },
                 prices_df=all_prices,
+                returns_panel=returns_panel,
             )
             progress.update(task_optimize, advance=50, description="[green]最適化完了")
             
@@ -444,8 +530,8 @@ def run(
             # リスク計算
             task_risk = progress.add_task("[cyan]リスク指標計算中...", total=100)
             progress.update(task_risk, advance=50)
-            risk_agent = RiskAgent()
-            risk = risk_agent.run(price_panels=region_prices, combined_prices=all_prices)
+            risk_agent = RiskAgent(cov_method=cov_method)
+            risk = risk_agent.run(price_panels=region_prices, combined_prices=all_prices, returns_panel=returns_panel)
             risk_path = Path(cfg.output_dir) / f"risk_{as_of.strftime('%Y%m%d')}.json"
             write_json(risk_path, risk)
             progress.update(task_risk, advance=50, description="[green]リスク計算完了")
@@ -492,6 +578,12 @@ def run(
             table.add_row(f"alloc_{as_of.strftime('%Y%m%d')}.png", "✅ 完了")
         
         console.print(table)
+        rate_stats = get_shared_limiter().stats()
+        console.print(
+            f"📡 [cyan]データ取得レート:[/cyan] {rate_stats['rate']:.2f} req/s  "
+            f"同時実行上限: {rate_stats['concurrency']}  "
+            f"成功/失敗: {rate_stats.get('successes', '-')}/{rate_stats.get('failures', '-')}"
+        )
         console.print(Panel("[bold green]週次実行完了[/bold green]", title="結果"))
         
     else:
@@ -504,12 +596,12 @@ def run(
         candidates_all: List[dict] = []
         region_prices: dict[str, "pd.DataFrame"] = {}
         for region in region_list:
-            agent = RegionAgent(name=region, universe="REAL", tools={"marketdata": MarketDataClient()})
+            mkt = MarketDataClient(store=store)
+            agent = RegionAgent(name=region, universe="REAL", tools={"marketdata": mkt}, **_llm_options(cfg))
             out = agent.run(as_of=as_of, top_n=top_n)
             candidates_all.append(out)
             out_path = Path(cfg.output_dir) / f"candidates_{region}_{as_of.strftime('%Y%m%d')}.json"
             write_json(out_path, out)
-            # 価格を再取得（最適化/リスク用）：エージェント内部のMarketDataと同等取得
             # 成長候補を別ファイルに保存
             growth_out_path = Path(cfg.output_dir) / f"growth_{region}_{as_of.strftime('%Y%m%d')}.json"
             write_json(
@@ -522,10 +614,10 @@ def run(
                 },
             )
             print(f"✅ growth saved: {growth_out_path}")
-            mkt = MarketDataClient()
+            # 価格を取得（最適化/リスク用）：エージェントと同一クライアントのキャッシュを再利用
             uni_tickers = [c["ticker"] for c in out.get("candidates", [])]
             if uni_tickers:
-                prices, _ = mkt.get_prices(uni_tickers, lookback_days=260)
+                prices, _ = mkt.get_prices(uni_tickers, lookback_days=260, as_of=as_of)
                 region_prices[region] = prices
 
         # 価格を統合（列=ティッカー）
@@ -535,6 +627,8 @@ def run(
             if p is None or p.empty:
                 continue
             all_prices = p if all_prices is None else all_prices.join(p, how="outer")
+        return_stats = _sync_return_stats(cfg, all_prices, cov_method)
+        returns_panel = _returns_panel(all_prices, return_stats)
 
         portfolio = optimize_portfolio(
             candidates_by_region=candidates_all,
@@ -547,8 +641,13 @@ def run(
                 "risk_aversion": risk_aversion,
                 "target_vol": target_vol,
                 "target": target,
+                "solver": solver,
+                "cov_method": cov_method,
+                "prev_portfolio": prev_portfolio,
+                "turnover_penalty": turnover_penalty,
             },
             prices_df=all_prices,
+            returns_panel=returns_panel,
         )
 
         port_path = Path(cfg.output_dir) / f"portfolio_{as_of.strftime('%Y%m%d')}.json"
@@ -556,8 +655,8 @@ def run(
         print(f"✅ portfolio saved: {port_path}")
 
         # リスク指標を計算・保存
-        risk_agent = RiskAgent()
-        risk = risk_agent.run(price_panels=region_prices, combined_prices=all_prices)
+        risk_agent = RiskAgent(cov_method=cov_method)
+        risk = risk_agent.run(price_panels=region_prices, combined_prices=all_prices, returns_panel=returns_panel)
         risk_path = Path(cfg.output_dir) / f"risk_{as_of.strftime('%Y%m%d')}.json"
         write_json(risk_path, risk)
 
@@ -581,6 +680,90 @@ def run(
         print(f"✅ report saved: {out_md}")
 
 
+@app.command()
+def frontier(
+    regions: str = typer.Option("JP,US", help="対象地域 (CSV)"),
+    run_date: str = typer.Option(datetime.today().strftime("%Y-%m-%d"), "--date"),
+    output: str = typer.Option("./artifacts", help="出力先ディレクトリ"),
+    top_n: int = typer.Option(50, help="各地域の上位候補数（候補ファイルが無い場合の生成用）"),
+    risk_aversions: str = typer.Option("0,0.5,1,2,5,10", help="リスク許容度の候補（CSV）"),
+    target_vols: str = typer.Option("none", help="年率ボラ上限の候補（CSV、none で制約なし）"),
+    target: str = typer.Option("min_vol", help="目的関数: min_vol / max_return（risk_aversion=0 の点で使用）"),
+    solver: str = typer.Option("slsqp", help="最適化ソルバー: slsqp / admm"),
+    cov_method: str = typer.Option("sample", help="共分散の推定: sample / ledoit_wolf / ewma / factor"),
+    workers: int = typer.Option(1, "--workers", "-w", help="プロセス数（1 で逐次・ウォームスタートのみ）"),
+):
+    """(risk_aversion × target_vol) の格子で効率的フロンティアを1回で計算し、frontier_YYYYMMDD.json に保存。
+
+    候補は出力先の candidates_{REGION}_YYYYMMDD.json を再利用する（無い地域だけ候補生成を実行）。
+    """
+    as_of = _parse_date(run_date)
+    cfg = load_config(output)
+    ensure_output_dir(cfg.output_dir)
+    store = _open_price_store(cfg)
+    _configure_data_sources(cfg)
+    _configure_llm_cache(cfg)
+
+    region_list = [r.strip().upper() for r in regions.split(",") if r.strip()]
+    ras = [float(x) for x in risk_aversions.split(",") if x.strip()]
+    vols = [None if x.strip().lower() == "none" else float(x) for x in target_vols.split(",") if x.strip()]
+    points = [(ra, tv) for tv in vols for ra in ras]
+
+    candidates_all: List[dict] = []
+    all_prices = None
+    for region in region_list:
+        mkt = MarketDataClient(store=store)
+        cand_path = Path(cfg.output_dir) / f"candidates_{region}_{as_of.strftime('%Y%m%d')}.json"
+        if cand_path.exists():
+            with open(cand_path, "r", encoding="utf-8") as f:
+                out = json.load(f)
+        else:
+            agent = RegionAgent(name=region, universe="REAL", tools={"marketdata": mkt}, **_llm_options(cfg))
+            out = agent.run(as_of=as_of, top_n=top_n)
+            write_json(cand_path, out)
+        candidates_all.append(out)
+        uni_tickers = [c["ticker"] for c in out.get("candidates", [])]
+        if uni_tickers:
+            prices, _ = mkt.get_prices(uni_tickers, lookback_days=260, as_of=as_of)
+            if prices is not None and not prices.empty:
+                all_prices = prices if all_prices is None else all_prices.join(prices, how="outer")
+
+    result = optimize_portfolio_frontier(
+        candidates_by_region=candidates_all,
+        constraints={
+            "region_limits": cfg.region_limits,
+            "position_limit": cfg.position_limit,
+            "cash_min": cfg.cash_min,
+            "cash_max": cfg.cash_max,
+            "as_of": as_of.strftime("%Y-%m-%d"),
+            "target": target,
+            "solver": solver,
+            "cov_method": cov_method,
+        },
+        points=points,
+        prices_df=all_prices,
+        workers=workers,
+        returns_panel=_returns_panel(all_prices, _sync_return_stats(cfg, all_prices, cov_method)),
+    )
+    out_path = Path(cfg.output_dir) / f"frontier_{as_of.strftime('%Y%m%d')}.json"
+    write_json(out_path, result)
+
+    table = Table(title=f"efficient frontier ({len(result['points'])} points)")
+    for col in ("risk_aversion", "target_vol", "exp. return", "vol", "positions", "status"):
+        table.add_column(col, style="cyan" if col in ("risk_aversion", "target_vol") else "yellow")
+    for pt in result["points"]:
+        table.add_row(
+            f"{pt['risk_aversion']:g}",
+            "-" if pt["target_vol"] is None else f"{pt['target_vol']:.1%}",
+            f"{pt['expected_return']:.2%}",
+            f"{pt['volatility']:.2%}",
+            str(pt["positions"]),
+            "ok" if pt["success"] else pt["status"],
+        )
+    console.print(table)
+    print(f"✅ frontier saved: {out_path}")
+
+
 @app.command()
 def buy_signal(
     regions: str = typer.Option("JP,US", help="対象地域 (CSV)"),
@@ -597,6 +780,7 @@ def buy_signal(
     """買いシグナルを評価してCSVファイルに出力"""
     cfg = load_config(output)
     ensure_output_dir(cfg.output_dir)
+    _configure_data_sources(cfg)
     
     as_of = _parse_date(run_date)
     region_list = [r.strip() for r in regions.split(",")]
@@ -666,6 +850,137 @@ def buy_signal(
     console.print(Panel(f"[bold green]買いシグナル分析完了[/bold green]\nBUY判定: {len(buy_candidates)} 銘柄", title="結果"))
 
 
+@app.command()
+def bench_data(
+    tickers: int = typer.Option(5000, help="合成ティッカー数"),
+    latency_ms: float = typer.Option(20.0, help="1リクエストあたりの遅延（ミリ秒）"),
+    error_rate: float = typer.Option(0.0, help="疑似エラーの発生確率（0〜1）"),
+    rate: float = typer.Option(50.0, help="初期の毎秒リクエスト数"),
+    max_in_flight: int = typer.Option(16, help="同時実行数の上限"),
+    error_tolerance: float = typer.Option(0.1, help="減速を始める直近の失敗率"),
+    workers: int = typer.Option(8, "--workers", "-w", help="各クライアントのワーカー数"),
+    data_dir: Optional[str] = typer.Option(None, help="記録データ（PriceStore形式の npz / info・news の JSON）"),
+):
+    """ローカルバックエンドでデータ取得（価格・財務・ニュース）の負荷試験を行う（ネットワーク不要）。"""
+    import time as _time
+    from datetime import timedelta
+    from .tools.fetch_engine import fetch_region_data
+
+    backend = configure_backend("local", root=data_dir, latency=latency_ms / 1000.0, error_rate=error_rate)
+    limiter = configure_shared_limiter(rate=rate, burst=max_in_flight, max_in_flight=max_in_flight, max_rate=max(rate * 4, 20.0), tolerance=error_tolerance)
+    symbols = [f"SYN{i:05d}" for i in range(tickers)]
+
+    t0 = _time.perf_counter()
+    data = fetch_region_data(
+        symbols, date.today() - timedelta(days=30),
+        MarketDataClient(max_workers=workers),
+        FundamentalsClient(max_workers=workers),
+        NewsClient(max_workers=workers),
+    )
+    elapsed = _time.perf_counter() - t0
+
+    table = Table(title=f"bench-data: {tickers} tickers")
+    table.add_column("項目", style="cyan")
+    table.add_column("値", style="yellow")
+    table.add_row("経過時間", f"{elapsed:.2f}s")
+    table.add_row("スループット", f"{tickers / elapsed:.1f} tickers/s" if elapsed > 0 else "-")
+    table.add_row("価格", f"{data.prices.shape[1]}/{tickers}")
+    table.add_row("財務", f"{len(data.fundamentals)}/{tickers}")
+    table.add_row("ニュース", f"{len({n['ticker'] for n in data.news})}/{tickers}")
+    table.add_row("バックエンド要求数", str(backend.requests))
+    table.add_row("limiter", str(limiter.stats()))
+    console.print(table)
+
+
+@app.command("bench-llm")
+def bench_llm(
+    regions: str = typer.Option("JP,US", help="対象地域 (CSV)"),
+    top_n: int = typer.Option(50, help="各地域の上位候補数"),
+    latency_ms: str = typer.Option("0,100,500", help="LLM 応答遅延の平均（ミリ秒, CSV）"),
+    llm_workers: str = typer.Option("1,4,16", help="投資仮説生成の同時リクエスト数（CSV）"),
+    batch_size: int = typer.Option(1, help="1リクエストにまとめる銘柄数"),
+    distribution: str = typer.Option("fixed", help="遅延分布: fixed / uniform / exponential / lognormal"),
+    error_rate: float = typer.Option(0.0, help="LLM 疑似エラーの発生確率（0〜1）"),
+    provider: str = typer.Option("perplexity", help="経路: perplexity / openai（openai パッケージが必要）"),
+):
+    """ローカルの LLM スタブサーバーで、週次実行（run: 候補生成→最適化→リスク→レポート）全体の所要時間を
+    LLM 遅延 × 同時リクエスト数ごとに計測する（ネットワーク・API キー不要、データはローカルバックエンド）。"""
+    import os
+    import tempfile
+    import time as _time
+    from .agents.llm_stub import StubLLMServer
+
+    as_of = date.today()
+    region_list = [r.strip().upper() for r in regions.split(",") if r.strip()]
+    latencies = [float(x) for x in latency_ms.split(",") if x.strip()]
+    worker_counts = [int(x) for x in llm_workers.split(",") if x.strip()]
+    provider = provider.lower()
+    if provider not in ("perplexity", "openai"):
+        raise typer.BadParameter(f"unknown provider: {provider}")
+
+    # run は設定を環境変数から読むので、計測中だけ差し替える
+    bench_env = {
+        "MARKETDATA_BACKEND": "local",
+        "DATA_RATE_LIMIT": "1000", "DATA_RATE_MAX": "1000", "DATA_MAX_IN_FLIGHT": "64",
+        "LLM_CACHE_DIR": "",  # 計測中はキャッシュを使わない
+        "RETURN_STATS_PATH": "",
+        "LLM_BATCH_SIZE": str(batch_size),
+    }
+    env_keys = ("OPENAI_API_KEY", "AGENTS_BASE_URL", "PPLX_API_KEY", "PPLX_BASE_URL", "PRICE_STORE_DIR", "LLM_WORKERS", *bench_env)
+    saved_env = {k: os.environ.get(k) for k in env_keys}
+    command = typer.main.get_command(app)
+    workdir = tempfile.TemporaryDirectory(prefix="bench-llm-")
+
+    def _run_pipeline(workers: int) -> float:
+        os.environ["LLM_WORKERS"] = str(workers)
+        args = [
+            "run", "--regions", ",".join(region_list), "--date", as_of.isoformat(),
+            "--output", workdir.name, "--top-n", str(top_n),
+        ]
+        consoles = (console, get_console())  # run の進捗表示・print は計測中は出さない
+        quiet = [c.quiet for c in consoles]
+        for c in consoles:
+            c.quiet = True
+        try:
+            t0 = _time.perf_counter()
+            command.main(args=args, standalone_mode=False)
+            return _time.perf_counter() - t0
+        finally:
+            for c, q in zip(consoles, quiet):
+                c.quiet = q
+
+    table = Table(title=f"bench-llm: {','.join(region_list)} top_n={top_n} batch={batch_size} ({provider}, {distribution})")
+    table.add_column("遅延(ms)", style="cyan")
+    table.add_column("workers", style="cyan")
+    table.add_column("経過時間", style="yellow")
+    table.add_column("LLM要求数", style="green")
+    table.add_column("エラー", style="red")
+    try:
+        for k in env_keys:
+            os.environ.pop(k, None)
+        os.environ.update(bench_env, PRICE_STORE_DIR=os.path.join(workdir.name, "prices"))
+        # ベースライン: LLM なし（価格ストアのウォームアップを兼ねる）
+        _run_pipeline(1)
+        table.add_row("LLMなし", "-", f"{_run_pipeline(1):.2f}s", "0", "0")
+        for lat in latencies:
+            for workers in worker_counts:
+                with StubLLMServer(latency=lat / 1000.0, distribution=distribution, error_rate=error_rate) as stub:
+                    if provider == "openai":
+                        os.environ.update(OPENAI_API_KEY="stub", AGENTS_BASE_URL=f"{stub.base_url}/v1")
+                    else:
+                        os.environ.update(PPLX_API_KEY="stub", PPLX_BASE_URL=stub.base_url)
+                    elapsed = _run_pipeline(workers)
+                    table.add_row(f"{lat:g}", str(workers), f"{elapsed:.2f}s", str(stub.requests), str(stub.errors))
+    finally:
+        for k, v in saved_env.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+        workdir.cleanup()
+    console.print(table)
+
+
 if __name__ == "__main__":
     app()
 
@@ -21,10 +21,66 @@ class AppConfig:
     risk_aversion: float
     target_vol: Optional[float]
 
+    # Local price store (None disables it)
+    price_store_dir: Optional[str] = None
+
+    # Process-wide data request limits (shared by all data clients)
+    data_rate_limit: float = 4.0
+    data_max_in_flight: int = 6
+    data_rate_max: float = 20.0
+    data_error_tolerance: float = 0.1
+
+    # Data backend ("yfinance" or "local" for offline benchmarks/CI)
+    data_backend: str = "yfinance"
+    local_data_dir: Optional[str] = None
+    local_data_latency: float = 0.0
+    local_data_error_rate: float = 0.0
+
+    # LLM 応答のディスクキャッシュ（None で無効）
+    llm_cache_dir: Optional[str] = None
+    llm_cache_ttl: float = 7 * 24 * 3600.0
+    llm_cache_max_entries: int = 10000
+
+    # 投資仮説生成（LLM）の同時リクエスト数と、1リクエストにまとめる銘柄数
+    llm_workers: int = 4
+    llm_batch_size: int = 1
+
+    # 日次リターン統計（平均・共分散）の逐次更新ファイルと窓の営業日数（None で無効）
+    return_stats_path: Optional[str] = None
+    return_stats_window: int = 252
+
 
 def load_config(output_dir: str) -> AppConfig:
     openai_api_key = os.environ.get("OPENAI_API_KEY")
     agents_base_url = os.environ.get("AGENTS_BASE_URL")
+    # 価格ストア: 既定は data/cache/prices。空文字で無効化
+    default_store = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cache", "prices")
+    price_store_dir = os.environ.get("PRICE_STORE_DIR", default_store) or None
+    # データ取得のレート制御（全クライアント共有）: 初期の毎秒リクエスト数・同時実行数・AIMDの上限レート
+    data_rate_limit = float(os.environ.get("DATA_RATE_LIMIT", "4.0"))
+    data_max_in_flight = int(os.environ.get("DATA_MAX_IN_FLIGHT", "6"))
+    data_rate_max = float(os.environ.get("DATA_RATE_MAX", "20.0"))
+    # 直近の失敗率がこの値を超えるまでは減速しない（0 で失敗のたびに減速）
+    data_error_tolerance = float(os.environ.get("DATA_ERROR_TOLERANCE", "0.1"))
+    # データバックエンド: local は合成／記録データをディスクから返す（遅延ミリ秒・エラー率を指定可能）
+    data_backend = os.environ.get("MARKETDATA_BACKEND", "yfinance").lower()
+    local_data_dir = os.environ.get("LOCAL_DATA_DIR") or None
+    local_data_latency = float(os.environ.get("LOCAL_DATA_LATENCY_MS", "0")) / 1000.0
+    local_data_error_rate = float(os.environ.get("LOCAL_DATA_ERROR_RATE", "0"))
+    # yfinance 以外のバックエンドの価格は別の名前空間に保存する
+    # （合成データが実ティッカー名で yfinance 用のストアに混ざらないように）
+    if price_store_dir and data_backend != "yfinance":
+        price_store_dir = os.path.join(price_store_dir, data_backend)
+    # LLM キャッシュ: 既定は data/cache/llm。空文字で無効化。TTL は時間単位
+    default_llm_cache = os.path.join(os.path.dirname(default_store), "llm")
+    llm_cache_dir = os.environ.get("LLM_CACHE_DIR", default_llm_cache) or None
+    llm_cache_ttl = float(os.environ.get("LLM_CACHE_TTL_HOURS", "168")) * 3600.0
+    llm_cache_max_entries = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "10000"))
+    llm_workers = int(os.environ.get("LLM_WORKERS", "4"))
+    llm_batch_size = int(os.environ.get("LLM_BATCH_SIZE", "1"))
+    # リターン統計: RETURN_STATS_PATH を指定したときだけ有効（既定は無効。結果が過去の実行の状態に依存しないように）
+    return_stats_path = os.environ.get("RETURN_STATS_PATH") or None
+    return_stats_window = int(os.environ.get("RETURN_STATS_WINDOW", "252"))
 
     # Defaults from spec 11
     region_limits = {"US": 0.5, "JP": 0.3, "EU": 0.3, "CN": 0.2}
@@ -41,6 +97,22 @@ def load_config(output_dir: str) -> AppConfig:
         cash_max=cash_max,
         risk_aversion=0.0,
         target_vol=None,
+        price_store_dir=price_store_dir,
+        data_rate_limit=data_rate_limit,
+        data_max_in_flight=data_max_in_flight,
+        data_rate_max=data_rate_max,
+        data_error_tolerance=data_error_tolerance,
+        data_backend=data_backend,
+        local_data_dir=local_data_dir,
+        local_data_latency=local_data_latency,
+        local_data_error_rate=local_data_error_rate,
+        llm_cache_dir=llm_cache_dir,
+        llm_cache_ttl=llm_cache_ttl,
+        llm_cache_max_entries=llm_cache_max_entries,
+        llm_workers=llm_workers,
+        llm_batch_size=llm_batch_size,
+        return_stats_path=return_stats_path,
+        return_stats_window=return_stats_window,
     )
 
 
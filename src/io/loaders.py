@@ -1,6 +1,11 @@
 from __future__ import annotations
 
+from datetime import date
 from pathlib import Path
+from typing import Optional
+import json
+import re
+
 import pandas as pd
 
 
@@ -13,3 +18,29 @@ def load_universe(region: str) -> pd.DataFrame:
     return df[["ticker", "name"]].copy()
 
 
+def load_portfolio_weights(source: str | Path | dict) -> dict[str, float]:
+    """ポートフォリオ JSON（パスまたは読み込み済み dict）から ticker → weight を返す。"""
+    if isinstance(source, dict):
+        data = source
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    out: dict[str, float] = {}
+    for w in data.get("weights", []) or []:
+        try:
+            out[str(w["ticker"])] = out.get(str(w["ticker"]), 0.0) + float(w["weight"])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return out
+
+
+def find_previous_portfolio(output_dir: str | Path, as_of: date) -> Optional[Path]:
+    """output_dir 内の `portfolio_YYYYMMDD.json` のうち as_of より前で最新のものを返す。"""
+    best: Optional[tuple[str, Path]] = None
+    for p in Path(output_dir).glob("portfolio_*.json"):
+        m = re.fullmatch(r"portfolio_(\d{8})\.json", p.name)
+        if not m or m.group(1) >= as_of.strftime("%Y%m%d"):
+            continue
+        if best is None or m.group(1) > best[0]:
+            best = (m.group(1), p)
+    return best[1] if best else None
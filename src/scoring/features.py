@@ -1,10 +1,32 @@
 from __future__ import annotations
 
 from datetime import date
+from typing import Optional
 import numpy as np
 import pandas as pd
 
 
+# 生のテクニカル指標（LLM分析・出力用）。列名は "_raw_" + 指標名の float 列
+RAW_TECHNICAL_FIELDS = ("mom_12m", "mom_6m", "mom_3m", "mom_1m", "volume_trend")
+RAW_TECHNICAL_COLUMNS = tuple(f"_raw_{k}" for k in RAW_TECHNICAL_FIELDS)
+
+
+def raw_technical_records(df: pd.DataFrame) -> list[dict[str, Optional[float]]]:
+    """生のテクニカル指標を行ごとの dict（NaN は None）で返す（LLM/JSON 層向けのビュー）。
+
+    列が無い場合は空の dict を返す。
+    """
+    cols = [c for c in RAW_TECHNICAL_COLUMNS if c in df.columns]
+    if not cols:
+        return [{} for _ in range(len(df))]
+    keys = [c[len("_raw_"):] for c in cols]
+    values = df[cols].to_numpy(dtype=float)
+    # object 配列にして NaN を None に置換（tolist で Python の float/None になる）
+    obj = values.astype(object)
+    obj[np.isnan(values)] = None
+    return [dict(zip(keys, row)) for row in obj.tolist()]
+
+
 def build_features_from_dummy(region: str, as_of: date, size: int = 120) -> pd.DataFrame:
     """MVP: ダミーの銘柄と特徴量を生成。
 
@@ -33,22 +55,51 @@ def build_features_from_dummy(region: str, as_of: date, size: int = 120) -> pd.D
         "news_signal": rng.normal(0.5, 0.2, size).clip(0, 1),
     })
     
-    # 生のテクニカル指標データを各行に追加
-    raw_technical_data = []
-    for i in range(size):
-        raw_technical_data.append({
-            "mom_12m": mom_12m[i],
-            "mom_6m": mom_6m[i],
-            "mom_3m": mom_3m[i],
-            "mom_1m": mom_1m[i],
-            "volume_trend": volume_trend[i],
-        })
-    
-    df["_raw_technical"] = raw_technical_data
+    # 生のテクニカル指標（float 列）
+    df["_raw_mom_12m"] = mom_12m
+    df["_raw_mom_6m"] = mom_6m
+    df["_raw_mom_3m"] = mom_3m
+    df["_raw_mom_1m"] = mom_1m
+    df["_raw_volume_trend"] = volume_trend
     
     return df
 
 
+def _compact_valid(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """列ごとに NaN を取り除いて末尾に詰めた行列と、各列の有効値の数を返す。
+
+    戻り値の compact[-k] は各列で k 番目に新しい有効値（= dropna 後の iloc[-k]）。
+    """
+    valid = ~np.isnan(values)
+    # False(欠損) を先頭、True(有効) を末尾に。stable なので有効値の時系列順は保たれる
+    order = np.argsort(valid, axis=0, kind="stable")
+    compact = np.take_along_axis(values, order, axis=0)
+    return compact, valid.sum(axis=0)
+
+
+def _momentum(compact: np.ndarray, count: np.ndarray, days: int) -> np.ndarray:
+    """直近値 / days 本前の値 - 1（有効値が days 本以下、または基準値が0なら NaN）。"""
+    out = np.full(compact.shape[1], np.nan)
+    if compact.shape[0] < days:
+        return out
+    last, base = compact[-1], compact[-days]
+    ok = (count > days) & (base != 0)
+    out[ok] = last[ok] / base[ok] - 1.0
+    return out
+
+
+def _volume_trend(compact: np.ndarray, count: np.ndarray, short: int = 10, long: int = 60) -> np.ndarray:
+    """直近 short 本 / long 本の出来高平均の比率（有効値が long 本未満、または長期平均0なら NaN）。"""
+    out = np.full(compact.shape[1], np.nan)
+    if compact.shape[0] < long:
+        return out
+    ma_short = compact[-short:].mean(axis=0)
+    ma_long = compact[-long:].mean(axis=0)
+    ok = (count >= long) & (ma_long != 0)
+    out[ok] = ma_short[ok] / ma_long[ok]
+    return out
+
+
 def build_features_from_prices(
     region: str,
     universe_df: pd.DataFrame,
@@ -59,6 +110,8 @@ def build_features_from_prices(
 
     - technical_mom_{1,3,6,12}m: リターン
     - technical_volume_trend: 直近10日/60日出来高移動平均の比率
+
+    ティッカー単位のループは行わず、価格・出来高パネル全体を行列演算で処理する。
     """
     tickers = [t for t in universe_df["ticker"] if t in prices.columns]
     if not tickers:
@@ -68,54 +121,41 @@ def build_features_from_prices(
             "technical_volume_trend", "quality_dilution", "news_signal",
         ])
 
-    feats = []
-    for t in tickers:
-        s = prices[t].dropna()
-        v = volumes[t].dropna() if t in volumes else None
-        if s.empty:
-            continue
-        def mom(days: int) -> float:
-            if len(s) <= days or s.iloc[-days] == 0:
-                return np.nan
-            return float(s.iloc[-1] / s.iloc[-days] - 1.0)
-
-        m12 = mom(252)
-        m6 = mom(126)
-        m3 = mom(63)
-        m1 = mom(21)
-
-        vol_trend = np.nan
-        if v is not None and not v.empty:
-            ma10 = v.rolling(10).mean()
-            ma60 = v.rolling(60).mean()
-            if not ma10.dropna().empty and not ma60.dropna().empty and ma60.iloc[-1] not in (0, np.nan):
-                vol_trend = float(ma10.iloc[-1] / ma60.iloc[-1])
-
-        name = universe_df.loc[universe_df["ticker"] == t, "name"].values[0]
-        feats.append({
-            "ticker": t,
-            "name": name,
-            # MVP: ファンダ/質/ニュースは一定値
-            "fundamental_roic": 0.5,
-            "fundamental_fcf_margin": 0.5,
-            "technical_mom_12m": m12,
-            "technical_mom_6m": m6,
-            "technical_mom_3m": m3,
-            "technical_mom_1m": m1,
-            "technical_volume_trend": vol_trend,
-            "quality_dilution": 0.5,
-            "news_signal": 0.5,
-            # 生のテクニカル指標データ（LLM分析用）
-            "_raw_technical": {
-                "mom_12m": m12,
-                "mom_6m": m6,
-                "mom_3m": m3,
-                "mom_1m": m1,
-                "volume_trend": vol_trend,
-            },
-        })
-
-    return pd.DataFrame(feats)
+    px, px_count = _compact_valid(prices[tickers].to_numpy(dtype=float))
+    vol_panel = volumes.reindex(columns=tickers) if volumes is not None else pd.DataFrame(index=prices.index, columns=tickers)
+    vol, vol_count = _compact_valid(vol_panel.to_numpy(dtype=float))
+
+    # 価格が1本も無いティッカーは除外
+    keep = px_count > 0
+    tickers = [t for t, k in zip(tickers, keep) if k]
+    m12 = _momentum(px, px_count, 252)[keep]
+    m6 = _momentum(px, px_count, 126)[keep]
+    m3 = _momentum(px, px_count, 63)[keep]
+    m1 = _momentum(px, px_count, 21)[keep]
+    vol_trend = _volume_trend(vol, vol_count)[keep]
+
+    names = universe_df.drop_duplicates("ticker").set_index("ticker")["name"].reindex(tickers).to_numpy()
+    df = pd.DataFrame({
+        "ticker": tickers,
+        "name": names,
+        # MVP: ファンダ/質/ニュースは一定値
+        "fundamental_roic": 0.5,
+        "fundamental_fcf_margin": 0.5,
+        "technical_mom_12m": m12,
+        "technical_mom_6m": m6,
+        "technical_mom_3m": m3,
+        "technical_mom_1m": m1,
+        "technical_volume_trend": vol_trend,
+        "quality_dilution": 0.5,
+        "news_signal": 0.5,
+        # 生のテクニカル指標（LLM分析用。正規化の対象外）
+        "_raw_mom_12m": m12,
+        "_raw_mom_6m": m6,
+        "_raw_mom_3m": m3,
+        "_raw_mom_1m": m1,
+        "_raw_volume_trend": vol_trend,
+    })
+    return df
 
 
 def merge_fundamentals(features_df: pd.DataFrame, fundamentals_df: pd.DataFrame) -> pd.DataFrame:
@@ -1,20 +1,9 @@
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 
 
-def _min_max(col: pd.Series) -> pd.Series:
-    # NaNを一旦補完
-    if col.isna().all():
-        return pd.Series([0.5] * len(col), index=col.index)
-    filled = col.fillna(col.median())
-    lo, hi = filled.min(), filled.max()
-    if hi == lo:
-        return pd.Series([0.5] * len(col), index=col.index)
-    scaled = (filled - lo) / (hi - lo)
-    return scaled.clip(0.0, 1.0)
-
-
 def normalize_growth_rate(rate: float) -> float:
     """成長率を0-1の範囲に正規化（極端な値を制限）
     
@@ -37,12 +26,92 @@ def normalize_growth_rate(rate: float) -> float:
         return (rate + 0.5) / 2.5
 
 
-def normalize_features(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+NORMALIZE_METHODS = ("minmax", "rank", "zscore")
+_ZSCORE_CLIP = 3.0
+
+
+def _feature_columns(df: pd.DataFrame) -> list[str]:
+    """正規化対象の列（ticker/name・"_" 始まりの内部列・数値化できない列を除く）。"""
+    cols = []
     for col in df.columns:
-        if col in ("ticker", "name", "_raw_technical"):
+        if col in ("ticker", "name") or str(col).startswith("_"):
             continue
-        df[col] = _min_max(df[col])
-    return df
+        s = df[col]
+        if pd.api.types.is_numeric_dtype(s):
+            cols.append(col)
+            continue
+        try:
+            pd.to_numeric(s)
+        except (TypeError, ValueError):
+            continue
+        cols.append(col)
+    return cols
+
+
+def _normalize_matrix(x: np.ndarray, method: str) -> np.ndarray:
+    """列ごとに [0, 1] へ正規化する（NaN を含む float 行列、列方向に一括処理）。
 
+    - minmax: NaN を列の中央値で補完し (x - min) / (max - min)
+    - rank: 有効値の順位（同順位は平均）を (rank - 1) / (n - 1)、NaN は 0.5
+    - zscore: (x - mean) / std を ±3 でクリップして [0, 1] へ線形変換、NaN は 0.5
+    列が全て NaN、または定数の場合は 0.5。
+    """
+    out = np.full(x.shape, 0.5)
+    if x.size == 0:
+        return out
+    valid = ~np.isnan(x)
+    n_valid = valid.sum(axis=0)
+    has = n_valid > 0
+    if not has.any():
+        return out
+    xs = x[:, has]
+    vs = valid[:, has]
+
+    if method == "minmax":
+        median = np.nanmedian(xs, axis=0)
+        filled = np.where(vs, xs, median)
+        lo, hi = filled.min(axis=0), filled.max(axis=0)
+        span = hi - lo
+        scaled = np.full(filled.shape, 0.5)
+        ok = span > 0
+        scaled[:, ok] = np.clip((filled[:, ok] - lo[ok]) / span[ok], 0.0, 1.0)
+    elif method == "rank":
+        from scipy.stats import rankdata
+
+        ranks = rankdata(xs, axis=0, nan_policy="omit")
+        denom = n_valid[has] - 1
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scaled = np.where(denom > 0, (ranks - 1.0) / np.maximum(denom, 1), 0.5)
+        scaled = np.where(vs, scaled, 0.5)
+    elif method == "zscore":
+        mean = np.nanmean(xs, axis=0)
+        std = np.nanstd(xs, axis=0)
+        scaled = np.full(xs.shape, 0.5)
+        ok = std > 0
+        z = (xs[:, ok] - mean[ok]) / std[ok]
+        z = np.clip(np.nan_to_num(z, nan=0.0), -_ZSCORE_CLIP, _ZSCORE_CLIP)
+        scaled[:, ok] = (z + _ZSCORE_CLIP) / (2.0 * _ZSCORE_CLIP)
+    else:
+        raise ValueError(f"unknown normalize method: {method} (expected one of {NORMALIZE_METHODS})")
+
+    out[:, has] = scaled
+    return out
 
+
+def normalize_features(df: pd.DataFrame, method: str = "minmax", inplace: bool = False) -> pd.DataFrame:
+    """識別列（ticker/name）と "_" 始まりの内部列（生の指標など）以外を [0, 1] に正規化する。
+
+    全特徴量列を1つの float 行列にまとめて一括処理する。
+    method: "minmax"（既定）/ "rank" / "zscore"
+    inplace=True の場合はコピーせず df を書き換えて返す。
+    """
+    if method not in NORMALIZE_METHODS:
+        raise ValueError(f"unknown normalize method: {method} (expected one of {NORMALIZE_METHODS})")
+    if not inplace:
+        df = df.copy()
+    cols = _feature_columns(df)
+    if not cols:
+        return df
+    x = df[cols].apply(pd.to_numeric).to_numpy(dtype=float)
+    df[cols] = _normalize_matrix(x, method)
+    return df
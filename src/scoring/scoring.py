@@ -1,7 +1,11 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import astuple, dataclass, fields
+from typing import Mapping, Sequence, Union
+
+import numpy as np
 import pandas as pd
+from scipy import sparse
 
 
 @dataclass
@@ -12,6 +16,70 @@ class ScoreWeights:
     news: float = 0.10         # 変更なし
     growth: float = 0.10       # 0.0 → 0.10
 
+    def as_vector(self) -> np.ndarray:
+        """SUBSCORES の順に並べた重みベクトル。"""
+        return np.asarray(astuple(self), dtype=float)
+
+
+# サブスコア名（ScoreWeights のフィールド順）→ 平均を取る特徴量列
+SUBSCORES = tuple(f.name for f in fields(ScoreWeights))
+SUBSCORE_FEATURES: dict[str, tuple[str, ...]] = {
+    "fundamental": ("fundamental_roic", "fundamental_fcf_margin"),
+    "technical": ("technical_mom_12m", "technical_volume_trend"),
+    "quality": ("quality_dilution",),
+    "news": ("news_signal",),
+    "growth": ("growth_revenue_cagr", "growth_eps_growth"),
+}
+# 列が無い場合に既定値で補う特徴量（成長は任意）
+_OPTIONAL_FEATURES = {"growth_revenue_cagr": 0.5, "growth_eps_growth": 0.5}
+
+Scenarios = Union[Mapping[str, ScoreWeights], Sequence[ScoreWeights]]
+
+
+def aggregation_matrix() -> tuple[list[str], sparse.csr_matrix]:
+    """特徴量列 × サブスコアの疎な所属行列（0/1）と、その行に対応する列名を返す。"""
+    columns: list[str] = []
+    rows: list[int] = []
+    cols: list[int] = []
+    for j, sub in enumerate(SUBSCORES):
+        for col in SUBSCORE_FEATURES[sub]:
+            rows.append(len(columns))
+            cols.append(j)
+            columns.append(col)
+    data = np.ones(len(rows))
+    return columns, sparse.csr_matrix((data, (rows, cols)), shape=(len(columns), len(SUBSCORES)))
+
+
+def _subscore_matrix(df: pd.DataFrame) -> np.ndarray:
+    """銘柄 × サブスコアの行列（各サブスコアは所属特徴量の NaN を除いた平均）。"""
+    columns, agg = aggregation_matrix()
+    missing = [c for c in columns if c not in df.columns and c not in _OPTIONAL_FEATURES]
+    if missing:
+        raise KeyError(f"missing feature columns: {missing}")
+    x = np.column_stack([
+        df[c].to_numpy(dtype=float) if c in df.columns else np.full(len(df), _OPTIONAL_FEATURES[c])
+        for c in columns
+    ]) if len(df) else np.empty((0, len(columns)))
+    valid = ~np.isnan(x)
+    # 疎行列の積で「合計」と「有効数」を同時に集計 → 平均（全て NaN なら NaN）
+    sums = np.asarray(agg.T @ np.where(valid, x, 0.0).T).T
+    counts = np.asarray(agg.T @ valid.T.astype(float)).T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1.0), np.nan)
+
+
+def _weight_matrix(scenarios: Scenarios) -> tuple[list, np.ndarray]:
+    """シナリオ名と、サブスコア × シナリオの重み行列を返す。"""
+    if isinstance(scenarios, Mapping):
+        names = list(scenarios.keys())
+        weights = list(scenarios.values())
+    else:
+        weights = list(scenarios)
+        names = list(range(len(weights)))
+    if not weights:
+        return names, np.empty((len(SUBSCORES), 0))
+    return names, np.column_stack([w.as_vector() for w in weights])
+
 
 def score_candidates(df_features: pd.DataFrame, weights: ScoreWeights) -> pd.DataFrame:
     """特徴量を合成してスコアリング。
@@ -20,28 +88,60 @@ def score_candidates(df_features: pd.DataFrame, weights: ScoreWeights) -> pd.Dat
     出力: score_fundamental, score_technical, score_quality, score_news, score_growth, score_overall
     """
     df = df_features.copy()
-    df["score_fundamental"] = (
-        df[["fundamental_roic", "fundamental_fcf_margin"]].mean(axis=1)
-    )
-    df["score_technical"] = (
-        df[["technical_mom_12m", "technical_volume_trend"]].mean(axis=1)
-    )
-    df["score_quality"] = df[["quality_dilution"]].mean(axis=1)
-    df["score_news"] = df[["news_signal"]].mean(axis=1)
     # 成長（列がなければ0.5で安全に平均化）
-    if "growth_revenue_cagr" not in df.columns:
-        df["growth_revenue_cagr"] = 0.5
-    if "growth_eps_growth" not in df.columns:
-        df["growth_eps_growth"] = 0.5
-    df["score_growth"] = df[["growth_revenue_cagr", "growth_eps_growth"]].mean(axis=1)
-
-    df["score_overall"] = (
-        weights.fundamental * df["score_fundamental"]
-        + weights.technical * df["score_technical"]
-        + weights.quality * df["score_quality"]
-        + weights.news * df["score_news"]
-        + weights.growth * df["score_growth"]
-    )
+    for col, default in _OPTIONAL_FEATURES.items():
+        if col not in df.columns:
+            df[col] = default
+    sub = _subscore_matrix(df)
+    for j, name in enumerate(SUBSCORES):
+        df[f"score_{name}"] = sub[:, j]
+    df["score_overall"] = sub @ weights.as_vector()
     return df
 
 
+def score_scenarios(df_features: pd.DataFrame, scenarios: Scenarios) -> pd.DataFrame:
+    """複数の重みシナリオでの総合スコアを1回の行列積で計算する。
+
+    scenarios: {名前: ScoreWeights} または ScoreWeights の列（列名は 0, 1, ...）
+    出力: 銘柄（ticker 列があればそれを index）× シナリオの score_overall 行列
+    """
+    sub = _subscore_matrix(df_features)
+    names, w = _weight_matrix(scenarios)
+    index = pd.Index(df_features["ticker"], name="ticker") if "ticker" in df_features.columns else df_features.index
+    return pd.DataFrame(sub @ w, index=index, columns=names)
+
+
+def _top_n_positions(values: np.ndarray, n: int) -> np.ndarray:
+    """降順の上位 n 件の位置（同値は元の順、NaN は末尾）。部分選択のみで全体ソートはしない。"""
+    size = len(values)
+    n = max(0, min(n, size))
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+    isnan = np.isnan(values)
+    key = np.where(isnan, -np.inf, values)
+    if n < size:
+        # n 番目の値（しきい値）を O(size) で求め、それより大きいものと同値の先頭分を採用
+        threshold = np.partition(key, size - n)[size - n]
+        above = np.flatnonzero(key > threshold)
+        ties = np.flatnonzero(key == threshold)
+        if np.isneginf(threshold):
+            ties = np.concatenate([ties[~isnan[ties]], ties[isnan[ties]]])
+        cand = np.concatenate([above, ties[: n - len(above)]])
+    else:
+        cand = np.arange(size)
+    # 選ばれた n 件だけを (値の降順, NaN は後, 元の位置) で並べる
+    order = np.lexsort((cand, isnan[cand], -key[cand]))
+    return cand[order]
+
+
+def select_top_n(df_scored: pd.DataFrame, columns: Sequence[str], n: int) -> dict[str, pd.DataFrame]:
+    """複数のスコア列それぞれの上位 n 件を返す（列名 → 上位行の DataFrame）。
+
+    sort_values(col, ascending=False).head(n) と同じ並び（同値は元の順）を、
+    スコア行列に対する部分選択で求める。
+    """
+    scores = df_scored[list(columns)].to_numpy(dtype=float)
+    return {
+        col: df_scored.iloc[_top_n_positions(scores[:, j], n)]
+        for j, col in enumerate(columns)
+    }
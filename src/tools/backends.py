@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Protocol
+import json
+import random
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from .price_store import PriceStore
+
+
+class DataBackend(Protocol):
+    """市場データのバックエンドIF（yfinance 互換の最小サブセット）。
+
+    - download(tickers=..., period=... | start=..., group_by=..., ...): 日足の DataFrame
+    - Ticker(symbol): financials / quarterly_financials / balance_sheet / info / news を持つオブジェクト
+    - available(): 利用可能か（依存パッケージの有無など）
+    """
+
+    name: str
+
+    def download(self, tickers, **kwargs) -> pd.DataFrame: ...
+
+    def Ticker(self, symbol: str): ...
+
+    def available(self) -> bool: ...
+
+
+class BackendError(RuntimeError):
+    """ローカルバックエンドが注入する疑似エラー（スロットリング・通信断相当）。"""
+
+
+class YFinanceBackend:
+    """yfinance への薄い委譲。import は呼び出し時に行う（未導入環境でも読み込み可能）。"""
+
+    name = "yfinance"
+
+    def download(self, tickers, **kwargs) -> pd.DataFrame:
+        import yfinance as yf
+
+        return yf.download(tickers=tickers, **kwargs)
+
+    def Ticker(self, symbol: str):
+        import yfinance as yf
+
+        return yf.Ticker(symbol)
+
+    def available(self) -> bool:
+        try:
+            import yfinance  # noqa: F401
+        except Exception:
+            return False
+        return True
+
+
+# 合成価格の起点日（固定にすることで、全期間取得と差分取得の結果が一致する）
+_SYNTH_EPOCH = pd.Timestamp("2015-01-01")
+_PERIOD_DAYS = {"d": 1, "wk": 7, "mo": 31, "y": 366}
+_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+def _seed_for(ticker: str, salt: int = 0) -> int:
+    return (zlib.crc32(str(ticker).encode("utf-8")) + salt) & 0xFFFFFFFF
+
+
+def _period_start(period: Optional[str], end: pd.Timestamp) -> pd.Timestamp:
+    """yfinance の period 表記（5d/6mo/1y/2y/max）を開始日に変換する。"""
+    if not period or period == "max":
+        return _SYNTH_EPOCH
+    for unit, days in _PERIOD_DAYS.items():
+        if period.endswith(unit) and period[: -len(unit)].isdigit():
+            return end - pd.Timedelta(days=int(period[: -len(unit)]) * days)
+    raise ValueError(f"unsupported period: {period}")
+
+
+class _LocalTicker:
+    """LocalBackend.Ticker の戻り値（yfinance.Ticker の必要属性のみ）。"""
+
+    def __init__(self, backend: "LocalBackend", symbol: str):
+        self._backend = backend
+        self.ticker = symbol
+        self._failed: Optional[bool] = None  # 疑似エラーは Ticker 単位で1回だけ判定する
+        rng = np.random.default_rng(_seed_for(symbol, 1))
+        # 売上規模・成長率・利益率は銘柄ごとに固定（決定的）
+        self._revenue = float(rng.lognormal(mean=23.0, sigma=1.0))
+        self._growth = float(rng.normal(0.06, 0.08))
+        self._margin = float(rng.uniform(0.05, 0.30))
+        self._debt_ratio = float(rng.uniform(0.0, 0.6))
+        self._pe = float(rng.uniform(6.0, 40.0))
+        self._pb = float(rng.uniform(0.5, 6.0))
+
+    def _request(self) -> None:
+        if self._backend.latency > 0:
+            time.sleep(self._backend.latency)
+        if self._failed is None:
+            self._failed = self._backend._fails()
+        if self._failed:
+            raise BackendError(f"injected error for {self.ticker}")
+
+    def _statement(self, periods: int, step_years: float) -> pd.DataFrame:
+        end = pd.Timestamp(datetime.utcnow().date()).to_period("Q").start_time - pd.Timedelta(days=1)
+        cols = [end - pd.DateOffset(months=int(12 * step_years * k)) for k in range(periods)]
+        scale = step_years
+        revenue = [self._revenue * scale / (1.0 + self._growth) ** (k * step_years) for k in range(periods)]
+        net = [r * self._margin for r in revenue]
+        return pd.DataFrame(
+            {
+                c: {
+                    "Total Revenue": r,
+                    "EBITDA": r * (self._margin + 0.08),
+                    "Net Income Common Stockholders": n,
+                    "Diluted EPS": n / 1e8,
+                }
+                for c, r, n in zip(cols, revenue, net)
+            }
+        )
+
+    @property
+    def financials(self) -> pd.DataFrame:
+        self._request()
+        return self._statement(4, 1.0)
+
+    @property
+    def quarterly_financials(self) -> pd.DataFrame:
+        self._request()
+        return self._statement(8, 0.25)
+
+    @property
+    def balance_sheet(self) -> pd.DataFrame:
+        self._request()
+        end = pd.Timestamp(datetime.utcnow().date()).to_period("Y").start_time - pd.Timedelta(days=1)
+        debt = self._revenue * self._debt_ratio
+        return pd.DataFrame({end: {"Total Debt": debt, "Cash And Cash Equivalents": debt * 0.4}})
+
+    @property
+    def info(self) -> Dict:
+        self._request()
+        recorded = self._backend._recorded(self.ticker).get("info")
+        if recorded is not None:
+            return dict(recorded)
+        return {"trailingPE": self._pe, "priceToBook": self._pb, "revenueGrowth": self._growth}
+
+    @property
+    def news(self) -> List[Dict]:
+        self._request()
+        recorded = self._backend._recorded(self.ticker).get("news")
+        if recorded is not None:
+            return list(recorded)
+        rng = np.random.default_rng(_seed_for(self.ticker, 2))
+        today = datetime.utcnow().date()
+        titles = ["beats estimates", "raises guidance", "misses estimates", "announces buyback", "cuts outlook"]
+        items = []
+        for k in range(int(rng.integers(1, 6))):
+            d = datetime(today.year, today.month, today.day) - timedelta(days=int(rng.integers(0, 30)))
+            items.append({
+                "title": f"{self.ticker} {titles[int(rng.integers(0, len(titles)))]}",
+                "link": f"https://local.invalid/{self.ticker}/{k}",
+                "providerPublishTime": int(d.timestamp()),
+            })
+        return items
+
+
+@dataclass
+class LocalBackend:
+    """ネットワークを使わない決定的なバックエンド（ベンチマーク・CI用）。
+
+    - 価格: root に PriceStore 形式の記録（<ticker>.npz）があればそれを、なければ
+      ティッカーから決まる乱数で生成した幾何ブラウン運動を返す
+    - 財務・ニュース: 合成値（root/<ticker>.json に info / news があればそれを優先）
+    - latency: 1リクエストあたりの待ち時間（秒）
+    - error_rate: 疑似エラー（BackendError）の発生確率（download 1回・Ticker 1つごと）。
+      一括取得では該当ティッカーが欠落する
+    """
+
+    root: Optional[str | Path] = None
+    latency: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+    name: str = field(default="local", init=False)
+
+    def __post_init__(self) -> None:
+        if not (0.0 <= self.error_rate <= 1.0):
+            raise ValueError("error_rate must be in [0, 1]")
+        self._store = PriceStore(self.root) if self.root else None
+        self._rng = random.Random(self.seed)
+        self._rng_lock = Lock()
+        self.requests = 0
+
+    def available(self) -> bool:
+        return True
+
+    def _fails(self) -> bool:
+        with self._rng_lock:
+            self.requests += 1
+            return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+    def _recorded(self, ticker: str) -> Dict:
+        if self.root is None:
+            return {}
+        p = Path(self.root) / f"{ticker}.json"
+        if not p.exists():
+            return {}
+        return json.loads(p.read_text(encoding="utf-8"))
+
+    def _synthetic(self, ticker: str, n: int):
+        """起点日から n 営業日分の (close, volume) を生成する。
+
+        起点を固定した系列なので、同じ日付の値は取得日・取得範囲に依らず一致する。
+        """
+        rng = np.random.default_rng(_seed_for(ticker))
+        drift, vol = rng.normal(0.0003, 0.0003), rng.uniform(0.01, 0.03)
+        start_price = float(rng.uniform(10.0, 500.0))
+        close = start_price * np.exp(np.cumsum(rng.normal(drift, vol, size=n)))
+        volume = np.round(rng.lognormal(13.0, 0.5, size=n))
+        return close, volume
+
+    def _bars(self, ticker: str, full_idx: pd.DatetimeIndex, window: np.ndarray) -> Dict[str, np.ndarray]:
+        """window（full_idx 上の真偽マスク）の OHLCV を列ごとの配列で返す。"""
+        stored = self._store.load(ticker) if self._store is not None else None
+        if stored is not None:
+            idx = full_idx[window]
+            close = stored[0].reindex(idx).to_numpy(dtype=float)
+            volume = stored[1].reindex(idx).to_numpy(dtype=float)
+        else:
+            close, volume = self._synthetic(ticker, len(full_idx))
+            close, volume = close[window], volume[window]
+        prev = np.concatenate([close[:1], close[:-1]])
+        return {
+            "Open": prev,
+            "High": np.maximum(prev, close) * 1.01,
+            "Low": np.minimum(prev, close) * 0.99,
+            "Close": close,
+            "Volume": volume,
+        }
+
+    def download(
+        self,
+        tickers,
+        period: Optional[str] = None,
+        start=None,
+        end=None,
+        group_by: str = "column",
+        **kwargs,
+    ) -> pd.DataFrame:
+        """yfinance.download 互換。単一ティッカー（文字列）はフラットな列、複数は MultiIndex。"""
+        single = isinstance(tickers, str) and " " not in tickers.strip()
+        symbols = [tickers] if single else (tickers.split() if isinstance(tickers, str) else list(tickers))
+        end_ts = pd.Timestamp(end) if end is not None else pd.Timestamp(datetime.utcnow().date())
+        start_ts = pd.Timestamp(start) if start is not None else _period_start(period, end_ts)
+        # end は yfinance と同様に排他的
+        full_idx = pd.bdate_range(_SYNTH_EPOCH, end_ts - pd.Timedelta(days=1))
+        window = np.asarray(full_idx >= start_ts)
+        idx = full_idx[window]
+
+        if self.latency > 0:
+            time.sleep(self.latency)
+        if single:
+            if self._fails():
+                raise BackendError(f"injected error for {tickers}")
+            return pd.DataFrame(self._bars(tickers, full_idx, window), index=idx)
+
+        # 一括取得: 失敗したティッカーは欠落する（yfinance と同様に例外にはしない）
+        bars = {t: self._bars(t, full_idx, window) for t in symbols if not self._fails()}
+        if not bars:
+            return pd.DataFrame()
+        if group_by == "ticker":
+            cols = [(t, f) for t, b in bars.items() for f in b]
+        else:
+            cols = [(f, t) for f in _FIELDS for t in bars]
+        values = np.column_stack([bars[c[0]][c[1]] if group_by == "ticker" else bars[c[1]][c[0]] for c in cols])
+        return pd.DataFrame(values, index=idx, columns=pd.MultiIndex.from_tuples(cols))
+
+    def Ticker(self, symbol: str) -> _LocalTicker:
+        return _LocalTicker(self, symbol)
+
+
+_backend: Optional[DataBackend] = None
+_backend_lock = Lock()
+
+
+def get_backend() -> DataBackend:
+    """プロセス共有のデータバックエンドを返す（既定は yfinance）。"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = YFinanceBackend()
+        return _backend
+
+
+def configure_backend(
+    name: str = "yfinance",
+    root: Optional[str] = None,
+    latency: float = 0.0,
+    error_rate: float = 0.0,
+    seed: int = 0,
+) -> DataBackend:
+    """プロセス共有のデータバックエンドを切り替える（yfinance / local）。"""
+    global _backend
+    name = (name or "yfinance").lower()
+    if name == "yfinance":
+        backend: DataBackend = YFinanceBackend()
+    elif name == "local":
+        backend = LocalBackend(root=root, latency=latency, error_rate=error_rate, seed=seed)
+    else:
+        raise ValueError(f"unknown data backend: {name}")
+    with _backend_lock:
+        _backend = backend
+    return backend
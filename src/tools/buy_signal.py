@@ -4,17 +4,20 @@ from typing import Iterable, Callable, Dict
 
 import pandas as pd
 
+from .backends import DataBackend, get_backend
 
-def _fetch_metrics_yfinance(ticker: str) -> Dict[str, float]:
+
+def _fetch_metrics_yfinance(ticker: str, backend: DataBackend | None = None) -> Dict[str, float]:
     """Fetch valuation and growth metrics for *ticker* using yfinance.
 
+    The data source is *backend* (defaults to the process-wide backend from
+    ``get_backend()``, i.e. yfinance unless configured otherwise).
+
     Returns a dictionary with keys ``pe``, ``pb``, ``revenue_growth``,
     ``eps_growth`` and ``peg_ratio``. Missing values are returned as
     ``None``.
     """
-    import yfinance as yf
-
-    t = yf.Ticker(ticker)
+    t = (backend or get_backend()).Ticker(ticker)
     info = t.info
 
     eps_growth = None
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+COV_METHODS = ("sample", "ledoit_wolf", "ewma", "factor")
+
+
+@dataclass
+class DenseCovariance:
+    """n×n の共分散行列をそのまま持つ共分散モデル。"""
+
+    matrix: np.ndarray
+    tickers: List[str]
+
+    def matvec(self, w: np.ndarray) -> np.ndarray:
+        return self.matrix @ w
+
+    def quad(self, w: np.ndarray) -> float:
+        return float(w @ self.matrix @ w)
+
+    def diag(self) -> np.ndarray:
+        return np.diag(self.matrix).copy()
+
+    def dense(self) -> np.ndarray:
+        return self.matrix
+
+
+@dataclass
+class FactorCovariance:
+    """低ランクのファクターモデル Σ = B F B' + diag(d)（B: n×k, F: k×k, d: 固有分散）。
+
+    Σw は B(F(B'w)) + d∘w として O(nk) で計算し、n×n 行列は dense() を呼ぶまで作らない。
+    """
+
+    loadings: np.ndarray
+    factor_cov: np.ndarray
+    idio: np.ndarray
+    tickers: List[str]
+    _dense: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+
+    def matvec(self, w: np.ndarray) -> np.ndarray:
+        return self.loadings @ (self.factor_cov @ (self.loadings.T @ w)) + self.idio * w
+
+    def quad(self, w: np.ndarray) -> float:
+        f = self.loadings.T @ w
+        return float(f @ self.factor_cov @ f + (self.idio * w) @ w)
+
+    def diag(self) -> np.ndarray:
+        return np.einsum("ik,kl,il->i", self.loadings, self.factor_cov, self.loadings) + self.idio
+
+    def dense(self) -> np.ndarray:
+        if self._dense is None:
+            m = self.loadings @ self.factor_cov @ self.loadings.T
+            m[np.diag_indices_from(m)] += self.idio
+            self._dense = m
+        return self._dense
+
+
+CovarianceModel = DenseCovariance | FactorCovariance
+
+
+def as_covariance_model(cov: pd.DataFrame | CovarianceModel) -> CovarianceModel:
+    """DataFrame（対称化する）または共分散モデルを共分散モデルとして返す。"""
+    if isinstance(cov, (DenseCovariance, FactorCovariance)):
+        return cov
+    m = np.asarray(cov.values, dtype=float)
+    return DenseCovariance(matrix=0.5 * (m + m.T), tickers=[str(c) for c in cov.columns])
+
+
+def _demeaned(rets: pd.DataFrame) -> np.ndarray:
+    """列ごとに平均を引き、欠損を 0（=平均）で埋めた T×n の行列。"""
+    x = rets.to_numpy(dtype=float)
+    x = x - np.nanmean(x, axis=0)
+    return np.nan_to_num(x, nan=0.0)
+
+
+def ledoit_wolf(rets: pd.DataFrame, trading_days: int = 252) -> DenseCovariance:
+    """Ledoit-Wolf 縮小推定（目標は分散の平均 × 単位行列）。銘柄数が観測数を超えても正定値。"""
+    x = _demeaned(rets)
+    t, n = x.shape
+    s = x.T @ x / t
+    m = float(np.trace(s)) / n
+    d2 = float(((s - m * np.eye(n)) ** 2).sum())
+    # b̄² = (1/T²) Σ_t ‖x_t x_t' - S‖² = (1/T²)(Σ_t ‖x_t‖⁴ - T‖S‖²)
+    b2 = (float((np.einsum("ti,ti->t", x, x) ** 2).sum()) - t * float((s * s).sum())) / t ** 2
+    shrink = min(max(b2, 0.0), d2) / d2 if d2 > 0 else 1.0
+    sigma = (1.0 - shrink) * s
+    sigma[np.diag_indices_from(sigma)] += shrink * m
+    return DenseCovariance(matrix=sigma * trading_days, tickers=[str(c) for c in rets.columns])
+
+
+def ewma_covariance(rets: pd.DataFrame, halflife: float = 63.0, trading_days: int = 252) -> DenseCovariance:
+    """指数加重（半減期 halflife 日）の共分散。直近の相関・ボラを重視する。"""
+    x = rets.to_numpy(dtype=float)
+    t = x.shape[0]
+    w = 0.5 ** (np.arange(t)[::-1] / halflife)
+    w /= w.sum()
+    mean = np.nansum(x * w[:, None], axis=0)
+    xc = np.nan_to_num(x - mean, nan=0.0) * np.sqrt(w)[:, None]
+    sigma = xc.T @ xc
+    return DenseCovariance(matrix=sigma * trading_days, tickers=[str(c) for c in rets.columns])
+
+
+def factor_covariance(
+    rets: pd.DataFrame,
+    n_factors: int = 5,
+    trading_days: int = 252,
+    idio_floor: float = 0.01,
+) -> FactorCovariance:
+    """主成分（上位 n_factors）によるファクターモデル。固有分散は総分散の idio_floor 倍を下限とする。
+
+    T×n のリターン行列の特異値分解だけを使うので、n×n 行列を作らずに O(T·n·min(T, n)) で推定できる。
+    """
+    x = _demeaned(rets)
+    t, n = x.shape
+    k = max(0, min(n_factors, n - 1, t - 1))
+    _, s, vt = np.linalg.svd(x, full_matrices=False)
+    loadings = vt[:k].T * (s[:k] / np.sqrt(max(t - 1, 1)))
+    total = (x * x).sum(axis=0) / max(t - 1, 1)
+    idio = np.maximum(total - (loadings ** 2).sum(axis=1), idio_floor * total)
+    idio = np.maximum(idio, 1e-12)
+    return FactorCovariance(
+        loadings=loadings * np.sqrt(trading_days),
+        factor_cov=np.eye(k),
+        idio=idio * trading_days,
+        tickers=[str(c) for c in rets.columns],
+    )
+
+
+def estimate_covariance(
+    rets: pd.DataFrame,
+    method: str = "sample",
+    trading_days: int = 252,
+    n_factors: int = 5,
+    halflife: float = 63.0,
+) -> CovarianceModel:
+    """日次リターンから年率の共分散モデルを推定する。
+
+    - sample: 標本共分散（欠損はペアワイズ）
+    - ledoit_wolf: 縮小推定
+    - ewma: 指数加重（halflife 日）
+    - factor: 主成分ファクターモデル（n_factors 本 + 固有分散）
+    """
+    if method not in COV_METHODS:
+        raise ValueError(f"unknown covariance method: {method} (expected one of {COV_METHODS})")
+    if method == "ledoit_wolf":
+        return ledoit_wolf(rets, trading_days)
+    if method == "ewma":
+        return ewma_covariance(rets, halflife, trading_days)
+    if method == "factor":
+        return factor_covariance(rets, n_factors, trading_days)
+    return as_covariance_model(rets.cov() * trading_days)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from threading import Event
+from typing import Dict, List
+
+import pandas as pd
+
+from .fundamentals import FundamentalsClient
+from .marketdata import MarketDataClient
+from .news import NewsClient
+
+
+DEFAULT_FUNDAMENTAL_FIELDS = ["roic", "fcf_margin", "revenue_cagr", "eps_growth"]
+
+
+@dataclass
+class RegionData:
+    """1地域分の取得結果（価格・出来高・財務・ニュース）。"""
+
+    prices: pd.DataFrame
+    volumes: pd.DataFrame
+    fundamentals: pd.DataFrame
+    news: List[Dict] = field(default_factory=list)
+
+
+async def afetch_region_data(
+    tickers: List[str],
+    since: date,
+    marketdata: MarketDataClient,
+    fundamentals: FundamentalsClient,
+    news: NewsClient,
+    lookback_days: int = 260,
+    fields: List[str] | None = None,
+    as_of: date | None = None,
+) -> RegionData:
+    """価格・財務・ニュースを同時に取得する。
+
+    価格は as_of（既定は当日）までの lookback_days 日分、ニュースは since 以降。
+
+    3系統は互いに依存しないため並行に発行する。yfinance呼び出しはブロッキングなので
+    各クライアントはワーカースレッドで実行し、外部APIへのペースは各クライアントが
+    共有する limiter（既定はプロセス共有）が一括で制御する。
+    価格が1本も取れなかった場合は特徴量を作れないため、財務・ニュースの
+    未着手分は取りやめる（障害時に失敗リクエストで limiter を消耗しないため）。
+    """
+    fields = fields or DEFAULT_FUNDAMENTAL_FIELDS
+    cancel = Event()
+
+    async def _prices():
+        try:
+            result = await asyncio.to_thread(marketdata.get_prices, tickers, lookback_days=lookback_days, as_of=as_of)
+        except Exception:
+            cancel.set()
+            raise
+        if result is None or result[0] is None or result[0].empty:
+            cancel.set()
+        return result
+
+    (prices, volumes), fdf, items = await asyncio.gather(
+        _prices(),
+        asyncio.to_thread(fundamentals.get_fundamentals, tickers, fields, cancel=cancel),
+        asyncio.to_thread(news.get_news, tickers, since, cancel=cancel),
+    )
+    return RegionData(
+        prices=prices if prices is not None else pd.DataFrame(),
+        volumes=volumes if volumes is not None else pd.DataFrame(),
+        fundamentals=fdf if fdf is not None else pd.DataFrame(),
+        news=items or [],
+    )
+
+
+def fetch_region_data(
+    tickers: List[str],
+    since: date,
+    marketdata: MarketDataClient,
+    fundamentals: FundamentalsClient,
+    news: NewsClient,
+    lookback_days: int = 260,
+    fields: List[str] | None = None,
+    as_of: date | None = None,
+) -> RegionData:
+    """afetch_region_data の同期ラッパ（RegionAgent.run など同期コードから利用）。
+
+    既にイベントループが動いているスレッドから呼ばれた場合は別スレッドで実行する。
+    """
+    coro = afetch_region_data(tickers, since, marketdata, fundamentals, news, lookback_days, fields, as_of)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
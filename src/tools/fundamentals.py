@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from datetime import date
 from typing import List, Dict, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
-import time
+from threading import Event
 import logging
 
 import pandas as pd
 
+from .backends import DataBackend, get_backend
+from .ratelimit import RateLimiter, get_shared_limiter
+
 
 def _is_etf(ticker: str) -> bool:
     """ETFかどうかを判定（fundamentals取得をスキップするため）"""
@@ -37,35 +41,40 @@ def _is_etf(ticker: str) -> bool:
 class FundamentalsClient:
     """Fundamentals via yfinance/yahooquery (MVP: 実装容易性重視の薄いラッパ)。
     本番では安定APIに差し替え可能なIFを維持する。
+    レート制御は limiter（既定はプロセス共有のトークンバケット）に委ねる。
+    データの取得元は backend（既定はプロセス共有の get_backend()）。
     """
     
-    def __init__(self, max_workers: int = 1, retry_attempts: int = 2, retry_delay: float = 1.0, request_interval: float = 0.5):
+    def __init__(self, max_workers: int = 1, retry_attempts: int = 2, limiter: Optional[RateLimiter] = None, backend: Optional[DataBackend] = None):
         self.max_workers = max_workers  # レート制限対策でデフォルト1に変更
         self.retry_attempts = retry_attempts
-        self.retry_delay = retry_delay
-        self.request_interval = request_interval  # リクエスト間隔（秒）
+        self.limiter = limiter or get_shared_limiter()
+        self.backend = backend  # None なら呼び出し時点の共有バックエンドを使う
         self._cache = {}  # 簡易キャッシュ
 
-    def _fetch_single_ticker_with_retry(self, ticker: str) -> Optional[Dict[str, float]]:
+    def _fetch_single_ticker_with_retry(self, ticker: str, cancel: Optional[Event] = None) -> Optional[Dict[str, float]]:
         """単一ティッカーの財務データ取得（リトライ付き）
 
-        一部ティッカーで一時的に空データが返ることがあるため、
-        リトライ時には短いスリープを挟み再試行する。
+        一部ティッカーで一時的に空データが返ることがあるため再試行する。
+        成否は limiter に通知し、再試行までの待ちは limiter の減速に委ねる。
         """
         # ETFはfundamentals取得をスキップ
         if _is_etf(ticker):
             logging.info(f"Skipping fundamentals for ETF: {ticker}")
             return None
             
-        import yfinance as yf
+        backend = self.backend or get_backend()
         
         for attempt in range(self.retry_attempts):
+            if cancel is not None and cancel.is_set():
+                return None
             try:
                 data: Dict[str, float] = {}
-                tk = yf.Ticker(ticker)
-                fin = tk.financials if hasattr(tk, "financials") else None
-                qf = tk.quarterly_financials if hasattr(tk, "quarterly_financials") else None
-                bal = tk.balance_sheet if hasattr(tk, "balance_sheet") else None
+                with self.limiter.acquire():
+                    tk = backend.Ticker(ticker)
+                    fin = tk.financials if hasattr(tk, "financials") else None
+                    qf = tk.quarterly_financials if hasattr(tk, "quarterly_financials") else None
+                    bal = tk.balance_sheet if hasattr(tk, "balance_sheet") else None
                 
                 # 簡易近似: TTM相当は直近4四半期合算（なければ年次の最終列を使用）
                 def _sum_last_quarters(df, rows):
@@ -139,27 +148,26 @@ class FundamentalsClient:
                 )):
                     raise RuntimeError("empty fundamentals")
 
-                # 成功時はリクエスト間隔を設ける（レート制限対策）
-                time.sleep(self.request_interval)
+                self.limiter.record_success()
                 return data
                 
             except Exception as e:
+                self.limiter.record_failure()
                 if attempt < self.retry_attempts - 1:
-                    time.sleep(self.retry_delay * (2 ** attempt))  # 指数バックオフ
                     continue
                 logging.warning(f"Failed to fetch fundamentals for {ticker} after {self.retry_attempts} attempts: {e}")
                 return None
         
         return None
 
-    def _fetch_raw_financials(self, tickers: List[str]) -> Dict[str, Dict]:
+    def _fetch_raw_financials(self, tickers: List[str], cancel: Optional[Event] = None) -> Dict[str, Dict]:
         """生データ取得。yfinanceは制約が多いため、将来安定APIへ移行可能に。
         戻り値: {ticker: {revenue_ttm, revenue_prev_ttm, eps_ttm, eps_prev_ttm, ebitda_ttm, net_debt, nopat_ttm, invested_capital, fcf_ttm}}
-        取得できない値は欠損のまま。
+        取得できない値は欠損のまま。cancel がセットされると未着手のティッカーは取得しない。
         """
         # キャッシュチェック
         cache_key = f"{','.join(sorted(tickers))}"
-        today = time.strftime("%Y-%m-%d")
+        today = date.today().isoformat()
         if cache_key in self._cache and self._cache[cache_key]['date'] == today:
             return self._cache[cache_key]['data']
         
@@ -172,38 +180,29 @@ class FundamentalsClient:
         non_etf_tickers = [t for t in tickers if not _is_etf(t)]
         logging.info(f"Processing {len(non_etf_tickers)} non-ETF tickers out of {len(tickers)} total")
         
-        # バッチサイズを制限（レート制限対策）
-        batch_size = 10
-        batches = [non_etf_tickers[i:i+batch_size] for i in range(0, len(non_etf_tickers), batch_size)]
-        
-        for batch_idx, batch in enumerate(batches):
-            if batch_idx > 0:
-                # バッチ間隔を設ける（レート制限対策）
-                time.sleep(2.0)
-                logging.info(f"Processing batch {batch_idx + 1}/{len(batches)}")
+        # 並列で財務データ取得（ペースは共有 limiter が制御）
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            future_to_ticker = {
+                executor.submit(self._fetch_single_ticker_with_retry, t, cancel): t 
+                for t in non_etf_tickers
+            }
             
-            # 並列で財務データ取得
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                future_to_ticker = {
-                    executor.submit(self._fetch_single_ticker_with_retry, t): t 
-                    for t in batch
-                }
-                
-                for future in as_completed(future_to_ticker):
-                    ticker = future_to_ticker[future]
-                    try:
-                        data = future.result()
-                        if data is not None:
-                            result[ticker] = data
-                    except Exception as e:
-                        logging.warning(f"Error fetching fundamentals for {ticker}: {e}")
-                        continue
+            for future in as_completed(future_to_ticker):
+                ticker = future_to_ticker[future]
+                try:
+                    data = future.result()
+                    if data is not None:
+                        result[ticker] = data
+                except Exception as e:
+                    logging.warning(f"Error fetching fundamentals for {ticker}: {e}")
+                    continue
         
-        # キャッシュに保存
-        self._cache[cache_key] = {
-            'date': today,
-            'data': result
-        }
+        # キャッシュに保存（中断された不完全な結果は保存しない）
+        if cancel is None or not cancel.is_set():
+            self._cache[cache_key] = {
+                'date': today,
+                'data': result
+            }
         
         return result
 
@@ -236,8 +235,8 @@ class FundamentalsClient:
             rows.append(row)
         return pd.DataFrame(rows)
 
-    def get_fundamentals(self, tickers: List[str], fields: List[str]) -> pd.DataFrame:
-        raw = self._fetch_raw_financials(tickers)
+    def get_fundamentals(self, tickers: List[str], fields: List[str], cancel: Optional[Event] = None) -> pd.DataFrame:
+        raw = self._fetch_raw_financials(tickers, cancel)
         df = self._compute_fields(raw, fields)
         if "ticker" not in df.columns:
             df.insert(0, "ticker", tickers)
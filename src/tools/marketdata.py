@@ -2,84 +2,107 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from typing import List, Tuple, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import BoundedSemaphore
-import time
+from threading import Lock
 import logging
 
 import pandas as pd
 
+from .backends import DataBackend, get_backend
+from .price_store import PriceStore
+from .ratelimit import RateLimiter, get_shared_limiter
+
+
+# 差分取得で重なる最終バーの終値がこの相対誤差を超えて食い違えば、過去分が再調整されたとみなす
+_ADJUST_TOLERANCE = 1e-4
+
+
+def _same_close(fetched: float, stored: float) -> bool:
+    return abs(float(fetched) - stored) <= _ADJUST_TOLERANCE * max(abs(stored), 1e-12)
+
+
+def _window(period: Optional[str], start: Optional[str], end: Optional[str]) -> dict:
+    """download に渡す取得範囲（start/end 指定を優先し、なければ period）。"""
+    if start is None:
+        return {"period": period}
+    window = {"start": start}
+    if end is not None:
+        window["end"] = end
+    return window
+
 
 @dataclass
 class MarketDataClient:
-    """市場データ取得（yfinanceバックエンド）。
+    """市場データ取得（既定は yfinance バックエンド）。
 
     get_prices: 指定ティッカーの終値と出来高を返す。
     戻り値: (prices_df, volumes_df)
       - rows: DatetimeIndex（日次）
       - cols: ティッカー
+
+    store を渡すとローカルの価格ストアを先に読み、最終バー以降の差分のみを取得する。
+    レート制御は limiter（既定はプロセス共有のトークンバケット）に委ねる。
+    データの取得元は backend（既定はプロセス共有の get_backend()）。
     """
     
-    def __init__(self, max_workers: int = 1, retry_attempts: int = 3, retry_delay: float = 1.0, global_limit: int = 6, request_interval: float = 0.5):
+    def __init__(self, max_workers: int = 1, retry_attempts: int = 3, store: Optional[PriceStore] = None, limiter: Optional[RateLimiter] = None, backend: Optional[DataBackend] = None):
         self.max_workers = max_workers  # レート制限対策でデフォルト1に変更
         self.retry_attempts = retry_attempts
-        self.retry_delay = retry_delay
-        self.request_interval = request_interval  # リクエスト間隔（秒）
-        self._cache = {}  # 簡易キャッシュ（同日内の同一ティッカー取得を再利用）
-        # ランタイム全体の同時ダウンロード制限（プロセス内共有）
-        # NOTE: インスタンス間で共有したいが、簡便にインスタンスごとに上限を設ける
-        self._gate = BoundedSemaphore(value=max(1, global_limit))
-
-    def _download_single_ticker_with_retry(self, ticker: str, period: str, lookback_days: int) -> Optional[Tuple[pd.Series, pd.Series]]:
+        self._cache = {}  # ティッカー単位のキャッシュ（同日内の取得済みシリーズを再利用）
+        self._cache_lock = Lock()
+        # ランタイム全体の同時ダウンロード制限（プロセス内で全クライアントが共有）
+        self.limiter = limiter or get_shared_limiter()
+        self.store = store  # 永続価格ストア（None なら毎回全期間を取得）
+        self.backend = backend  # None なら呼び出し時点の共有バックエンドを使う
+
+    def _download_single_ticker_with_retry(self, ticker: str, period: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None) -> Optional[Tuple[pd.Series, pd.Series]]:
         """単一ティッカーのダウンロード（リトライ付き）"""
-        import yfinance as yf
+        backend = self.backend or get_backend()
+
+        window = _window(period, start, end)
         
         for attempt in range(self.retry_attempts):
             try:
                 # tickersパラメータを文字列として渡す
                 # 一部環境で ignore_tz が未対応なためフォールバック
-                with self._gate:
+                with self.limiter.acquire():
                     try:
-                        d = yf.download(
+                        d = backend.download(
                             tickers=str(ticker), 
-                            period=period, 
                             interval="1d", 
                             auto_adjust=True, 
                             progress=False,
                             threads=False,
-                            ignore_tz=True
+                            ignore_tz=True,
+                            **window,
                         )
                     except TypeError:
-                        d = yf.download(
+                        d = backend.download(
                             tickers=str(ticker), 
-                            period=period, 
                             interval="1d", 
                             auto_adjust=True, 
                             progress=False,
-                            threads=False
+                            threads=False,
+                            **window,
                         )
                 if d is not None and not d.empty:
                     cp = d["Close"].rename(ticker)
                     cv = d["Volume"].rename(ticker)
-                    cutoff = (datetime.utcnow() - timedelta(days=lookback_days)).date()
-                    cp = cp.loc[cp.index.date >= cutoff]
-                    cv = cv.loc[cv.index.date >= cutoff]
-                    
-                    # 成功時はリクエスト間隔を設ける（レート制限対策）
-                    time.sleep(self.request_interval)
+                    self.limiter.record_success()
                     return cp, cv
-                # 空返却は失敗扱いとしてリトライ
+                # 空返却は失敗扱いとしてリトライ（減速は limiter が判断）
+                self.limiter.record_failure()
                 continue
             except Exception as e:
+                self.limiter.record_failure()
                 if attempt < self.retry_attempts - 1:
-                    time.sleep(self.retry_delay * (2 ** attempt))  # 指数バックオフ
                     continue
                 logging.warning(f"Failed to download {ticker} after {self.retry_attempts} attempts: {type(e).__name__}: {e}")
                 return None
         return None
 
-    def _download_batch_tickers(self, tickers: List[str], period: str, lookback_days: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    def _download_batch_tickers(self, tickers: List[str], period: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """バッチでティッカーを並列ダウンロード"""
         if not tickers:
             return pd.DataFrame(), pd.DataFrame()
@@ -90,7 +113,7 @@ class MarketDataClient:
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             # 並列でダウンロード
             future_to_ticker = {
-                executor.submit(self._download_single_ticker_with_retry, t, period, lookback_days): t 
+                executor.submit(self._download_single_ticker_with_retry, t, period, start, end): t 
                 for t in tickers
             }
             
@@ -111,51 +134,49 @@ class MarketDataClient:
         
         return prices, volumes
 
-    def get_prices(self, tickers: List[str], lookback_days: int = 260) -> Tuple[pd.DataFrame, pd.DataFrame]:
-        import yfinance as yf  # optional import
+    def _download_panel(self, tickers: List[str], period: Optional[str] = None, start: Optional[str] = None, fill_missing: bool = True, end: Optional[str] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """backend から (prices, volumes) を取得（期間フィルタ前の生データ）。
+
+        start（と任意の end、yfinance と同様に排他的）または period で取得範囲を指定する。
+        fill_missing=False の場合、一括取得で欠落したティッカーの個別補完を行わない
+        （差分取得では新しいバーが無いのが正常なため）。
+        """
+        backend = self.backend or get_backend()
+
+        window = _window(period, start, end)
 
-        if not tickers:
-            return pd.DataFrame(), pd.DataFrame()
-        
-        # キャッシュチェック
-        cache_key = f"{','.join(sorted(tickers))}_{lookback_days}"
-        today = datetime.now().date()
-        if cache_key in self._cache and self._cache[cache_key]['date'] == today:
-            return self._cache[cache_key]['prices'], self._cache[cache_key]['volumes']
-        
-        # yfinanceは期間指定の方が速い
-        period = "2y" if lookback_days > 252 else "1y"
-        
         # まずバッチダウンロードを試行（リトライ付き）
         # 内部スレッドはOFFにし、外側の制御に委ねる
         data = None
         for attempt in range(self.retry_attempts):
             try:
-                try:
-                    data = yf.download(
-                        tickers=tickers,
-                        period=period,
-                        interval="1d",
-                        group_by="ticker",
-                        auto_adjust=True,
-                        threads=False,
-                        progress=False,
-                        ignore_tz=True
-                    )
-                except TypeError:
-                    data = yf.download(
-                        tickers=tickers,
-                        period=period,
-                        interval="1d",
-                        group_by="ticker",
-                        auto_adjust=True,
-                        threads=False,
-                        progress=False
-                    )
+                with self.limiter.acquire():
+                    try:
+                        data = backend.download(
+                            tickers=tickers,
+                            interval="1d",
+                            group_by="ticker",
+                            auto_adjust=True,
+                            threads=False,
+                            progress=False,
+                            ignore_tz=True,
+                            **window,
+                        )
+                    except TypeError:
+                        data = backend.download(
+                            tickers=tickers,
+                            interval="1d",
+                            group_by="ticker",
+                            auto_adjust=True,
+                            threads=False,
+                            progress=False,
+                            **window,
+                        )
+                self.limiter.record_success()
                 break
             except Exception as e:
+                self.limiter.record_failure()
                 if attempt < self.retry_attempts - 1:
-                    time.sleep(self.retry_delay * (2 ** attempt))  # 指数バックオフ
                     continue
                 logging.warning(
                     f"Batch download failed for {len(tickers)} tickers after {self.retry_attempts} attempts: {type(e).__name__}: {e}"
@@ -181,48 +202,160 @@ class MarketDataClient:
         prices = extract("Close") if data is not None else pd.DataFrame()
         volumes = extract("Volume") if data is not None else pd.DataFrame()
 
-        # フィルタ: 直近 lookback_days に限定（.last の代替）
-        if prices is not None and not prices.empty:
-            cutoff = (datetime.utcnow() - timedelta(days=lookback_days)).date()
-            prices = prices.loc[prices.index.date >= cutoff]
-        if volumes is not None and not volumes.empty:
-            cutoff = (datetime.utcnow() - timedelta(days=lookback_days)).date()
-            volumes = volumes.loc[volumes.index.date >= cutoff]
+        if not fill_missing:
+            return prices, volumes
 
-        # 欠落ティッカーの並列補完
+        # 欠落ティッカーの並列補完（ペースは共有 limiter が制御）
         missing = [t for t in tickers if prices is None or t not in prices.columns]
         if missing:
-            # バッチサイズを制御（レート制限対策）
-            batch_size = min(10, len(missing))  # バッチサイズを小さく
-            missing_batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
-            
+            logging.info(f"Downloading {len(missing)} missing tickers individually")
             frames_p = [] if prices is None or prices.empty else [prices]
             frames_v = [] if volumes is None or volumes.empty else [volumes]
             
-            for batch_idx, batch in enumerate(missing_batches):
-                if batch_idx > 0:
-                    # バッチ間隔を設ける（レート制限対策）
-                    time.sleep(2.0)
-                    logging.info(f"Processing missing tickers batch {batch_idx + 1}/{len(missing_batches)}")
-                
-                batch_prices, batch_volumes = self._download_batch_tickers(batch, period, lookback_days)
-                if not batch_prices.empty:
-                    frames_p.append(batch_prices)
-                if not batch_volumes.empty:
-                    frames_v.append(batch_volumes)
+            batch_prices, batch_volumes = self._download_batch_tickers(missing, period, start, end)
+            if not batch_prices.empty:
+                frames_p.append(batch_prices)
+            if not batch_volumes.empty:
+                frames_v.append(batch_volumes)
             
             if frames_p:
                 prices = pd.concat(frames_p, axis=1)
             if frames_v:
                 volumes = pd.concat(frames_v, axis=1)
 
-        # キャッシュに保存
-        self._cache[cache_key] = {
-            'date': today,
-            'prices': prices if prices is not None else pd.DataFrame(),
-            'volumes': volumes if volumes is not None else pd.DataFrame()
-        }
-
         return prices if prices is not None else pd.DataFrame(), volumes if volumes is not None else pd.DataFrame()
 
+    def _get_prices_with_store(self, tickers: List[str], start: date, end: date, expected_last: date) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """ローカルストアを優先し、[start, end) のうち不足分のみ取得して (prices, volumes) を返す。
+
+        - 未保存: [start, end) を取得して保存
+        - 取得済み範囲の始点が start より後ろ: 始点より前のみ取得して追記（過去日の実行）。
+          上場日より前で値が無くても取得済みとして記録し、次回以降は取り直さない
+        - 最終バーが expected_last より古い: 最終バー以降の差分を取得して追記。
+          最終バーの終値が保存値と食い違う場合（分割・配当で過去分が再調整された）は
+          保存済みの全期間を取り直して置き換える
+        """
+        series_p: dict = {}
+        series_v: dict = {}
+        stored_last: dict = {}  # ティッカー → (最終バーの日付, 終値)
+        head_window: dict = {}  # ティッカー → 先頭より前の取得範囲
+        # 取得範囲 (start, end) → ティッカー群（同じ範囲はまとめて一括取得）
+        windows: dict = {}
+        for t in tickers:
+            stored = self.store.load(t)
+            if stored is None or stored[0].empty:
+                windows.setdefault((start, end), []).append(t)
+                continue
+            cp, cv = stored
+            series_p[t], series_v[t] = cp, cv
+            first, last = cp.index[0].date(), cp.index[-1].date()
+            if self.store.covered_from(t) > start:
+                head_window[t] = (start, first)
+                windows.setdefault((start, first), []).append(t)
+            if last < expected_last:
+                stored_last[t] = (cp.index[-1], float(cp.iloc[-1]))
+                windows.setdefault((last, end), []).append(t)
+
+        refetch: dict = {}  # 取り直しの始点 → ティッカー群
+        for (w_start, w_end), group in windows.items():
+            # 新規ティッカーは個別補完まで行う。差分では新しいバーが無いのが正常
+            fill = w_start == start and w_end == end
+            prices, volumes = self._download_panel(
+                group, start=w_start.isoformat(), end=w_end.isoformat(), fill_missing=fill
+            )
+            for t in group:
+                cp = prices[t].dropna() if t in prices.columns else pd.Series(dtype=float)
+                head = head_window.get(t) == (w_start, w_end)
+                if cp.empty and not head:
+                    continue
+                last = stored_last.get(t)
+                delta = last is not None and (w_start, w_end) == (last[0].date(), end)
+                if delta and last[0] in cp.index and not _same_close(cp[last[0]], last[1]):
+                    refetch.setdefault(min(start, series_p[t].index[0].date()), []).append(t)
+                    continue
+                cv = volumes[t].reindex(cp.index) if t in volumes.columns else pd.Series(index=cp.index, dtype=float)
+                series_p[t], series_v[t] = self.store.append(t, cp, cv, covered_from=w_start if head or fill else None)
+
+        for r_start, group in refetch.items():
+            logging.info(f"Refetching {len(group)} re-adjusted tickers from {r_start}")
+            prices, volumes = self._download_panel(group, start=r_start.isoformat(), end=end.isoformat())
+            for t in group:
+                if t not in prices.columns or prices[t].dropna().empty:
+                    # 取り直せなければ基準の揃った保存分だけを使い、差分は次回に回す
+                    logging.warning(f"Failed to refetch re-adjusted prices for {t}; keeping stored history")
+                    continue
+                cp = prices[t].dropna()
+                cv = volumes[t].reindex(cp.index) if t in volumes.columns else pd.Series(index=cp.index, dtype=float)
+                self.store.save(t, cp, cv, covered_from=r_start)
+                series_p[t], series_v[t] = cp.rename(t), cv.rename(t)
+
+        present = [t for t in tickers if t in series_p]
+        if not present:
+            return pd.DataFrame(), pd.DataFrame()
+        prices = pd.concat([series_p[t].rename(t) for t in present], axis=1)
+        volumes = pd.concat([series_v[t].rename(t) for t in present], axis=1)
+        return prices, volumes
+
+    def _cached_series(self, ticker: str, as_of: date, lookback_days: int) -> Optional[dict]:
+        """同じ基準日で lookback_days 以上の期間を取得済みならキャッシュエントリを返す。"""
+        entry = self._cache.get(ticker)
+        if entry is None or entry['as_of'] != as_of or entry['lookback_days'] < lookback_days:
+            return None
+        return entry
+
+    def get_prices(self, tickers: List[str], lookback_days: int = 260, as_of: Optional[date] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """as_of（既定は当日）までの直近 lookback_days 日分の (prices, volumes) を返す。
+
+        取得は [as_of - lookback_days, as_of] の範囲を start/end で明示して行うため、
+        過去日の実行も再現可能で、保持しない期間はダウンロードしない。
+        """
+        if not tickers:
+            return pd.DataFrame(), pd.DataFrame()
+
+        today = datetime.utcnow().date()
+        as_of = min(as_of or today, today)
+        start = as_of - timedelta(days=lookback_days)
+        end = as_of + timedelta(days=1)  # end は排他的
+        # 当日分のバーは未確定なので、当日実行では前営業日までを最新とみなす
+        expected_last = min(
+            pd.offsets.BDay().rollback(pd.Timestamp(as_of)).date(),
+            (pd.Timestamp(today) - pd.offsets.BDay(1)).date(),
+        )
+
+        # キャッシュはティッカー単位。保持していないティッカーのみ取得する
+        requested = list(dict.fromkeys(tickers))
+        need = [t for t in requested if self._cached_series(t, as_of, lookback_days) is None]
+
+        if need:
+            if self.store is not None:
+                prices, volumes = self._get_prices_with_store(need, start, end, expected_last)
+            else:
+                prices, volumes = self._download_panel(need, start=start.isoformat(), end=end.isoformat())
+
+            with self._cache_lock:
+                for t in need:
+                    if prices is None or t not in prices.columns:
+                        continue
+                    cp = prices[t].dropna()
+                    if cp.empty:
+                        continue
+                    cv = volumes[t].reindex(cp.index) if volumes is not None and t in volumes.columns else pd.Series(index=cp.index, dtype=float)
+                    self._cache[t] = {
+                        'as_of': as_of,
+                        'lookback_days': lookback_days,
+                        'prices': cp,
+                        'volumes': cv,
+                    }
+
+        # キャッシュ済みのシリーズからパネルを組み立てる
+        entries = [(t, self._cached_series(t, as_of, lookback_days)) for t in requested]
+        entries = [(t, e) for t, e in entries if e is not None]
+        if not entries:
+            return pd.DataFrame(), pd.DataFrame()
+        prices = pd.concat([e['prices'].rename(t) for t, e in entries], axis=1)
+        volumes = pd.concat([e['volumes'].rename(t) for t, e in entries], axis=1)
 
+        # フィルタ: [start, as_of] に限定（ストアやキャッシュは範囲外の日付も持つ）
+        dates = prices.index.date
+        mask = (dates >= start) & (dates <= as_of)
+        return prices.loc[mask], volumes.loc[mask]
@@ -4,43 +4,52 @@ from dataclasses import dataclass
 from datetime import date
 from typing import List, Dict, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
-import time
+from threading import Event
 import logging
 
+from .backends import DataBackend, get_backend
+from .ratelimit import RateLimiter, get_shared_limiter
+
 
 @dataclass
 class NewsClient:
     """ニュース取得の薄いIF。MVPはモック/将来はRSS/API連携。
     戻り値: list[dict(ticker,title,url,date)]
+    レート制御は limiter（既定はプロセス共有のトークンバケット）に委ねる。
+    データの取得元は backend（既定はプロセス共有の get_backend()）。
     """
     
-    def __init__(self, max_workers: int = 1, retry_attempts: int = 2, retry_delay: float = 0.5, request_interval: float = 0.5):
+    def __init__(self, max_workers: int = 1, retry_attempts: int = 2, limiter: Optional[RateLimiter] = None, backend: Optional[DataBackend] = None):
         self.max_workers = max_workers  # レート制限対策でデフォルト1に変更
         self.retry_attempts = retry_attempts
-        self.retry_delay = retry_delay
-        self.request_interval = request_interval  # リクエスト間隔（秒）
+        self.limiter = limiter or get_shared_limiter()
+        self.backend = backend  # None なら呼び出し時点の共有バックエンドを使う
         self._cache = {}  # 簡易キャッシュ
 
-    def _fetch_single_ticker_with_retry(self, ticker: str, since: date) -> List[Dict]:
+    def _fetch_single_ticker_with_retry(self, ticker: str, since: date, cancel: Optional[Event] = None) -> List[Dict]:
         """単一ティッカーのニュース取得（リトライ付き）
 
         yfinance 側の不安定さにより空配列が返ることがあるため、
-        一定回数は再試行する。
+        一定回数は再試行する。成否は limiter に通知し、待ちは limiter の減速に委ねる。
         """
         items: List[Dict] = []
         
-        try:
-            import yfinance as yf  # optional dependency at runtime
-        except Exception:
+        backend = self.backend or get_backend()
+        if not backend.available():  # yfinance 未導入など
             return items
 
         for attempt in range(self.retry_attempts):
+            if cancel is not None and cancel.is_set():
+                break
             try:
-                tk = yf.Ticker(ticker)
-                news_list = getattr(tk, "news", None)
+                with self.limiter.acquire():
+                    tk = backend.Ticker(ticker)
+                    news_list = getattr(tk, "news", None)
                 if not news_list:
-                    # 空の場合はリトライ
-                    raise RuntimeError("empty news")
+                    # 空の場合はリトライ。ニュースが無いだけの銘柄も多いので limiter には
+                    # 失敗として通知しない（共有 limiter の減速は例外による失敗に限る）
+                    self.limiter.record_success()
+                    continue
                 
                 for n in news_list:
                     title = n.get("title") or n.get("headline")
@@ -80,20 +89,19 @@ class NewsClient:
                             "date": dt_str,
                         })
                 
-                # 成功したらリクエスト間隔を設けてループを抜ける
-                time.sleep(self.request_interval)
+                self.limiter.record_success()
                 break
                 
             except Exception as e:
+                self.limiter.record_failure()
                 if attempt < self.retry_attempts - 1:
-                    time.sleep(self.retry_delay * (2 ** attempt))  # 指数バックオフ
                     continue
                 logging.warning(f"Failed to fetch news for {ticker} after {self.retry_attempts} attempts: {e}")
                 break
 
         return items
 
-    def _fetch(self, tickers: List[str], since: date) -> List[Dict]:
+    def _fetch(self, tickers: List[str], since: date, cancel: Optional[Event] = None) -> List[Dict]:
         # キャッシュチェック
         cache_key = f"{','.join(sorted(tickers))}_{since.isoformat()}"
         today = date.today()
@@ -105,41 +113,33 @@ class NewsClient:
         if not tickers:
             return items
         
-        # バッチサイズを制限（レート制限対策）
-        batch_size = 10
-        batches = [tickers[i:i+batch_size] for i in range(0, len(tickers), batch_size)]
-        
-        for batch_idx, batch in enumerate(batches):
-            if batch_idx > 0:
-                # バッチ間隔を設ける（レート制限対策）
-                time.sleep(2.0)
-                logging.info(f"Processing news batch {batch_idx + 1}/{len(batches)}")
+        # 並列でニュース取得（ペースは共有 limiter が制御）
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            future_to_ticker = {
+                executor.submit(self._fetch_single_ticker_with_retry, t, since, cancel): t 
+                for t in tickers
+            }
             
-            # 並列でニュース取得
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                future_to_ticker = {
-                    executor.submit(self._fetch_single_ticker_with_retry, t, since): t 
-                    for t in batch
-                }
-                
-                for future in as_completed(future_to_ticker):
-                    ticker = future_to_ticker[future]
-                    try:
-                        ticker_items = future.result()
-                        items.extend(ticker_items)
-                    except Exception as e:
-                        logging.warning(f"Error fetching news for {ticker}: {e}")
-                        continue
+            for future in as_completed(future_to_ticker):
+                ticker = future_to_ticker[future]
+                try:
+                    ticker_items = future.result()
+                    items.extend(ticker_items)
+                except Exception as e:
+                    logging.warning(f"Error fetching news for {ticker}: {e}")
+                    continue
         
-        # キャッシュに保存
-        self._cache[cache_key] = {
-            'date': today,
-            'items': items
-        }
+        # キャッシュに保存（中断された不完全な結果は保存しない）
+        if cancel is None or not cancel.is_set():
+            self._cache[cache_key] = {
+                'date': today,
+                'items': items
+            }
         
         return items
 
-    def get_news(self, tickers: List[str], since: date) -> List[Dict]:
-        return self._fetch(tickers, since)
+    def get_news(self, tickers: List[str], since: date, cancel: Optional[Event] = None) -> List[Dict]:
+        """cancel（threading.Event）がセットされると未着手のティッカーは取得しない。"""
+        return self._fetch(tickers, since, cancel)
 
 
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
+from scipy.linalg import cho_factor, cho_solve
 from scipy.optimize import minimize
 
+from .covariance import CovarianceModel, as_covariance_model
+
+MV_SOLVERS = ("slsqp", "admm")
+
 
 @dataclass
 class MVConfig:
@@ -16,6 +21,12 @@ class MVConfig:
     cash_bounds: Tuple[float, float] = (0.0, 0.1)
     risk_aversion: float = 0.0  # 0→ボラ最小、値を上げるとリターン重視
     target_vol: float | None = None  # 年率ボラ上限（例: 0.18）。未指定なら制約なし
+    solver: str = "slsqp"  # "slsqp"（汎用）/ "admm"（凸QP専用。失敗時は SLSQP にフォールバック）
+    max_iter: Optional[int] = None  # 反復上限（None でソルバー既定: SLSQP 500 / ADMM 20000）
+    tol: float = 1e-7  # ADMM の収束判定（主・双対残差の絶対/相対許容誤差）
+    turnover_penalty: float = 0.0  # 前回保有からの乖離ペナルティ κ·‖w - w_prev‖²（0 で無効）
+    # 地域以外のグループ上限（例: {"sector": {"Tech": 0.3}}）。所属は solve_mean_variance の groups で渡す
+    group_limits: Dict[str, Dict[str, float]] | None = None
 
     def __post_init__(self) -> None:
         if self.risk_aversion < 0:
@@ -24,91 +35,579 @@ class MVConfig:
             raise ValueError("target_vol must be positive")
         if self.target not in ("min_vol", "max_return"):
             raise ValueError("target must be 'min_vol' or 'max_return'")
+        if self.turnover_penalty < 0:
+            raise ValueError("turnover_penalty must be non-negative")
+        if self.solver not in MV_SOLVERS:
+            raise ValueError(f"solver must be one of {MV_SOLVERS}")
 
 
-def _apply_region_constraints(tickers: List[str], regions: List[str], region_limits: Dict[str, float]) -> List[Tuple[int, float]]:
-    """各地域の合計重みに上限。返り値は (index, coeff) 形式の線形制約係数生成は簡略化し、
-    scipyのlinear constraintsは個別に定義する。
-    ここではハンドリングを呼び出し側に委ねるため、ダミーを返す（実際の制約は目的関数内でペナルティ）。"""
-    return []
+@dataclass
+class MVResult:
+    """最適化結果（重み・ソルバー名・終了状態・反復回数・目的関数値）。"""
 
+    weights: np.ndarray
+    solver: str
+    status: str
+    iterations: int
+    objective: float
+    success: bool
 
-def optimize_mean_variance(
+
+@dataclass
+class LinearConstraints:
+    """線形制約 lower <= A w <= upper（1行目が投資比率の帯、以降がグループ上限）。"""
+
+    A: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    labels: List[str]
+    G: np.ndarray = field(init=False, repr=False)
+    h: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # SLSQP 用の片側形式 G w <= h は有限な辺だけを1度だけ積み上げておく
+        hi, lo = np.isfinite(self.upper), np.isfinite(self.lower)
+        self.G = np.vstack([self.A[hi], -self.A[lo]])
+        self.h = np.concatenate([self.upper[hi], -self.lower[lo]])
+
+    def slack(self, w: np.ndarray) -> np.ndarray:
+        """h - G w（全制約を1回の行列ベクトル積で評価。>= 0 で実行可能）。"""
+        return self.h - self.G @ w
+
+
+def _group_cap_rows(labels: List[str], limits: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """グループ所属（銘柄ごとのラベル）から所属行列と上限を作る。上限の無いグループは 1.0。"""
+    groups = sorted(set(labels))
+    pos = {g: k for k, g in enumerate(groups)}
+    rows = np.zeros((len(groups), len(labels)))
+    rows[[pos[g] for g in labels], np.arange(len(labels))] = 1.0
+    caps = np.array([float(limits.get(g, 1.0)) for g in groups])
+    return rows, caps, groups
+
+
+def build_linear_constraints(
+    regions: List[str],
+    cfg: MVConfig,
+    groups: Optional[Dict[str, List[str]]] = None,
+) -> LinearConstraints:
+    """投資比率の帯・地域上限・グループ上限を1つの制約行列にまとめる。
+
+    groups は {次元名: 銘柄ごとのラベル}（例: {"sector": [...]}）で、上限は cfg.group_limits[次元名]。
+    投資比率の下限は、銘柄上限とグループ上限から投資できる最大量を超えないよう補正する。
+    """
+    n = len(regions)
+    dims = [("region", list(regions), cfg.region_limits or {})]
+    for name, labels in (groups or {}).items():
+        if len(labels) != n:
+            raise ValueError(f"group '{name}' has {len(labels)} labels for {n} tickers")
+        dims.append((name, list(labels), (cfg.group_limits or {}).get(name, {})))
+
+    invest_min = 1.0 - float(cfg.cash_bounds[1])
+    invest_max = 1.0 - float(cfg.cash_bounds[0])
+    blocks, caps, labels = [], [], []
+    # 実現可能性: 各次元で（グループ上限と銘柄上限×件数の小さい方）を合算した量を下限が超えないように
+    capacity = n * cfg.position_limit
+    for name, member, limits in dims:
+        rows, cap, names = _group_cap_rows(member, limits)
+        counts = rows.sum(axis=1)
+        capacity = min(capacity, float(np.minimum(cap, counts * cfg.position_limit).sum()))
+        blocks.append(rows)
+        caps.append(cap)
+        labels += [f"{name}:{g}" for g in names]
+
+    return LinearConstraints(
+        A=np.vstack([np.ones((1, n))] + blocks),
+        lower=np.concatenate([[min(invest_min, capacity)], np.full(len(labels), -np.inf)]),
+        upper=np.concatenate([[invest_max]] + caps),
+        labels=["invest"] + labels,
+    )
+
+
+@dataclass
+class _MVProblem:
+    """min a·w'Σw - b·μ'w + κ‖w - anchor‖²  s.t.  0 <= w <= position_limit,
+    lin.lower <= lin.A @ w <= lin.upper, （任意で）w'Σw <= var_cap。"""
+
+    risk: CovarianceModel
+    mu: np.ndarray
+    a: float
+    b: float
+    upper: float
+    lin: LinearConstraints
+    var_cap: Optional[float]
+    kappa: float = 0.0
+    anchor: Optional[np.ndarray] = None
+    # ADMM 用の密な Σ。replace() で作る派生問題（フロンティアの各点）にも引き継がれる
+    dense_sigma: Optional[np.ndarray] = field(default=None, repr=False)
+
+    @property
+    def n(self) -> int:
+        return len(self.mu)
+
+    @property
+    def sigma(self) -> np.ndarray:
+        # 密行列が必要な ADMM 用（ファクターモデルはここで初めて n×n を作り、問題ごとに1度だけ）
+        if self.dense_sigma is None:
+            self.dense_sigma = self.risk.dense()
+        return self.dense_sigma
+
+    @property
+    def invest_max(self) -> float:
+        return float(self.lin.upper[0])
+
+    def objective(self, w: np.ndarray) -> float:
+        val = self.a * self.risk.quad(w) - self.b * float(self.mu @ w)
+        if self.kappa > 0:
+            d = w - self.anchor
+            val += self.kappa * float(d @ d)
+        return val
+
+    def gradient(self, w: np.ndarray) -> np.ndarray:
+        # ∇(w'Σw) = 2Σw, ∇(μ'w) = μ, ∇‖w - a‖² = 2(w - a)
+        g = 2.0 * self.a * self.risk.matvec(w) - self.b * self.mu
+        if self.kappa > 0:
+            g = g + 2.0 * self.kappa * (w - self.anchor)
+        return g
+
+
+def _objective_coefficients(cfg: MVConfig, has_mu: bool) -> Tuple[float, float]:
+    """目的関数 a·w'Σw - b·μ'w の係数 (a, b)。"""
+    if cfg.risk_aversion > 0 and has_mu:
+        # リスク許容度が指定されていればトレードオフ優先
+        return 1.0, float(cfg.risk_aversion)
+    if cfg.target == "max_return" and has_mu:
+        # それ以外でmax_returnが指定されていれば純粋な最大化
+        return 0.0, 1.0
+    # デフォルトは最小分散
+    return 1.0, 0.0
+
+
+def _build_problem(
     tickers: List[str],
     regions: List[str],
     mu: pd.Series | None,
-    cov: pd.DataFrame,
+    cov: pd.DataFrame | CovarianceModel,
     cfg: MVConfig,
-) -> np.ndarray:
+    prev_weights: Optional[np.ndarray] = None,
+    groups: Optional[Dict[str, List[str]]] = None,
+) -> _MVProblem:
     n = len(tickers)
-    x0 = np.array([min(cfg.position_limit, 1.0 / max(1, n))] * n)
-    bounds = [(0.0, cfg.position_limit)] * n
-
-    # 目的関数
-    def obj(w: np.ndarray) -> float:
-        var = float(np.dot(w, cov.values @ w))
-        ret = 0.0
-        if mu is not None:
-            ret = float(np.dot(w, mu.loc[tickers].fillna(0.0).values))
-        # リスク許容度が指定されていればトレードオフ優先
-        if cfg.risk_aversion > 0 and mu is not None:
-            return var - float(cfg.risk_aversion) * ret
-        # それ以外でmax_returnが指定されていれば純粋な最大化
-        if cfg.target == "max_return" and mu is not None:
-            return -ret
-        # デフォルトは最小分散
-        return var
+    # 共分散は対称化しておく（勾配 2Σw の前提）。期待リターンは1度だけ並べ替える
+    risk = as_covariance_model(cov)
+    m = mu.loc[tickers].fillna(0.0).values.astype(float) if mu is not None else np.zeros(n)
 
-    # 投資比率の下限・上限: sum(w) ∈ [1 - cash_max, 1 - cash_min]
-    invest_min = 1.0 - float(cfg.cash_bounds[1])
-    invest_max = 1.0 - float(cfg.cash_bounds[0])
-    # 実現可能性: 銘柄上限と地域上限から投資できる最大合計を下限が超えないように補正
-    max_capacity = n * cfg.position_limit
-    region_limits = cfg.region_limits or {}
-    unique_regions = sorted(set(regions))
-    region_to_idx = {r: [i for i, rr in enumerate(regions) if rr == r] for r in unique_regions}
-    # 地域ごとの最大投資可能量（銘柄上限×件数と地域上限の小さい方）を合算
-    max_by_regions = 0.0
-    for r, idx in region_to_idx.items():
-        cap_r = float(region_limits.get(r, 1.0))
-        max_by_regions += float(min(cap_r, len(idx) * cfg.position_limit))
-    effective_invest_min = min(invest_min, max_capacity, max_by_regions)
-
-    constraints = [
-        {"type": "ineq", "fun": lambda w, invest_max=invest_max: invest_max - np.sum(w)},  # sum(w) <= invest_max
-        {"type": "ineq", "fun": lambda w, invest_min=effective_invest_min: np.sum(w) - invest_min},  # sum(w) >= invest_min (補正後)
-    ]
-    # 年率ボラ上限（target_vol）: w' Σ w <= target_vol^2
-    if cfg.target_vol is not None:
-        var_cap = float(cfg.target_vol) ** 2
-        constraints.append({
-            "type": "ineq",
-            "fun": (lambda w, var_cap=var_cap: var_cap - float(np.dot(w, cov.values @ w))),
-        })
-    # 地域ごとの上限: sum(w[idx]) <= cap_r
-    for r, idx in region_to_idx.items():
-        cap_r = float(region_limits.get(r, 1.0))
+    a, b = _objective_coefficients(cfg, mu is not None)
+    return _MVProblem(
+        risk=risk, mu=m, a=a, b=b, upper=float(cfg.position_limit),
+        lin=build_linear_constraints(regions, cfg, groups),
+        var_cap=float(cfg.target_vol) ** 2 if cfg.target_vol is not None else None,
+        # 前回保有（無い銘柄は 0）からの乖離ペナルティ
+        kappa=float(cfg.turnover_penalty) if prev_weights is not None else 0.0,
+        anchor=np.asarray(prev_weights, dtype=float) if prev_weights is not None else None,
+    )
+
+
+def _solve_slsqp(prob: _MVProblem, x0: np.ndarray, max_iter: int) -> MVResult:
+    """SLSQP（解析的な勾配・ヤコビアン付き）で解く。失敗時は x0 を制約上へ射影した重みを返す。"""
+    n = prob.n
+    # 線形制約（投資比率の帯・地域/グループ上限）は1本にまとめ、ヤコビアンは定数行列 -G
+    lin = prob.lin
+    constraints = [{"type": "ineq", "fun": lin.slack, "jac": lambda w: -lin.G}]
+    # 年率ボラ上限（target_vol）: w' Σ w <= target_vol^2（勾配 -2Σw）
+    if prob.var_cap is not None:
         constraints.append({
             "type": "ineq",
-            "fun": (lambda w, idx=idx, cap_r=cap_r: cap_r - float(np.sum(w[idx]))),
+            "fun": lambda w: prob.var_cap - prob.risk.quad(w),
+            "jac": lambda w: -2.0 * prob.risk.matvec(w),
         })
 
-    # 目的関数にわずかなペナルティ（数値安定用）
-    def penalized_obj(w: np.ndarray) -> float:
-        # 目的関数はobjのみ（地域上限は明示制約にて対応）
-        return obj(w)
-
     res = minimize(
-        penalized_obj, x0, method="SLSQP", bounds=bounds, constraints=constraints, options={"maxiter": 500}
+        prob.objective, x0, jac=prob.gradient, method="SLSQP",
+        bounds=[(0.0, prob.upper)] * n, constraints=constraints, options={"maxiter": max_iter},
+    )
+    status = str(res.message)
+    if res.success:
+        w = res.x
+    else:
+        # x0（前回ポートフォリオ由来）は今回の地域・銘柄・投資比率の制約を満たすとは限らない
+        w = _project_feasible(prob, x0)
+        status = f"{status} -> projected initial weights"
+    return MVResult(
+        weights=w, solver="slsqp", status=status, iterations=int(getattr(res, "nit", 0)),
+        objective=prob.objective(w), success=bool(res.success),
     )
-    w = res.x if res.success else x0
+
+
+def _project_feasible(prob: _MVProblem, x: np.ndarray) -> np.ndarray:
+    """x に最も近い（ユークリッド距離）、銘柄上限と線形制約を満たす重み。ボラ上限は考慮しない。"""
+    n = prob.n
+    lb, ub = np.zeros(n), np.full(n, prob.upper)
+    w, _, _ = _admm_qp(np.eye(n), -np.asarray(x, dtype=float), lb, ub, prob.lin.A, prob.lin.lower, prob.lin.upper, x, 20000, 1e-9)
+    return np.clip(w, lb, ub)
+
+
+def _polish(
+    P: np.ndarray,
+    q: np.ndarray,
+    lb: np.ndarray,
+    ub: np.ndarray,
+    C: np.ndarray,
+    cl: np.ndarray,
+    cu: np.ndarray,
+    x: np.ndarray,
+    y_box: np.ndarray,
+    y_c: np.ndarray,
+    tol: float,
+) -> Optional[np.ndarray]:
+    """ADMM の途中解から有効制約を推定し、等式制約付きの縮約 KKT 系を解いて厳密解を求める。
+
+    推定した有効制約で KKT 条件（主実行可能性・乗数の符号）が満たされた場合のみ解を返す。
+    """
+    n = len(q)
+    at_lo = x - lb < -y_box
+    at_hi = ub - x < y_box
+    fixed = at_lo | at_hi
+    free = ~fixed
+    x_fixed = np.where(at_lo, lb, ub)[fixed]
+    zc = C @ x
+    eq = np.isclose(cl, cu)
+    act_lo = eq | (zc - cl < -y_c)
+    act_hi = ~eq & (cu - zc < y_c)
+    act = act_lo | act_hi
+    target = np.where(act_lo, cl, cu)[act]
+
+    nf, na = int(free.sum()), int(act.sum())
+    B = C[act][:, free]
+    rhs_x = -(q[free] + P[np.ix_(free, fixed)] @ x_fixed)
+    rhs_c = target - C[act][:, fixed] @ x_fixed
+    K = np.zeros((nf + na, nf + na))
+    K[:nf, :nf] = P[np.ix_(free, free)]
+    K[:nf, nf:] = B.T
+    K[nf:, :nf] = B
+    try:
+        sol = np.linalg.solve(K, np.concatenate([rhs_x, rhs_c]))
+    except np.linalg.LinAlgError:
+        sol = np.linalg.lstsq(K, np.concatenate([rhs_x, rhs_c]), rcond=None)[0]
+    cand = np.empty(n)
+    cand[free] = sol[:nf]
+    cand[fixed] = x_fixed
+    lam = np.zeros(len(cl))
+    lam[act] = sol[nf:]
+
+    feas_tol = 1e-9 * max(1.0, float(np.abs(cand).max(initial=0.0)))
+    c_val = C @ cand
+    if (cand < lb - feas_tol).any() or (cand > ub + feas_tol).any():
+        return None
+    if (c_val < cl - feas_tol).any() or (c_val > cu + feas_tol).any():
+        return None
+    # 乗数の符号: 上限側は >= 0、下限側は <= 0（停留条件 Px + q + C'λ + μ = 0）
+    dual_tol = 10.0 * max(tol, 1e-9) * max(1.0, float(np.abs(q).max(initial=0.0)))
+    if (lam[act_hi] < -dual_tol).any() or (lam[act_lo & ~eq] > dual_tol).any():
+        return None
+    g = P @ cand + q + C.T @ lam
+    if (g[at_lo] < -dual_tol).any() or (g[at_hi] > dual_tol).any() or (np.abs(g[free]) > dual_tol).any():
+        return None
+    return cand
+
+
+def _admm_qp(
+    P: np.ndarray,
+    q: np.ndarray,
+    lb: np.ndarray,
+    ub: np.ndarray,
+    C: np.ndarray,
+    cl: np.ndarray,
+    cu: np.ndarray,
+    x0: np.ndarray,
+    max_iter: int,
+    tol: float,
+    rho: float = 0.1,
+    sigma: float = 1e-6,
+    alpha: float = 1.6,
+) -> tuple[np.ndarray, str, int]:
+    """min ½x'Px + q'x  s.t.  lb <= x <= ub, cl <= Cx <= cu を ADMM（OSQP と同じ分割）で解く。
+
+    制約行列は [I; C]（C は合計・地域などの少数行）として扱い、積は O(行数 × n) で計算する。
+    KKT 行列 P + σI + ρ(I + C'C) は ρ を変えたときだけ Cholesky 分解し直す。
+    一定間隔で有効制約を推定した縮約 KKT 系（_polish）を解き、KKT 条件を満たせば終了する。
+    戻り値は (x, status, 反復回数)。status は "solved" / "max_iter_reached"。
+    """
+    n = len(q)
+    # 目的関数のスケールを揃える（解は不変）。ρ の既定値が効く範囲にする
+    scale = max(float(np.abs(np.diag(P)).mean()) if n else 0.0, float(np.abs(q).max(initial=0.0)), 1e-12)
+    P = P / scale
+    q = q / scale
+    # 等式制約の行（cl == cu）は ρ を大きくする
+    rho_c_scale = np.where(np.isclose(cl, cu), 1e3, 1.0)
+    eye = np.eye(n)
+
+    def factor(rho: float):
+        rho_c = rho * rho_c_scale
+        return rho_c, cho_factor(P + (sigma + rho) * eye + C.T @ (rho_c[:, None] * C))
+
+    rho_c, kkt = factor(rho)
+    x = np.asarray(x0, dtype=float).copy()
+    z_box, z_c = np.clip(x, lb, ub), np.clip(C @ x, cl, cu)
+    y_box, y_c = np.zeros(n), np.zeros(len(cl))
+    status = "max_iter_reached"
+    it = 0
+    for it in range(1, max_iter + 1):
+        x_tilde = cho_solve(kkt, sigma * x - q + (rho * z_box - y_box) + C.T @ (rho_c * z_c - y_c))
+        zc_tilde = C @ x_tilde
+        x = alpha * x_tilde + (1.0 - alpha) * x
+        zb_relaxed = alpha * x_tilde + (1.0 - alpha) * z_box
+        zc_relaxed = alpha * zc_tilde + (1.0 - alpha) * z_c
+        zb_new = np.clip(zb_relaxed + y_box / rho, lb, ub)
+        zc_new = np.clip(zc_relaxed + y_c / rho_c, cl, cu)
+        y_box = y_box + rho * (zb_relaxed - zb_new)
+        y_c = y_c + rho_c * (zc_relaxed - zc_new)
+        z_box, z_c = zb_new, zc_new
+        if it % 10 == 0 or it == max_iter:
+            Cx = C @ x
+            Px = P @ x
+            Aty = y_box + C.T @ y_c
+            r_prim = max(float(np.abs(x - z_box).max(initial=0.0)), float(np.abs(Cx - z_c).max(initial=0.0)))
+            r_dual = float(np.abs(Px + q + Aty).max(initial=0.0))
+            ax = max(float(np.abs(x).max(initial=0.0)), float(np.abs(Cx).max(initial=0.0)))
+            az = max(float(np.abs(z_box).max(initial=0.0)), float(np.abs(z_c).max(initial=0.0)))
+            ad = max(float(np.abs(Px).max(initial=0.0)), float(np.abs(Aty).max(initial=0.0)), float(np.abs(q).max(initial=0.0)))
+            eps_prim = tol + tol * max(ax, az)
+            eps_dual = tol + tol * ad
+            if it % 50 == 0 or it == max_iter or (r_prim <= eps_prim and r_dual <= eps_dual):
+                polished = _polish(P, q, lb, ub, C, cl, cu, x, y_box, y_c, tol)
+                if polished is not None:
+                    return polished, "solved", it
+            if r_prim <= eps_prim and r_dual <= eps_dual:
+                status = "solved"
+                break
+            # 残差の比に応じて ρ を調整（大きく偏ったときだけ再分解）
+            if it % 50 == 0:
+                ratio = np.sqrt((r_prim / max(ax, az, 1e-30)) / max(r_dual / max(ad, 1e-30), 1e-30))
+                if ratio > 5.0 or ratio < 0.2:
+                    rho = float(np.clip(rho * ratio, 1e-6, 1e6))
+                    rho_c, kkt = factor(rho)
+    return x, status, it
+
+
+def _solve_admm(prob: _MVProblem, x0: np.ndarray, max_iter: int, tol: float) -> MVResult:
+    """凸QPとして ADMM で解く。ボラ上限は w'Σw のペナルティ係数 ν を二分探索して満たす。
+
+    ν >= 0 に対する QP 解 w(ν) の分散は ν について単調減少なので、ボラ上限が効く場合は
+    w(ν) の分散が上限と一致する最小の ν を探す（ラグランジュ乗数に相当）。
+    """
+    n = prob.n
+    lb, ub = np.zeros(n), np.full(n, prob.upper)
+    C, cl, cu = prob.lin.A, prob.lin.lower, prob.lin.upper
+    q = -prob.b * prob.mu
+    if prob.kappa > 0:
+        q = q - 2.0 * prob.kappa * prob.anchor
+    total_iter = 0
+
+    def solve(nu: float, start: np.ndarray) -> tuple[np.ndarray, str]:
+        nonlocal total_iter
+        P = 2.0 * (prob.a + nu) * prob.sigma
+        if prob.kappa > 0:
+            P = P + 2.0 * prob.kappa * np.eye(n)
+        x, status, it = _admm_qp(P, q, lb, ub, C, cl, cu, start, max_iter, tol)
+        total_iter += it
+        return x, status
+
+    def result(w: np.ndarray, status: str) -> MVResult:
+        w = np.clip(w, 0.0, prob.upper)
+        return MVResult(
+            weights=w, solver="admm", status=status, iterations=total_iter,
+            objective=prob.objective(w), success=status == "solved",
+        )
+
+    w, status = solve(0.0, x0)
+    if status != "solved" or prob.var_cap is None or prob.risk.quad(w) <= prob.var_cap * (1 + 1e-6):
+        return result(w, status)
+
+    # ボラ上限が効く: まず上限を満たす ν を倍々で探し、その後二分探索
+    def variance(v: np.ndarray) -> float:
+        return prob.risk.quad(v)
+
+    nu_lo, nu_hi = 0.0, 1.0
+    g_lo = variance(w) - prob.var_cap
+    w_hi, status = solve(nu_hi, w)
+    while status == "solved" and variance(w_hi) > prob.var_cap * (1 + 1e-6):
+        if nu_hi > 1e8:
+            return result(w_hi, "vol_cap_infeasible")
+        nu_lo, nu_hi, g_lo = nu_hi, nu_hi * 10.0, variance(w_hi) - prob.var_cap
+        w_hi, status = solve(nu_hi, w_hi)
+    if status != "solved":
+        return result(w_hi, status)
+    # [nu_lo（上限超過）, nu_hi（上限内）] を Illinois 法（はさみうち法の改良）で詰める
+    g_hi = variance(w_hi) - prob.var_cap
+    side = 0
+    for _ in range(100):
+        if g_hi >= -prob.var_cap * 1e-8 or nu_hi - nu_lo <= 1e-12 * max(1.0, nu_hi):
+            break
+        nu_mid = (nu_lo * g_hi - nu_hi * g_lo) / (g_hi - g_lo)
+        if not nu_lo < nu_mid < nu_hi:
+            nu_mid = 0.5 * (nu_lo + nu_hi)
+        w_mid, status = solve(nu_mid, w_hi)
+        if status != "solved":
+            return result(w_mid, status)
+        g_mid = variance(w_mid) - prob.var_cap
+        if g_mid > prob.var_cap * 1e-6:
+            nu_lo, g_lo = nu_mid, g_mid
+            if side == -1:
+                g_hi *= 0.5
+            side = -1
+        else:
+            nu_hi, w_hi, g_hi = nu_mid, w_mid, g_mid
+            if side == 1:
+                g_lo *= 0.5
+            side = 1
+    return result(w_hi, "solved")
+
+
+def solve_mean_variance(
+    tickers: List[str],
+    regions: List[str],
+    mu: pd.Series | None,
+    cov: pd.DataFrame | CovarianceModel,
+    cfg: MVConfig,
+    x0: Optional[np.ndarray] = None,
+    prev_weights: Optional[np.ndarray] = None,
+    groups: Optional[Dict[str, List[str]]] = None,
+) -> MVResult:
+    """平均分散最適化を解き、重みとソルバーの状態（終了状態・反復回数）を返す。
+
+    x0: 初期値（前回ポートフォリオからのウォームスタート）。未指定なら等ウェイト
+    prev_weights: 前回の保有（tickers 順、保有なしは 0）。cfg.turnover_penalty > 0 で乖離にペナルティ
+    groups: 地域以外のグループ所属 {次元名: 銘柄ごとのラベル}。上限は cfg.group_limits
+    cfg.solver == "admm" で解けなかった場合は SLSQP で解き直す（status に経緯を残す）。
+    """
+    n = len(tickers)
+    if x0 is None:
+        x0 = np.array([min(cfg.position_limit, 1.0 / max(1, n))] * n)
+    else:
+        x0 = np.clip(np.asarray(x0, dtype=float), 0.0, cfg.position_limit)
+    prob = _build_problem(tickers, regions, mu, cov, cfg, prev_weights=prev_weights, groups=groups)
+    return _solve_problem(prob, x0, cfg)
+
+
+def _solve_problem(prob: _MVProblem, x0: np.ndarray, cfg: MVConfig) -> MVResult:
+    """組み立て済みの問題を cfg.solver で解く（ADMM 失敗時は SLSQP）。"""
+    if cfg.solver == "admm":
+        res = _solve_admm(prob, x0, cfg.max_iter or 20000, cfg.tol)
+        if not res.success:
+            fallback = _solve_slsqp(prob, x0, 500)
+            fallback.status = f"admm {res.status} -> slsqp: {fallback.status}"
+            fallback.iterations += res.iterations
+            res = fallback
+    else:
+        res = _solve_slsqp(prob, x0, cfg.max_iter or 500)
+
+    w = res.weights
     # 現金に収める
     # 目的上はsum(w)が範囲内になるはずだが、念のためクリップ
     total = float(np.sum(w))
-    if total > invest_max + 1e-9:
+    if total > prob.invest_max + 1e-9:
         # 収縮は地域制約を壊さない
-        w = w * (invest_max / total)
+        w = w * (prob.invest_max / total)
     # 総投資の下限方向には後処理で拡大しない（地域上限を壊しうるため）
-    return w
+    res.weights = w
+    return res
+
+
+def optimize_mean_variance(
+    tickers: List[str],
+    regions: List[str],
+    mu: pd.Series | None,
+    cov: pd.DataFrame | CovarianceModel,
+    cfg: MVConfig,
+    x0: Optional[np.ndarray] = None,
+    prev_weights: Optional[np.ndarray] = None,
+    groups: Optional[Dict[str, List[str]]] = None,
+) -> np.ndarray:
+    return solve_mean_variance(tickers, regions, mu, cov, cfg, x0=x0, prev_weights=prev_weights, groups=groups).weights
+
+
+@dataclass
+class FrontierPoint:
+    """効率的フロンティアの1点（設定・期待リターン・ボラ・重み・ソルバー状態）。"""
+
+    risk_aversion: float
+    target_vol: Optional[float]
+    expected_return: float
+    volatility: float
+    weights: np.ndarray
+    solver: str
+    status: str
+    iterations: int
+    success: bool
+
+
+def _frontier_chunk(
+    prob: _MVProblem,
+    cfg: MVConfig,
+    has_mu: bool,
+    points: List[Tuple[float, Optional[float]]],
+    x0: np.ndarray,
+) -> List[FrontierPoint]:
+    """隣り合う点を前の解からウォームスタートしながら順に解く。"""
+    out: List[FrontierPoint] = []
+    for risk_aversion, target_vol in points:
+        pcfg = replace(cfg, risk_aversion=float(risk_aversion), target_vol=target_vol)
+        a, b = _objective_coefficients(pcfg, has_mu)
+        # Σ・μ・制約行列は共有し、目的関数の係数とボラ上限だけ差し替える
+        p = replace(prob, a=a, b=b, var_cap=float(target_vol) ** 2 if target_vol is not None else None)
+        res = _solve_problem(p, x0, pcfg)
+        w = res.weights
+        out.append(FrontierPoint(
+            risk_aversion=float(risk_aversion), target_vol=target_vol,
+            expected_return=float(prob.mu @ w), volatility=float(np.sqrt(max(0.0, prob.risk.quad(w)))),
+            weights=w, solver=res.solver, status=res.status, iterations=res.iterations, success=res.success,
+        ))
+        if res.success:
+            x0 = np.clip(w, 0.0, prob.upper)
+    return out
+
+
+def optimize_frontier(
+    tickers: List[str],
+    regions: List[str],
+    mu: pd.Series | None,
+    cov: pd.DataFrame | CovarianceModel,
+    cfg: MVConfig,
+    points: List[Tuple[float, Optional[float]]],
+    workers: int = 1,
+    groups: Optional[Dict[str, List[str]]] = None,
+) -> List[FrontierPoint]:
+    """(risk_aversion, target_vol) の各点について平均分散最適化をまとめて解く（結果は points の順）。
+
+    共分散の対称化・期待リターンの並べ替え・制約行列の組み立ては1度だけ行い、点は
+    (target_vol, risk_aversion) 順に並べて前の点の解から解く。workers > 1 なら連続した
+    区間に分けてプロセスプールで解く（区間内はウォームスタート）。
+    """
+    n = len(tickers)
+    prob = _build_problem(tickers, regions, mu, cov, cfg, groups=groups)
+    if cfg.solver == "admm":
+        # 各点の派生問題が同じ密行列を使うよう、分割・複製の前に1度だけ作る
+        prob.dense_sigma = prob.risk.dense()
+    x0 = np.array([min(cfg.position_limit, 1.0 / max(1, n))] * n)
+    order = sorted(
+        range(len(points)),
+        key=lambda i: (points[i][1] is None, points[i][1] or 0.0, points[i][0]),
+    )
+    ordered = [points[i] for i in order]
+
+    if workers > 1 and len(ordered) > 1:
+        from concurrent.futures import ProcessPoolExecutor
 
+        chunks = [list(c) for c in np.array_split(np.arange(len(ordered)), min(workers, len(ordered))) if len(c)]
+        with ProcessPoolExecutor(max_workers=len(chunks)) as ex:
+            futures = [
+                ex.submit(_frontier_chunk, prob, cfg, mu is not None, [ordered[i] for i in c], x0) for c in chunks
+            ]
+            solved = [pt for f in futures for pt in f.result()]
+    else:
+        solved = _frontier_chunk(prob, cfg, mu is not None, ordered, x0)
 
+    result: List[Optional[FrontierPoint]] = [None] * len(points)
+    for i, pt in zip(order, solved):
+        result[i] = pt
+    return result  # type: ignore[return-value]
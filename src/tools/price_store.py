@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Optional, Tuple
+import logging
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+def _safe_name(ticker: str) -> str:
+    """ファイル名に使えない文字を置換（例: ^GSPC → _GSPC）。"""
+    return re.sub(r"[^A-Za-z0-9._-]", "_", str(ticker))
+
+
+@dataclass
+class PriceStore:
+    """日足（終値・出来高）のローカル列指向ストア。
+
+    1ティッカー1ファイル（NPZ）で、列は dates/close/volume の3本。
+    MarketDataClient は先にここを読み、最終バー以降の差分のみを取得して追記する。
+    covered_from は取得済みの範囲の始点（上場日より前を取得しても値が無い銘柄で、
+    先頭より前を毎回取り直さないための記録）。
+    """
+
+    root: str | Path
+
+    def __post_init__(self) -> None:
+        self.root = Path(self.root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, ticker: str) -> Path:
+        return Path(self.root) / f"{_safe_name(ticker)}.npz"
+
+    def _read(self, ticker: str) -> Optional[Tuple[pd.Series, pd.Series, Optional[date]]]:
+        p = self.path_for(ticker)
+        if not p.exists():
+            return None
+        try:
+            with np.load(p, allow_pickle=False) as z:
+                idx = pd.DatetimeIndex(z["dates"].astype("datetime64[ns]"))
+                close = pd.Series(z["close"], index=idx, name=ticker)
+                volume = pd.Series(z["volume"], index=idx, name=ticker)
+                covered = pd.Timestamp(z["covered_from"][()]).date() if "covered_from" in z.files else None
+        except Exception as e:
+            logging.warning(f"Failed to read price store for {ticker}: {type(e).__name__}: {e}")
+            return None
+        return close, volume, covered
+
+    def load(self, ticker: str) -> Optional[Tuple[pd.Series, pd.Series]]:
+        """保存済みの (close, volume) を返す。未保存・破損時は None。"""
+        stored = self._read(ticker)
+        return None if stored is None else stored[:2]
+
+    def covered_from(self, ticker: str) -> Optional[date]:
+        """取得済み範囲の始点（未記録なら保存済みの先頭日）。未保存なら None。"""
+        stored = self._read(ticker)
+        if stored is None:
+            return None
+        close, _, covered = stored
+        if covered is not None:
+            return covered
+        return close.index[0].date() if not close.empty else None
+
+    def save(self, ticker: str, close: pd.Series, volume: pd.Series, covered_from: Optional[date] = None) -> None:
+        """(close, volume) を丸ごと書き込む（一時ファイル経由で置換）。"""
+        close = close.dropna()
+        if close.empty:
+            return
+        close = close[~close.index.duplicated(keep="last")].sort_index()
+        volume = volume.reindex(close.index)
+        dates = pd.DatetimeIndex(close.index).tz_localize(None).values.astype("datetime64[D]")
+        p = self.path_for(ticker)
+        extra = {} if covered_from is None else {"covered_from": np.datetime64(covered_from, "D")}
+        # 同一プロセス内の別スレッドが同じティッカーを書いても衝突しないようスレッドIDも付ける
+        tmp = p.with_name(p.name + f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                dates=dates,
+                close=close.to_numpy(dtype=float),
+                volume=volume.to_numpy(dtype=float),
+                **extra,
+            )
+        os.replace(tmp, p)
+
+    def append(self, ticker: str, close: pd.Series, volume: pd.Series, covered_from: Optional[date] = None) -> Tuple[pd.Series, pd.Series]:
+        """既存データに差分を追記して保存し、結合後の (close, volume) を返す。
+
+        同一日付は新しい値で上書きする。covered_from は保存済みの記録と早い方を残す。
+        """
+        stored = self._read(ticker)
+        if stored is not None:
+            close = pd.concat([stored[0], close])
+            volume = pd.concat([stored[1], volume])
+            if stored[2] is not None:
+                covered_from = stored[2] if covered_from is None else min(covered_from, stored[2])
+        close = close[~close.index.duplicated(keep="last")].sort_index()
+        volume = volume[~volume.index.duplicated(keep="last")].sort_index()
+        self.save(ticker, close, volume, covered_from=covered_from)
+        return close.rename(ticker), volume.reindex(close.index).rename(ticker)
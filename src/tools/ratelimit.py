@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from threading import Condition, Lock
+from typing import Iterator, Optional
+import logging
+import time
+
+
+class RateLimiter:
+    """トークンバケット（毎秒リクエスト数）と同時実行数上限を併せ持つレート制御。
+
+    - rate: 定常の毎秒リクエスト数
+    - burst: 一度に消費できるトークンの最大数（バケット容量）
+    - max_in_flight: 同時に実行できるリクエスト数の上限
+
+    データ取得クライアント（価格・財務・ニュース）は既定でプロセス共有の
+    インスタンス（get_shared_limiter）を使うため、地域スレッドやワーカー数を
+    増やしても外部APIへの総リクエスト量はここで一括して制御される。
+    """
+
+    def __init__(self, rate: float = 4.0, burst: int = 8, max_in_flight: int = 6):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1 or max_in_flight < 1:
+            raise ValueError("burst and max_in_flight must be >= 1")
+        self.rate = float(rate)
+        self.burst = int(burst)
+        self.max_in_flight = int(max_in_flight)
+        self.concurrency = self.max_in_flight  # 現在の同時実行上限（Adaptive で増減）
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = Lock()
+        self._slots = Condition()
+        self._in_flight = 0
+
+    def _take_token(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(float(self.burst), self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    @contextmanager
+    def acquire(self) -> Iterator[None]:
+        """リクエスト1回分の実行枠を取得する（with文で使用）。"""
+        with self._slots:
+            while self._in_flight >= self.concurrency:
+                self._slots.wait()
+            self._in_flight += 1
+        try:
+            self._take_token()
+            yield
+        finally:
+            with self._slots:
+                self._in_flight -= 1
+                self._slots.notify()
+
+    def record_success(self) -> None:
+        """成功を通知する（固定レートでは何もしない）。"""
+
+    def record_failure(self) -> None:
+        """失敗（例外・空データ）を通知する（固定レートでは何もしない）。"""
+
+    def stats(self) -> dict:
+        """現在のレート・同時実行上限・実行中件数を返す。"""
+        with self._slots:
+            in_flight = self._in_flight
+        return {
+            "rate": round(self.rate, 3),
+            "concurrency": self.concurrency,
+            "in_flight": in_flight,
+        }
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """AIMD（加算増加・乗算減少）でレートと同時実行数を自動調整するレート制御。
+
+    - 成功が続く間: rate を increase ずつ、concurrency を成功 concurrency 回ごとに1ずつ増やす
+      （上限は max_rate / max_in_flight）
+    - 失敗（例外・空データ・スロットリング）: rate に decrease を掛け、concurrency を半減し、
+      手持ちトークンを捨てて即座に減速する（下限は min_rate / 1）
+
+    リトライ間の待ち時間もこのフィードバックで決まる（固定スリープは不要）。
+    単一ティッカーの恒常的な失敗（上場廃止等）で過剰に減速しないよう、
+    レートの減少は cooldown 秒に1回までとする。
+    tolerance > 0 の場合は直近の失敗率（指数移動平均）が tolerance を超えたときだけ
+    減速する（散発的なエラーではスループットを落とさない）。
+    """
+
+    def __init__(
+        self,
+        rate: float = 4.0,
+        burst: int = 8,
+        max_in_flight: int = 6,
+        min_rate: float = 0.2,
+        max_rate: float = 20.0,
+        increase: float = 0.2,
+        decrease: float = 0.5,
+        cooldown: float = 1.0,
+        tolerance: float = 0.0,
+    ):
+        super().__init__(rate=rate, burst=burst, max_in_flight=max_in_flight)
+        if not (0.0 < decrease < 1.0):
+            raise ValueError("decrease must be in (0, 1)")
+        self.min_rate = float(min(min_rate, rate))
+        self.max_rate = float(max(max_rate, rate))
+        self.increase = float(increase)
+        self.decrease = float(decrease)
+        self.cooldown = float(cooldown)
+        self.tolerance = float(tolerance)
+        self.error_ratio = 0.0  # 直近の失敗率（指数移動平均）
+        self.concurrency = max(1, self.max_in_flight // 2)
+        self.successes = 0
+        self.failures = 0
+        self._streak = 0
+        self._last_decrease = float("-inf")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.successes += 1
+            self._streak += 1
+            self.error_ratio *= 1.0 - _ERROR_ALPHA
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            grow = self._streak >= self.concurrency and self.concurrency < self.max_in_flight
+            if grow:
+                self._streak = 0
+        if grow:
+            with self._slots:
+                self.concurrency += 1
+                self._slots.notify()
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._streak = 0
+            self.error_ratio = self.error_ratio * (1.0 - _ERROR_ALPHA) + _ERROR_ALPHA
+            # 再試行が即時に走らないよう手持ちトークンは常に捨てる
+            self._tokens = 0.0
+            if self.error_ratio <= self.tolerance:
+                return
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+        with self._slots:
+            self.concurrency = max(1, self.concurrency // 2)
+        logging.info(f"Rate limiter backing off: rate={self.rate:.2f}/s concurrency={self.concurrency}")
+
+    def stats(self) -> dict:
+        out = super().stats()
+        out.update({"successes": self.successes, "failures": self.failures, "error_ratio": round(self.error_ratio, 3)})
+        return out
+
+
+# 失敗率の指数移動平均の重み（概ね直近20件相当）
+_ERROR_ALPHA = 0.05
+# 共有 limiter の既定の許容失敗率（上場廃止銘柄などの散発的な失敗では減速しない）
+DEFAULT_ERROR_TOLERANCE = 0.1
+
+_shared_limiter: Optional[RateLimiter] = None
+_shared_lock = Lock()
+
+
+def get_shared_limiter() -> RateLimiter:
+    """プロセス共有のレート制御を返す（初回呼び出し時に既定値で生成）。"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = AdaptiveRateLimiter(tolerance=DEFAULT_ERROR_TOLERANCE)
+        return _shared_limiter
+
+
+def configure_shared_limiter(rate: float = 4.0, burst: int = 8, max_in_flight: int = 6, max_rate: float = 20.0, tolerance: float = DEFAULT_ERROR_TOLERANCE) -> RateLimiter:
+    """プロセス共有のレート制御を指定値で作り直す（以後生成されるクライアントに適用）。"""
+    global _shared_limiter
+    with _shared_lock:
+        _shared_limiter = AdaptiveRateLimiter(rate=rate, burst=burst, max_in_flight=max_in_flight, max_rate=max_rate, tolerance=tolerance)
+        return _shared_limiter
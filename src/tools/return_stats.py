@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Sequence
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class _PairMoments:
+    """ペアワイズ（両銘柄とも値がある日だけ）の重み付きモーメント和。
+
+    count[i, j] = Σ w·m_i·m_j, first[i, j] = Σ w·x_i·m_j, second[i, j] = Σ w·x_i²·m_j,
+    cross[i, j] = Σ w·x_i·x_j（m は欠損でないかどうか、欠損の x は 0 とする）。
+    """
+
+    count: np.ndarray
+    first: np.ndarray
+    second: np.ndarray
+    cross: np.ndarray
+
+    @staticmethod
+    def _parts(x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        m = ~np.isnan(x)
+        return np.where(m, x, 0.0), m.astype(float)
+
+    @classmethod
+    def build(cls, x: np.ndarray, weights: np.ndarray) -> "_PairMoments":
+        """T×n のリターン（行ごとの重み weights）から行列積でまとめて作る。"""
+        xv, mf = cls._parts(x)
+        xw, mw = xv * weights[:, None], mf * weights[:, None]
+        return cls(count=mw.T @ mf, first=xw.T @ mf, second=(xv * xw).T @ mf, cross=xw.T @ xv)
+
+    def add(self, row: np.ndarray, weight: float = 1.0) -> None:
+        """1日分のリターンを重み weight で加える（負の重みで取り除く）。O(n²)。"""
+        xv, mf = self._parts(row)
+        self.count += weight * np.outer(mf, mf)
+        self.first += weight * np.outer(xv, mf)
+        self.second += weight * np.outer(xv * xv, mf)
+        self.cross += weight * np.outer(xv, xv)
+
+    def scale(self, factor: float) -> None:
+        for a in (self.count, self.first, self.second, self.cross):
+            a *= factor
+
+    def extend(self, x: np.ndarray, weights: np.ndarray, new: int) -> "_PairMoments":
+        """x（T×(n+new)、末尾 new 列が追加銘柄）について、追加銘柄に関わる行・列だけ計算して広げる。"""
+        n = self.count.shape[0]
+        xv, mf = self._parts(x)
+        xw, mw = xv * weights[:, None], mf * weights[:, None]
+        b = slice(n, n + new)
+
+        def grow(old: np.ndarray, col: np.ndarray, row: np.ndarray) -> np.ndarray:
+            out = np.empty((n + new, n + new))
+            out[:n, :n] = old
+            out[:, b] = col
+            out[b, :] = row
+            return out
+
+        return _PairMoments(
+            count=grow(self.count, mw.T @ mf[:, b], mw[:, b].T @ mf),
+            first=grow(self.first, xw.T @ mf[:, b], xw[:, b].T @ mf),
+            second=grow(self.second, (xv * xw).T @ mf[:, b], (xv[:, b] * xw[:, b]).T @ mf),
+            cross=grow(self.cross, xw.T @ xv[:, b], xw[:, b].T @ xv),
+        )
+
+    def take(self, idx: np.ndarray) -> "_PairMoments":
+        ix = np.ix_(idx, idx)
+        return _PairMoments(self.count[ix], self.first[ix], self.second[ix], self.cross[ix])
+
+
+@dataclass
+class RollingReturnStats:
+    """直近 window 営業日の日次リターン統計（平均・共分散・相関・EWMA 共分散）を逐次更新する状態。
+
+    ペアワイズのモーメント和を持ち、新しい日足が届くたびに1日分を加え、窓から外れる1日分を
+    引く（1日あたり O(n²)）。mu/cov/vol は履歴を読み直さずに O(n²) で得られ、値は
+    pandas の `pct_change` → `mean` / `cov` / `corr`（欠損はペアワイズ）と一致する。
+    halflife を指定すると同じ窓で指数加重の共分散も保持する。
+    丸め誤差の蓄積を避けるため、window 回更新するごとに窓内のリターンから作り直す。
+    """
+
+    tickers: List[str]
+    window: int = 252
+    halflife: Optional[float] = None
+    dates: np.ndarray = field(default_factory=lambda: np.empty(0, dtype="datetime64[D]"))
+    returns: np.ndarray = field(default_factory=lambda: np.empty((0, 0)))
+    sample: Optional[_PairMoments] = None
+    ewma: Optional[_PairMoments] = None
+    updates: int = 0
+
+    def __post_init__(self) -> None:
+        self.tickers = [str(t) for t in self.tickers]
+        self._pos = {t: i for i, t in enumerate(self.tickers)}
+        if self.returns.shape != (len(self.dates), len(self.tickers)):
+            self.returns = np.full((len(self.dates), len(self.tickers)), np.nan)
+        if self.sample is None:
+            self._rebuild()
+
+    # --- 構築・更新 ---
+
+    @property
+    def decay(self) -> float:
+        return 0.5 ** (1.0 / self.halflife) if self.halflife else 1.0
+
+    def _ewma_weights(self, rows: int) -> np.ndarray:
+        return self.decay ** np.arange(rows)[::-1].astype(float)
+
+    def _rebuild(self) -> None:
+        rows = len(self.dates)
+        self.sample = _PairMoments.build(self.returns, np.ones(rows))
+        self.ewma = _PairMoments.build(self.returns, self._ewma_weights(rows)) if self.halflife else None
+        self.updates = 0
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, window: int = 252, halflife: Optional[float] = None) -> "RollingReturnStats":
+        """価格パネル（日付 × ティッカーの終値）の直近 window 日分のリターンから作る。"""
+        rets = _daily_returns(prices).iloc[-window:]
+        return cls(
+            tickers=[str(c) for c in rets.columns], window=window, halflife=halflife,
+            dates=_as_days(rets.index), returns=rets.to_numpy(dtype=float),
+        )
+
+    @property
+    def last_date(self) -> Optional[np.datetime64]:
+        return self.dates[-1] if len(self.dates) else None
+
+    def _add_tickers(self, rets: pd.DataFrame) -> None:
+        """窓内の日付に揃えたリターンで銘柄を追加する（追加銘柄の行・列だけ計算: O(T·n·k)）。"""
+        new = [str(c) for c in rets.columns]
+        block = rets.reindex(pd.DatetimeIndex(self.dates)).to_numpy(dtype=float)
+        self.returns = np.hstack([self.returns, block])
+        rows = len(self.dates)
+        self.sample = self.sample.extend(self.returns, np.ones(rows), len(new))
+        if self.ewma is not None:
+            self.ewma = self.ewma.extend(self.returns, self._ewma_weights(rows), len(new))
+        self.tickers += new
+        self._pos = {t: i for i, t in enumerate(self.tickers)}
+
+    def _append(self, day: np.datetime64, row: np.ndarray) -> None:
+        """1日分を加え、窓を超えたら最古の1日分を引く。"""
+        rows = len(self.dates)
+        self.sample.add(row)
+        if self.ewma is not None:
+            self.ewma.scale(self.decay)
+            self.ewma.add(row)
+        self.dates = np.append(self.dates, day)
+        self.returns = np.vstack([self.returns, row[None, :]])
+        if rows + 1 > self.window:
+            self._drop_oldest()
+        self.updates += 1
+        if self.updates >= self.window:
+            self._rebuild()
+
+    def _drop_oldest(self) -> None:
+        """窓の最古の1日分を引く。"""
+        rows = len(self.dates)
+        oldest = self.returns[0]
+        self.sample.add(oldest, -1.0)
+        if self.ewma is not None:
+            # 最古の行は rows - 1 日経過しているので重みは decay**(rows - 1)
+            self.ewma.add(oldest, -(self.decay ** (rows - 1)))
+        self.dates = self.dates[1:]
+        self.returns = self.returns[1:]
+
+    def trim(self, start) -> int:
+        """start より前の日を窓から外し、外した日数を返す（価格パネルの先頭に窓を揃える）。"""
+        day = _as_days(pd.Index([start]))[0]
+        dropped = 0
+        while len(self.dates) and self.dates[0] < day:
+            self._drop_oldest()
+            dropped += 1
+        if dropped:
+            self._prune()
+            self.updates += dropped
+            if self.updates >= self.window:
+                self._rebuild()
+        return dropped
+
+    def _prune(self) -> None:
+        """窓内にリターンが1つも無くなった銘柄（ユニバースから外れた銘柄）を落とす。"""
+        keep = np.flatnonzero((~np.isnan(self.returns)).any(axis=0)) if len(self.dates) else np.arange(0)
+        if len(keep) == len(self.tickers):
+            return
+        self.tickers = [self.tickers[i] for i in keep]
+        self._pos = {t: i for i, t in enumerate(self.tickers)}
+        self.returns = self.returns[:, keep]
+        self.sample = self.sample.take(keep)
+        if self.ewma is not None:
+            self.ewma = self.ewma.take(keep)
+
+    def update(self, prices: pd.DataFrame) -> int:
+        """価格パネルのうち最終日より後の日足を取り込み、追加した日数を返す。
+
+        パネルには状態の最終日（前日終値）が含まれている必要がある（無ければ ValueError）。
+        新しい列は窓内の日付に揃えて追加し、窓内に値が無くなった銘柄は落とす。
+        """
+        prices = prices.sort_index()
+        last = self.last_date
+        if last is not None and (prices.empty or _as_days(prices.index[:1])[0] > last):
+            raise ValueError("price panel does not overlap the stored statistics")
+        rets = _daily_returns(prices)
+        new_cols = [c for c in rets.columns if str(c) not in self._pos]
+        if new_cols:
+            self._add_tickers(rets[new_cols])
+        days = _as_days(rets.index)
+        fresh = rets[days > last] if last is not None else rets
+        if len(fresh):
+            aligned = fresh.rename(columns=str).reindex(columns=self.tickers).to_numpy(dtype=float)
+            for day, row in zip(_as_days(fresh.index), aligned):
+                self._append(day, row)
+        self._prune()
+        return len(fresh)
+
+    # --- 読み出し（年率換算） ---
+
+    def _index(self, tickers: Optional[Sequence[str]]) -> tuple[np.ndarray, List[str]]:
+        if tickers is None:
+            return np.arange(len(self.tickers)), list(self.tickers)
+        names = [str(t) for t in tickers]
+        return np.array([self._pos[t] for t in names], dtype=int), names
+
+    def covers(self, tickers: Sequence[str]) -> bool:
+        return all(str(t) in self._pos for t in tickers)
+
+    def spans(self, index) -> bool:
+        """窓内の日付が index（リターンの行）とちょうど一致するか。"""
+        days = _as_days(index)
+        return len(days) == len(self.dates) and bool((days == self.dates).all())
+
+    def mean(self, tickers: Optional[Sequence[str]] = None, trading_days: int = 252) -> pd.Series:
+        idx, names = self._index(tickers)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            m = np.diag(self.sample.first)[idx] / np.diag(self.sample.count)[idx]
+        return pd.Series(m * trading_days, index=names)
+
+    def cov(self, tickers: Optional[Sequence[str]] = None, method: str = "sample", trading_days: int = 252) -> pd.DataFrame:
+        """共分散（method="sample" は不偏・ペアワイズ、"ewma" は半減期 halflife の指数加重）。"""
+        idx, names = self._index(tickers)
+        mom = self.sample.take(idx)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if method == "ewma":
+                if self.ewma is None:
+                    raise ValueError("EWMA statistics are not tracked (halflife is None)")
+                mom = self.ewma.take(idx)
+                mi, mj = mom.first / mom.count, mom.first.T / mom.count
+                c = mom.cross / mom.count - mi * mj
+            elif method == "sample":
+                c = (mom.cross - mom.first * mom.first.T / mom.count) / (mom.count - 1.0)
+                c[mom.count < 2] = np.nan
+            else:
+                raise ValueError(f"unsupported method for rolling statistics: {method}")
+        return pd.DataFrame(c * trading_days, index=names, columns=names)
+
+    def vol(self, tickers: Optional[Sequence[str]] = None, trading_days: int = 252) -> pd.Series:
+        c = self.cov(tickers, trading_days=trading_days)
+        return pd.Series(np.sqrt(np.diag(c.values)), index=c.index)
+
+    def corr(self, tickers: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """ペアワイズ相関（各ペアで両方に値がある日の分散を使う。pandas の corr と同じ定義）。"""
+        idx, names = self._index(tickers)
+        mom = self.sample.take(idx)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            n = mom.count
+            sxy = mom.cross - mom.first * mom.first.T / n
+            sxx = mom.second - mom.first ** 2 / n
+            c = sxy / np.sqrt(sxx * sxx.T)
+        c[n < 2] = np.nan
+        np.fill_diagonal(c, np.where(np.diag(n) >= 2, 1.0, np.nan))
+        return pd.DataFrame(np.clip(c, -1.0, 1.0), index=names, columns=names)
+
+    # --- 永続化 ---
+
+    def save(self, path: str | Path) -> None:
+        """NPZ に書き込む（一時ファイル経由で置換）。"""
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "tickers": np.array(self.tickers, dtype=str),
+            "window": np.array(self.window),
+            "halflife": np.array(self.halflife if self.halflife else 0.0),
+            "dates": self.dates.astype("datetime64[D]"),
+            "returns": self.returns,
+            "updates": np.array(self.updates),
+        }
+        for name, mom in (("sample", self.sample), ("ewma", self.ewma)):
+            if mom is not None:
+                for k in ("count", "first", "second", "cross"):
+                    arrays[f"{name}_{k}"] = getattr(mom, k)
+        tmp = p.with_name(p.name + f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, p)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "RollingReturnStats":
+        with np.load(path, allow_pickle=False) as z:
+            def moments(name: str) -> Optional[_PairMoments]:
+                if f"{name}_count" not in z:
+                    return None
+                return _PairMoments(*(z[f"{name}_{k}"].copy() for k in ("count", "first", "second", "cross")))
+
+            halflife = float(z["halflife"])
+            return cls(
+                tickers=[str(t) for t in z["tickers"]], window=int(z["window"]),
+                halflife=halflife or None, dates=z["dates"].astype("datetime64[D]"),
+                returns=z["returns"].copy(), sample=moments("sample"), ewma=moments("ewma"),
+                updates=int(z["updates"]),
+            )
+
+
+def _as_days(index) -> np.ndarray:
+    return pd.DatetimeIndex(index).tz_localize(None).values.astype("datetime64[D]")
+
+
+def _daily_returns(prices: pd.DataFrame) -> pd.DataFrame:
+    """compute_returns(method="pct") と同じ日次リターン（全欠損の日は除く）。"""
+    return prices.sort_index().pct_change(fill_method=None).dropna(how="all")
+
+
+def sync_return_stats(
+    path: str | Path,
+    prices: pd.DataFrame,
+    window: int = 252,
+    halflife: Optional[float] = None,
+) -> RollingReturnStats:
+    """保存済みの統計を価格パネルの新しい日足で更新して保存し、返す。
+
+    窓はパネルの最初のリターンの日より前を外して、パネルのリターンの行に揃える
+    （揃わなければ作り直す）。保存が無い・設定（window/halflife）が違う・パネルと重ならない
+    場合も作り直す。パネルの最終日が保存済みより前（過去日付での実行）の場合は、
+    保存を上書きせずにその時点の統計を返す。
+    """
+    p = Path(path)
+    stats: Optional[RollingReturnStats] = None
+    if p.exists():
+        try:
+            stats = RollingReturnStats.load(p)
+        except Exception as e:
+            logging.warning(f"Failed to read return statistics: {type(e).__name__}: {e}")
+    if stats is not None and (stats.window != window or (stats.halflife or None) != (halflife or None)):
+        stats = None
+    if stats is not None and stats.last_date is not None and len(prices) and _as_days(pd.Index([prices.index.max()]))[0] < stats.last_date:
+        return RollingReturnStats.from_prices(prices, window, halflife)
+    if stats is not None:
+        try:
+            stats.update(prices)
+        except ValueError:
+            stats = None
+    if stats is not None:
+        rows = _daily_returns(prices).index[-window:]
+        if len(rows):
+            stats.trim(rows[0])
+        if not stats.spans(rows):
+            stats = None
+    if stats is None:
+        stats = RollingReturnStats.from_prices(prices, window, halflife)
+    stats.save(p)
+    return stats
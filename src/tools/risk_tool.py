@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
 import numpy as np
 import pandas as pd
 
+from .covariance import CovarianceModel, as_covariance_model, estimate_covariance
+from .return_stats import RollingReturnStats
+
 
 def compute_returns(prices: pd.DataFrame, method: str = "log") -> pd.DataFrame:
     prices = prices.sort_index()
@@ -20,17 +26,135 @@ def max_drawdown(series: pd.Series) -> float:
     return float(dd.min())
 
 
-def risk_metrics(returns_df: pd.DataFrame, trading_days: int = 252) -> dict:
-    rets = returns_df.dropna(how="all")
-    cov = rets.cov() * trading_days
-    corr = rets.corr()
-    vol = rets.std() * np.sqrt(trading_days)
-    port_dd = {c: max_drawdown(rets[c].fillna(0)) for c in rets.columns}
+@dataclass
+class ReturnsPanel:
+    """1回の実行で最適化とリスク計算が共有する日次リターンとリスクモデル。
+
+    平均・共分散は最初に要求されたときに1度だけ計算してキャッシュし、ボラと相関は
+    共分散から導く（リターンを走査し直さない）。return_stats（逐次更新の統計）が
+    対象銘柄を含み、窓の日付が returns の行と一致する場合だけ、平均・共分散をそこから読む
+    （値は returns から計算した場合と同じで、過去の実行で溜まった窓の長さに左右されない）。
+    """
+
+    returns: pd.DataFrame
+    trading_days: int = 252
+    return_stats: Optional[RollingReturnStats] = None
+    _cache: dict = field(default_factory=dict, init=False, repr=False)
+
+    @classmethod
+    def from_prices(
+        cls,
+        prices: pd.DataFrame,
+        trading_days: int = 252,
+        return_stats: Optional[RollingReturnStats] = None,
+    ) -> "ReturnsPanel":
+        return cls(compute_returns(prices, method="pct"), trading_days, return_stats)
+
+    @property
+    def tickers(self) -> List[str]:
+        return list(self.returns.columns)
+
+    def covers(self, tickers: Sequence[str]) -> bool:
+        cols = set(self.returns.columns)
+        return all(t in cols for t in tickers)
+
+    def _stats_for(self, tickers: Sequence[str]) -> Optional[RollingReturnStats]:
+        st = self.return_stats
+        if st is None or not st.covers(tickers) or not st.spans(self.returns.index):
+            return None
+        return st
+
+    def _full(self, key: str) -> pd.DataFrame | pd.Series:
+        if key not in self._cache:
+            cols = self.tickers
+            st = self._stats_for(cols)
+            if key == "mean":
+                val = st.mean(cols, self.trading_days) if st is not None else self.returns.mean() * self.trading_days
+            else:
+                val = st.cov(cols, trading_days=self.trading_days) if st is not None else self.returns.cov() * self.trading_days
+            self._cache[key] = val
+        return self._cache[key]
+
+    def mean(self, tickers: Optional[Sequence[str]] = None) -> pd.Series:
+        """年率の期待リターン（列ごとの平均 × trading_days）。"""
+        m = self._full("mean")
+        return m if tickers is None else m.loc[list(tickers)]
+
+    def cov(self, tickers: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """年率の標本共分散（欠損はペアワイズ）。"""
+        c = self._full("cov")
+        return c if tickers is None else c.loc[list(tickers), list(tickers)]
+
+    def vol(self, tickers: Optional[Sequence[str]] = None) -> pd.Series:
+        c = self.cov(tickers)
+        return pd.Series(np.sqrt(np.diag(c.values)), index=c.index)
+
+    def corr(self, tickers: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        c = self.cov(tickers)
+        return _corr_from_cov(c)
+
+    def covariance_model(self, tickers: Optional[Sequence[str]] = None, method: str = "sample") -> CovarianceModel:
+        """method の共分散モデル。sample は共有の共分散を、ewma は逐次統計があればそれを使う。"""
+        names = self.tickers if tickers is None else list(tickers)
+        key = (method, tuple(names))
+        if key in self._cache:
+            return self._cache[key]
+        st = self._stats_for(names)
+        if method == "sample":
+            model = as_covariance_model(self.cov(names))
+        elif method == "ewma" and st is not None and st.ewma is not None:
+            model = as_covariance_model(st.cov(names, method="ewma", trading_days=self.trading_days))
+        else:
+            model = estimate_covariance(self.returns[names].dropna(how="all"), method, self.trading_days)
+        self._cache[key] = model
+        return model
+
+
+def _corr_from_cov(cov: pd.DataFrame) -> pd.DataFrame:
+    """共分散から相関を導く（分散 0 の銘柄は NaN）。"""
+    sd = np.sqrt(np.diag(cov.values))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        c = cov.values / np.outer(sd, sd)
+    c = np.clip(c, -1.0, 1.0)
+    return pd.DataFrame(c, index=cov.index, columns=cov.columns)
+
+
+def _frame_to_dict(df: pd.DataFrame) -> dict:
+    """DataFrame.to_dict() と同じ {列: {行: 値}} を、列ごとの tolist で作る（n² 要素で速い）。"""
+    index = list(df.index)
+    values = df.to_numpy(dtype=float)
+    return {c: dict(zip(index, values[:, j].tolist())) for j, c in enumerate(df.columns)}
+
+
+def risk_metrics(
+    returns_df: pd.DataFrame | ReturnsPanel,
+    trading_days: int = 252,
+    cov_method: str = "sample",
+    return_stats: Optional[RollingReturnStats] = None,
+) -> dict:
+    """共分散・相関・ボラ・最大ドローダウン。ReturnsPanel を渡すと計算済みの共分散を再利用する。
+
+    相関とボラは共分散から導く（cov_method の推定を使う）。
+    """
+    if isinstance(returns_df, ReturnsPanel):
+        panel = returns_df
+    else:
+        panel = ReturnsPanel(returns_df.dropna(how="all"), trading_days, return_stats)
+    rets = panel.returns
+    if cov_method == "sample":
+        cov = panel.cov()
+    else:
+        # 推定した共分散モデル（銘柄数が観測数を超えても正定値）
+        model = panel.covariance_model(None, cov_method)
+        cov = pd.DataFrame(model.dense(), index=rets.columns, columns=rets.columns)
+    vol = pd.Series(np.sqrt(np.diag(cov.values)), index=cov.index)
+    corr = _corr_from_cov(cov)
+    # 最大ドローダウンは全列まとめて計算（max_drawdown と同じ定義）
+    cum = (1 + rets.fillna(0)).cumprod()
+    port_dd = ((cum / cum.cummax()) - 1.0).min()
     return {
-        "covariance": cov.to_dict(),
-        "correlation": corr.to_dict(),
+        "covariance": _frame_to_dict(cov),
+        "correlation": _frame_to_dict(corr),
         "volatility": vol.to_dict(),
-        "max_drawdown": port_dd,
+        "max_drawdown": {c: float(v) for c, v in port_dd.items()},
     }
-
-
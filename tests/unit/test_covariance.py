@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.tools.covariance import (
+    DenseCovariance,
+    FactorCovariance,
+    estimate_covariance,
+    ewma_covariance,
+    factor_covariance,
+    ledoit_wolf,
+)
+from src.tools.optimizer_tool import MVConfig, solve_mean_variance
+from src.tools.risk_tool import risk_metrics
+
+
+def _returns(n, t=260, k=3, seed=0):
+    rng = np.random.default_rng(seed)
+    f = rng.normal(0, 0.01, (t, k))
+    x = f @ rng.normal(1, 0.4, (k, n)) / k + rng.normal(0, 0.01, (t, n))
+    return pd.DataFrame(x, columns=[f"T{i}" for i in range(n)])
+
+
+def test_ledoit_wolf_is_positive_definite_when_assets_exceed_observations():
+    rets = _returns(120, t=60)
+    sample = rets.cov().values
+    assert np.linalg.eigvalsh(sample).min() < 1e-12  # 標本共分散は特異
+    lw = ledoit_wolf(rets, trading_days=1).matrix
+    assert np.linalg.eigvalsh(lw).min() > 0
+    # 縮小は標本共分散と目標（分散平均 × I）の凸結合
+    off = ~np.eye(120, dtype=bool)
+    ratio = lw[off] / (sample[off] * 59 / 60)
+    assert np.allclose(ratio, ratio[0]) and 0 < ratio[0] < 1
+
+
+def test_ewma_with_long_halflife_matches_sample_covariance():
+    rets = _returns(10)
+    ew = ewma_covariance(rets, halflife=1e9, trading_days=1).matrix
+    assert np.allclose(ew, rets.cov().values * 259 / 260)
+
+
+def test_factor_model_products_match_dense_matrix():
+    rets = _returns(50)
+    model = factor_covariance(rets, n_factors=3)
+    w = np.random.default_rng(1).random(50)
+    assert np.allclose(model.matvec(w), model.dense() @ w)
+    assert model.quad(w) == pytest.approx(w @ model.dense() @ w)
+    assert np.allclose(model.diag(), np.diag(model.dense()))
+    # 3ファクターで生成したデータなので総分散はほぼ再現する
+    assert np.allclose(model.diag(), rets.var().values * 252, rtol=0.02)
+
+
+def test_estimate_covariance_methods_and_optimizer_integration():
+    rets = _returns(40)
+    tickers = list(rets.columns)
+    regions = [["US", "JP"][i % 2] for i in range(40)]
+    mu = rets.mean() * 252
+    sample = estimate_covariance(rets, "sample")
+    assert isinstance(sample, DenseCovariance)
+    assert np.allclose(sample.dense(), rets.cov().values * 252)
+    assert isinstance(estimate_covariance(rets, "factor"), FactorCovariance)
+    with pytest.raises(ValueError):
+        estimate_covariance(rets, "shrunk")
+
+    cfg = MVConfig(region_limits={"US": 0.6, "JP": 0.6}, position_limit=0.1, risk_aversion=1.0, target_vol=0.1)
+    model = estimate_covariance(rets, "factor")
+    for solver in ("slsqp", "admm"):
+        res = solve_mean_variance(tickers, regions, mu, model, MVConfig(**{**cfg.__dict__, "solver": solver}))
+        dense = solve_mean_variance(
+            tickers, regions, mu, pd.DataFrame(model.dense(), index=tickers, columns=tickers),
+            MVConfig(**{**cfg.__dict__, "solver": solver}),
+        )
+        assert res.success
+        assert res.objective == pytest.approx(dense.objective, abs=1e-6)
+        assert model.quad(res.weights) <= 0.1 ** 2 + 1e-6
+
+
+def test_risk_metrics_with_shrinkage_estimator():
+    rets = _returns(8)
+    metrics = risk_metrics(rets, cov_method="ledoit_wolf")
+    corr = pd.DataFrame(metrics["correlation"])
+    assert np.allclose(np.diag(corr.values), 1.0)
+    vol = pd.Series(metrics["volatility"])
+    assert np.allclose(vol.values ** 2, np.diag(pd.DataFrame(metrics["covariance"]).values))
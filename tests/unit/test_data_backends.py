@@ -0,0 +1,116 @@
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from src.tools.backends import (
+    BackendError,
+    LocalBackend,
+    YFinanceBackend,
+    configure_backend,
+    get_backend,
+)
+from src.tools.buy_signal import _fetch_metrics_yfinance
+from src.tools.fundamentals import FundamentalsClient
+from src.tools.marketdata import MarketDataClient
+from src.tools.news import NewsClient
+from src.tools.price_store import PriceStore
+from src.tools.ratelimit import RateLimiter
+
+
+def _limiter():
+    return RateLimiter(rate=1000.0, burst=100, max_in_flight=8)
+
+
+def test_local_backend_is_deterministic_and_delta_consistent():
+    backend = LocalBackend()
+    full = backend.download(tickers=["A", "B"], period="1y", group_by="ticker")
+    again = LocalBackend().download(tickers=["A", "B"], period="1y", group_by="ticker")
+    pd.testing.assert_frame_equal(full, again)
+    assert isinstance(full.columns, pd.MultiIndex) and ("A", "Close") in full.columns
+
+    # 差分取得（start 指定）の値は全期間取得の末尾と一致する
+    start = full.index[-5]
+    delta = backend.download(tickers=["A", "B"], start=start.date().isoformat(), group_by="ticker")
+    pd.testing.assert_series_equal(delta[("A", "Close")], full[("A", "Close")].iloc[-5:])
+
+    single = backend.download("A", period="1mo")
+    assert "Close" in single.columns and not isinstance(single.columns, pd.MultiIndex)
+
+
+def test_local_backend_serves_recorded_prices(tmp_path):
+    idx = pd.bdate_range(end=pd.Timestamp(datetime.utcnow().date()) - pd.offsets.BDay(1), periods=5)
+    PriceStore(tmp_path).save("REC", pd.Series([1.0, 2.0, 3.0, 4.0, 5.0], index=idx), pd.Series([10.0] * 5, index=idx))
+    out = LocalBackend(root=tmp_path).download("REC", period="1mo")
+    assert list(out["Close"].dropna()) == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+def test_local_backend_injects_errors():
+    backend = LocalBackend(error_rate=1.0)
+    with pytest.raises(BackendError):
+        backend.download("A", period="5d")
+    assert backend.download(tickers=["A", "B"], period="5d").empty
+    with pytest.raises(BackendError):
+        backend.Ticker("A").news
+
+
+def test_clients_run_offline_on_local_backend():
+    backend = LocalBackend()
+    tickers = ["AAA", "BBB", "CCC"]
+
+    prices, volumes = MarketDataClient(limiter=_limiter(), backend=backend).get_prices(tickers, lookback_days=60)
+    assert list(prices.columns) == tickers and len(prices) > 30
+    assert volumes.shape == prices.shape
+
+    fdf = FundamentalsClient(limiter=_limiter(), backend=backend).get_fundamentals(tickers, ["revenue_cagr", "eps_growth"])
+    assert set(fdf["ticker"]) == set(tickers)
+    assert fdf["revenue_cagr"].notna().all()
+
+    items = NewsClient(limiter=_limiter(), backend=backend).get_news(tickers, date.today() - timedelta(days=60))
+    assert {i["ticker"] for i in items} == set(tickers)
+
+    metrics = _fetch_metrics_yfinance("AAA", backend=backend)
+    assert metrics["pe"] is not None and metrics["eps_growth"] is not None
+
+
+def test_configure_backend_switches_shared_backend():
+    try:
+        local = configure_backend("local", latency=0.0)
+        assert get_backend() is local
+        with pytest.raises(ValueError):
+            configure_backend("bogus")
+    finally:
+        configure_backend("yfinance")
+    assert isinstance(get_backend(), YFinanceBackend)
+
+
+def test_local_backend_run_leaves_yfinance_store_untouched(tmp_path, monkeypatch):
+    from typer.testing import CliRunner
+
+    from src.app import app
+
+    store_dir = tmp_path / "prices"
+    idx = pd.bdate_range(end="2025-08-11", periods=5)
+    PriceStore(store_dir).save("7203.T", pd.Series([1.0, 2.0, 3.0, 4.0, 5.0], index=idx), pd.Series([10.0] * 5, index=idx))
+    before = {p.name: p.read_bytes() for p in store_dir.glob("*.npz")}
+
+    import src.tools.backends as backends
+
+    # run はプロセス共有のバックエンドを差し替えるので、テスト後に元へ戻す
+    monkeypatch.setattr(backends, "_backend", None)
+    for key in ("OPENAI_API_KEY", "PPLX_API_KEY"):
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setenv("MARKETDATA_BACKEND", "local")
+    monkeypatch.setenv("PRICE_STORE_DIR", str(store_dir))
+    monkeypatch.setenv("LLM_CACHE_DIR", "")
+    monkeypatch.setenv("RETURN_STATS_PATH", "")
+    outdir = tmp_path / "artifacts"
+    result = CliRunner().invoke(
+        app, ["run", "--regions", "JP", "--date", "2025-08-12", "--output", str(outdir), "--top-n", "5"],
+        catch_exceptions=False,
+    )
+    assert result.exit_code == 0
+
+    # 合成データは local/ にのみ保存され、yfinance 用の保存分は変わらない
+    assert {p.name: p.read_bytes() for p in store_dir.glob("*.npz")} == before
+    assert list((store_dir / "local").glob("*.npz"))
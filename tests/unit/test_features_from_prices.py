@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from src.scoring.features import build_features_from_prices
+
+
+def _reference(prices, volumes, t):
+    """ティッカー単位の素朴な実装（dropna 後の系列で計算）。"""
+    s = prices[t].dropna()
+
+    def mom(days):
+        if len(s) <= days or s.iloc[-days] == 0:
+            return np.nan
+        return s.iloc[-1] / s.iloc[-days] - 1.0
+
+    v = volumes[t].dropna() if t in volumes else pd.Series(dtype=float)
+    trend = np.nan
+    if len(v) >= 60 and v.iloc[-60:].mean() != 0:
+        trend = v.iloc[-10:].mean() / v.iloc[-60:].mean()
+    return [mom(252), mom(126), mom(63), mom(21), trend]
+
+
+def test_build_features_from_prices_matches_per_ticker_reference():
+    rng = np.random.default_rng(0)
+    T, N = 300, 40
+    idx = pd.bdate_range("2024-01-01", periods=T)
+    cols = [f"T{i}" for i in range(N)]
+    prices = pd.DataFrame(np.exp(np.cumsum(rng.normal(0, 0.02, (T, N)), axis=0)), index=idx, columns=cols)
+    volumes = pd.DataFrame(rng.lognormal(10, 1, (T, N)), index=idx, columns=cols)
+    prices = prices.mask(rng.random((T, N)) < 0.1)
+    volumes = volumes.mask(rng.random((T, N)) < 0.1)
+    prices["T0"] = np.nan                  # 価格なし → 除外
+    prices.iloc[:250, 1] = np.nan          # 履歴不足 → 長期モメンタムは NaN
+    volumes.iloc[:260, 2] = np.nan         # 出来高不足 → volume_trend は NaN
+    volumes = volumes.drop(columns=["T3"])  # 出来高列なし
+    universe = pd.DataFrame({"ticker": cols + ["MISSING"], "name": [f"name-{c}" for c in cols] + ["x"]})
+
+    df = build_features_from_prices("US", universe, prices, volumes)
+
+    assert list(df["ticker"]) == cols[1:]
+    assert list(df["name"]) == [f"name-{c}" for c in cols[1:]]
+    feature_cols = ["technical_mom_12m", "technical_mom_6m", "technical_mom_3m", "technical_mom_1m", "technical_volume_trend"]
+    expected = np.array([_reference(prices, volumes, t) for t in cols[1:]])
+    np.testing.assert_allclose(df[feature_cols].to_numpy(dtype=float), expected, rtol=1e-10)
+    assert np.isnan(df.loc[df["ticker"] == "T1", "technical_mom_12m"]).all()
+    assert np.isnan(df.loc[df["ticker"] == "T3", "technical_volume_trend"]).all()
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from datetime import date
+
+import pandas as pd
+
+from src.tools.fetch_engine import fetch_region_data
+
+
+class FakeMarket:
+    def __init__(self, barrier=None, empty=False):
+        self.barrier = barrier
+        self.empty = empty
+
+    def get_prices(self, tickers, lookback_days=260, as_of=None):
+        if self.barrier:
+            self.barrier.wait()
+        if self.empty:
+            return pd.DataFrame(), pd.DataFrame()
+        idx = pd.bdate_range("2025-01-01", periods=3)
+        df = pd.DataFrame({t: [1.0, 2.0, 3.0] for t in tickers}, index=idx)
+        return df, df * 100
+
+
+class FakeFundamentals:
+    def __init__(self, barrier=None):
+        self.barrier = barrier
+        self.cancel = None
+
+    def get_fundamentals(self, tickers, fields, cancel=None):
+        self.cancel = cancel
+        if self.barrier:
+            self.barrier.wait()
+        return pd.DataFrame({"ticker": tickers, fields[0]: [0.1] * len(tickers)})
+
+
+class FakeNews:
+    def __init__(self, barrier=None):
+        self.barrier = barrier
+        self.cancel = None
+
+    def get_news(self, tickers, since, cancel=None):
+        self.cancel = cancel
+        if self.barrier:
+            self.barrier.wait()
+        return [{"ticker": tickers[0], "title": "x", "url": "u", "date": since.isoformat()}]
+
+
+def test_fetch_region_data_runs_three_sources_concurrently():
+    # 逐次実行ならバリアがタイムアウトして BrokenBarrierError になる
+    barrier = threading.Barrier(3, timeout=5)
+    data = fetch_region_data(
+        ["A", "B"], date(2025, 8, 1),
+        FakeMarket(barrier), FakeFundamentals(barrier), FakeNews(barrier),
+        fields=["roic"],
+    )
+    assert list(data.prices.columns) == ["A", "B"]
+    assert list(data.fundamentals["ticker"]) == ["A", "B"]
+    assert data.news[0]["ticker"] == "A"
+
+
+def test_fetch_region_data_cancels_when_prices_empty():
+    fcli, ncli = FakeFundamentals(), FakeNews()
+    data = fetch_region_data(["A"], date(2025, 8, 1), FakeMarket(empty=True), fcli, ncli)
+    assert data.prices.empty
+    assert fcli.cancel is not None and fcli.cancel.is_set()
+    assert ncli.cancel is fcli.cancel
+
+
+def test_fetch_region_data_sync_wrapper_inside_running_loop():
+    async def main():
+        return fetch_region_data(["A"], date(2025, 8, 1), FakeMarket(), FakeFundamentals(), FakeNews())
+
+    data = asyncio.run(main())
+    assert list(data.prices.columns) == ["A"]
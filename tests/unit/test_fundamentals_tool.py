@@ -4,7 +4,7 @@ from src.tools.fundamentals import FundamentalsClient
 def test_fundamentals_returns_dataframe_with_requested_fields(monkeypatch):
     client = FundamentalsClient()
 
-    def mock_fetch_raw(tickers):
+    def mock_fetch_raw(tickers, cancel=None):
         return {t: {} for t in tickers}
 
     def mock_compute(raw, fields):
@@ -27,7 +27,7 @@ def test_fundamentals_computed_metrics(monkeypatch):
     client = FundamentalsClient()
 
     # モック: 最低限の財務データ
-    def mock_fetch_raw(tickers):
+    def mock_fetch_raw(tickers, cancel=None):
         import pandas as pd
         return {
             "AAPL": {
@@ -0,0 +1,91 @@
+"""複数銘柄をまとめた投資仮説生成（バッチ）のテスト"""
+
+import json
+from datetime import date
+from unittest.mock import patch
+
+from src.agents import openai_agent
+from src.agents.llm_batch import parse_batch_response, ticker_lines
+from src.agents.regions import RegionAgent
+
+
+def _items(n):
+    return [
+        (f"T{i}", f"Name{i}", "US", {"fundamental": 0.5, "growth": 0.4}, {"mom_1m": 0.01, "volume_trend": None})
+        for i in range(n)
+    ]
+
+
+def test_parse_batch_response_extracts_known_tickers():
+    text = "```json\n" + json.dumps({"results": [
+        {"ticker": "T0", "thesis": "良好", "risks": ["- 規制", "需給", "為替", "金利"]},
+        {"ticker": "T1", "thesis": ""},            # 空の thesis は採用しない
+        {"ticker": "ZZZ", "thesis": "対象外"},      # 入力にない ticker は無視
+        {"ticker": "T2", "thesis": "堅調"},         # risks なし → 既定
+    ]}, ensure_ascii=False) + "\n```"
+    out = parse_batch_response(text, ["T0", "T1", "T2"])
+    assert out["T0"] == ("良好", ["規制", "需給", "為替"])
+    assert set(out) == {"T0", "T2"}
+    assert len(out["T2"][1]) == 3
+    assert parse_batch_response("not json", ["T0"]) == {}
+
+
+def test_ticker_lines_rounds_every_numeric_value():
+    lines = ticker_lines(
+        "T0", "Name0", "US",
+        {"fundamental": 0.123456789, "label": "n/a"},
+        {"mom_1m": 0.0123456, "volume_trend": 1.23456, "rsi": 55.123456789, "vol_20d": None},
+    )
+    assert "- fundamental: 0.123" in lines
+    assert "- label: n/a" in lines
+    assert "- mom_1m: 1.2%" in lines
+    assert "- volume_trend: 1.23" in lines
+    assert "- rsi: 55.123" in lines
+    assert "- vol_20d: N/A" in lines
+    # 丸め後に同じ値なら同じプロンプト（キャッシュキー）になる
+    assert lines == ticker_lines(
+        "T0", "Name0", "US",
+        {"fundamental": 0.1234561, "label": "n/a"},
+        {"mom_1m": 0.0123457, "volume_trend": 1.23457, "rsi": 55.1234561, "vol_20d": None},
+    )
+
+
+def test_batch_falls_back_to_single_calls_for_missing_tickers():
+    prompts = []
+
+    def fake_chat(system, user, model="gpt-4o-mini"):
+        prompts.append(user)
+        if "T0" in user and "T1" in user:  # バッチ要求: T1 の結果が欠落
+            return json.dumps({"results": [{"ticker": "T0", "thesis": "batch T0", "risks": ["a"]}]})
+        return "single thesis\n- r1"
+
+    with patch.object(openai_agent, "_chat", side_effect=fake_chat):
+        out = openai_agent.generate_theses_batch(_items(2))
+
+    assert out["T0"] == ("batch T0", ["a"])
+    assert out["T1"] == ("single thesis", ["r1"])
+    assert len(prompts) == 2
+    assert "T0" in prompts[0] and "T1" in prompts[0]
+
+
+def test_region_agent_batches_theses():
+    calls = []
+
+    def fake_batch(items):
+        calls.append([it[0] for it in items])
+        return {it[0]: (f"thesis {it[0]}", ["r"]) for it in items}
+
+    agent = RegionAgent("TEST", "dummy", {}, llm_batch_size=8)
+    with patch("src.agents.regions.load_universe", side_effect=Exception("dummy")), \
+         patch("src.agents.regions.is_openai_configured", return_value=True), \
+         patch("src.agents.regions.generate_theses_batch_openai", side_effect=fake_batch), \
+         patch("src.agents.regions.generate_thesis_and_risks_openai") as single:
+        result = agent.run(date(2025, 8, 15), top_n=20)
+
+    assert not single.called
+    tickers = [t for batch in calls for t in batch]
+    assert len(tickers) == len(set(tickers))
+    assert all(len(batch) <= 8 for batch in calls)
+    assert len(calls) == -(-len(tickers) // 8)
+    for c in result["candidates"] + result["growth_candidates"]:
+        assert c["thesis"] == f"thesis {c['ticker']}"
@@ -0,0 +1,47 @@
+import os
+import time
+
+from src.agents import llm_cache
+from src.agents.llm_cache import LLMCache, cached_completion, configure_llm_cache
+
+
+def test_cached_completion_hits_and_skips_empty(tmp_path):
+    configure_llm_cache(str(tmp_path))
+    calls = []
+
+    def fetch(text):
+        def _f():
+            calls.append(text)
+            return text
+        return _f
+
+    try:
+        assert cached_completion("openai", "m", "sys", "user", fetch("answer")) == "answer"
+        assert cached_completion("openai", "m", "sys", "user", fetch("other")) == "answer"  # キャッシュ
+        assert cached_completion("perplexity", "m", "sys", "user", fetch("pplx")) == "pplx"  # プロバイダ別
+        # 空応答（API失敗）は保存しない
+        assert cached_completion("openai", "m", "sys", "user2", fetch("")) == ""
+        assert cached_completion("openai", "m", "sys", "user2", fetch("late")) == "late"
+        assert calls == ["answer", "pplx", "", "late"]
+    finally:
+        configure_llm_cache(None)
+    assert llm_cache.get_llm_cache() is None
+
+
+def test_llm_cache_ttl_and_eviction(tmp_path):
+    cache = LLMCache(tmp_path, ttl=60.0, max_entries=10)
+    keys = [cache.key("p", "m", "s", str(i)) for i in range(10)]
+    for i, k in enumerate(keys):
+        cache.put(k, f"v{i}")
+        t = time.time() - 100 + i
+        os.utime(cache.path_for(k), (t, t))
+    assert cache.get(keys[0]) == "v0"  # 読み出しで最終アクセスが更新される
+
+    cache.put(cache.key("p", "m", "s", "new"), "new")  # 11件目 → 9件まで削除
+    remaining = [k for k in keys if cache.path_for(k).exists()]
+    assert len(remaining) == 8
+    assert keys[0] in remaining and keys[1] not in remaining and keys[2] not in remaining
+
+    expired = LLMCache(tmp_path, ttl=1e-9)
+    assert expired.get(keys[0]) is None
+    assert not cache.path_for(keys[0]).exists()
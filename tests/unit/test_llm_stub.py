@@ -0,0 +1,83 @@
+"""LLM スタブサーバー経由で Perplexity 経路を通すテスト"""
+
+import os
+
+import pytest
+import requests
+
+from src.agents import perplexity_agent
+from src.agents.llm_cache import configure_llm_cache
+from src.agents.llm_stub import StubLLMServer
+
+
+@pytest.fixture
+def stub_env(monkeypatch):
+    configure_llm_cache(None)
+
+    def _use(stub):
+        monkeypatch.setenv("PPLX_API_KEY", "stub")
+        monkeypatch.setenv("PPLX_BASE_URL", stub.base_url)
+
+    return _use
+
+
+def test_perplexity_agent_through_stub(stub_env):
+    features = {"fundamental": 0.7, "growth": 0.4}
+    with StubLLMServer(latency=0.01) as stub:
+        stub_env(stub)
+        thesis, risks = perplexity_agent.generate_thesis_and_risks("AAA", "Alpha", "US", features, {"mom_1m": 0.02})
+        out = perplexity_agent.generate_theses_batch([
+            ("BBB", "Beta", "US", features, {}),
+            ("CCC", "Gamma", "US", features, {}),
+        ])
+    assert thesis.startswith("AAA")
+    assert risks == ["需給悪化", "規制変更", "マクロ下振れ"]
+    assert out["BBB"][0].startswith("BBB") and out["CCC"][0].startswith("CCC")
+    assert stub.requests == 2  # 単一1回 + バッチ1回
+
+
+def test_stub_error_injection_and_openai_paths():
+    with StubLLMServer(error_rate=1.0) as stub:
+        resp = requests.post(f"{stub.base_url}/chat/completions", json={"messages": []}, timeout=5)
+        assert resp.status_code == 500
+        assert stub.errors == 1
+    with StubLLMServer(canned="固定応答") as stub:
+        body = {"input": [{"role": "user", "content": [{"type": "text", "text": "hi"}]}]}
+        resp = requests.post(f"{stub.base_url}/v1/responses", json=body, timeout=5)
+        assert resp.json()["output"][0]["content"][0]["text"] == "固定応答"
+        resp = requests.post(f"{stub.base_url}/v1/chat/completions", json={"messages": [{"role": "user", "content": "hi"}]}, timeout=5)
+        assert resp.json()["choices"][0]["message"]["content"] == "固定応答"
+    with pytest.raises(ValueError):
+        StubLLMServer(distribution="bogus")
+
+
+def test_perplexity_falls_back_when_stub_fails(stub_env):
+    with StubLLMServer(error_rate=1.0) as stub:
+        stub_env(stub)
+        thesis, risks = perplexity_agent.generate_thesis_and_risks("AAA", "Alpha", "US", {"fundamental": 0.5}, {})
+    assert "Alpha" in thesis
+    assert len(risks) == 3
+
+
+def test_bench_llm_times_full_run_and_restores_env(monkeypatch):
+    from typer.testing import CliRunner
+
+    import src.tools.backends as backends
+    from src.app import app
+
+    monkeypatch.setattr(backends, "_backend", None)
+    monkeypatch.delenv("PPLX_API_KEY", raising=False)
+    monkeypatch.delenv("MARKETDATA_BACKEND", raising=False)
+    monkeypatch.setenv("LLM_WORKERS", "3")
+    result = CliRunner().invoke(
+        app, ["bench-llm", "--regions", "JP", "--top-n", "3", "--latency-ms", "0", "--llm-workers", "2"],
+        catch_exceptions=False,
+    )
+    assert result.exit_code == 0
+    rows = [[c.strip() for c in line.split("│")[1:-1]] for line in result.output.splitlines() if line.startswith("│")]
+    latency, workers, _, requests_made, errors = rows[-1]
+    assert (latency, workers, errors) == ("0", "2", "0")
+    assert int(requests_made) > 0  # run 全体（投資仮説・レポート）が LLM スタブを通る
+    # 計測後は環境変数が元に戻る
+    assert os.environ["LLM_WORKERS"] == "3"
+    assert "PPLX_API_KEY" not in os.environ and "MARKETDATA_BACKEND" not in os.environ
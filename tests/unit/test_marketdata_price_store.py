@@ -0,0 +1,214 @@
+import builtins
+import types
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from src.tools.marketdata import MarketDataClient
+from src.tools.price_store import PriceStore
+
+
+def _panel(tickers, idx):
+    data = {}
+    for i, t in enumerate(tickers):
+        # 終値は日付だけで決まる（取得範囲が変わっても同じ日は同じ値）
+        data[(t, "Close")] = [100.0 + i + 0.01 * (d - pd.Timestamp("2020-01-01")).days for d in idx]
+        data[(t, "Volume")] = [1000.0 + k for k in range(len(idx))]
+    df = pd.DataFrame(data, index=idx)
+    df.columns = pd.MultiIndex.from_tuples(df.columns)
+    return df
+
+
+def _install_fake_yf(monkeypatch, download):
+    original_import = builtins.__import__
+
+    def fake_import(name, *args, **kwargs):
+        if name == "yfinance":
+            return types.SimpleNamespace(download=download)
+        return original_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", fake_import)
+
+
+def _last_bday():
+    return pd.Timestamp(datetime.utcnow().date()) - pd.offsets.BDay(1)
+
+
+def test_price_store_roundtrip_and_append(tmp_path):
+    store = PriceStore(tmp_path)
+    idx = pd.bdate_range("2025-01-01", periods=3)
+    store.save("7203.T", pd.Series([1.0, 2.0, 3.0], index=idx), pd.Series([10.0, 20.0, 30.0], index=idx))
+
+    new_idx = pd.bdate_range(idx[-1], periods=2)  # 先頭は既存日付と重複
+    close, volume = store.append("7203.T", pd.Series([3.5, 4.0], index=new_idx), pd.Series([35.0, 40.0], index=new_idx))
+
+    assert list(close.values) == [1.0, 2.0, 3.5, 4.0]
+    loaded_close, loaded_volume = store.load("7203.T")
+    assert loaded_close.index.equals(close.index)
+    assert list(loaded_volume.values) == [10.0, 20.0, 35.0, 40.0]
+    assert store.load("UNKNOWN") is None
+
+
+def test_get_prices_populates_store_then_fetches_only_delta(tmp_path, monkeypatch):
+    tickers = ["A", "B"]
+    end = _last_bday()
+    server = {"last": end - pd.offsets.BDay(3)}  # 配信側で取得可能な最終バー
+    calls = []
+
+    def fake_download(*args, **kwargs):
+        calls.append(kwargs)
+        stop = min(pd.Timestamp(kwargs["end"]) - pd.Timedelta(days=1), server["last"])
+        return _panel(tickers, pd.bdate_range(start=kwargs["start"], end=stop))
+
+    _install_fake_yf(monkeypatch, fake_download)
+    store = PriceStore(tmp_path)
+
+    prices, _ = MarketDataClient(store=store).get_prices(tickers, lookback_days=260)
+    assert set(prices.columns) == {"A", "B"}
+    assert len(calls) == 1 and "period" not in calls[0]
+    assert store.load("A")[0].index[-1] == server["last"]
+
+    # 別インスタンス（数日後の実行相当）: 差分のみ取得される
+    calls.clear()
+    last_stored = server["last"]
+    server["last"] = end
+    prices, volumes = MarketDataClient(store=store).get_prices(tickers, lookback_days=260)
+    assert len(calls) == 1
+    # 最終バーから取り直し、重なる1本で再調整の有無を確かめる
+    assert calls[0]["start"] == last_stored.date().isoformat()
+    assert prices.index[-1] == end
+    assert store.load("B")[0].index[-1] == end
+
+    # 最新化済みならダウンロードしない
+    calls.clear()
+    MarketDataClient(store=store).get_prices(tickers, lookback_days=260)
+    assert calls == []
+
+
+def test_get_prices_refetches_full_history_when_adjusted(tmp_path, monkeypatch):
+    end = _last_bday()
+    server = {"last": end - pd.offsets.BDay(3), "factor": 1.0}
+    calls = []
+
+    def fake_download(*args, **kwargs):
+        calls.append(kwargs)
+        stop = min(pd.Timestamp(kwargs["end"]) - pd.Timedelta(days=1), server["last"])
+        panel = _panel(["A"], pd.bdate_range(start=kwargs["start"], end=stop))
+        panel[("A", "Close")] *= server["factor"]
+        return panel
+
+    _install_fake_yf(monkeypatch, fake_download)
+    store = PriceStore(tmp_path)
+    MarketDataClient(store=store).get_prices(["A"], lookback_days=260)
+
+    # 分割で配信側の過去分が全て再調整された
+    calls.clear()
+    server["last"], server["factor"] = end, 0.5
+    prices, _ = MarketDataClient(store=store).get_prices(["A"], lookback_days=260)
+    assert len(calls) == 2
+    stored = store.load("A")[0]
+    assert stored.index[-1] == end
+    expected = _panel(["A"], stored.index)[("A", "Close")] * 0.5
+    assert (stored.values == expected.values).all()
+    assert prices["A"].pct_change().abs().max() < 0.01
+
+
+def test_get_prices_checks_head_of_short_history_once(tmp_path, monkeypatch):
+    end = _last_bday()
+    listed = end - pd.offsets.BDay(20)  # lookback より後に上場した銘柄
+    calls = []
+
+    def fake_download(*args, **kwargs):
+        calls.append(kwargs)
+        start = max(pd.Timestamp(kwargs["start"]), listed)
+        stop = min(pd.Timestamp(kwargs["end"]) - pd.Timedelta(days=1), end)
+        return _panel(["A"], pd.bdate_range(start=start, end=stop))
+
+    _install_fake_yf(monkeypatch, fake_download)
+    store = PriceStore(tmp_path)
+    MarketDataClient(store=store).get_prices(["A"], lookback_days=260)
+    assert len(calls) == 1
+
+    # 上場日より前は取得済みとして記録されているので取り直さない
+    calls.clear()
+    MarketDataClient(store=store).get_prices(["A"], lookback_days=260)
+    assert calls == []
+
+
+def test_get_prices_fills_head_for_slightly_earlier_as_of(tmp_path, monkeypatch):
+    def fake_download(*args, **kwargs):
+        idx = pd.bdate_range(start=kwargs["start"], end=pd.Timestamp(kwargs["end"]) - pd.Timedelta(days=1))
+        return _panel(["A"], idx)
+
+    _install_fake_yf(monkeypatch, fake_download)
+    store = PriceStore(tmp_path)
+    MarketDataClient(store=store).get_prices(["A"], lookback_days=260, as_of=date(2025, 8, 12))
+
+    # 1週間前の基準日でも、保存分より前の数日を取得して窓を揃える
+    as_of = date(2025, 8, 5)
+    stored, _ = MarketDataClient(store=store).get_prices(["A"], lookback_days=260, as_of=as_of)
+    fresh, _ = MarketDataClient().get_prices(["A"], lookback_days=260, as_of=as_of)
+    assert stored.index.equals(fresh.index)
+
+
+def test_price_store_save_is_safe_across_threads(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    store = PriceStore(tmp_path)
+    idx = pd.bdate_range("2025-01-01", periods=200)
+
+    def write(k):
+        store.save("X", pd.Series(float(k), index=idx), pd.Series(1.0, index=idx))
+
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        list(ex.map(write, range(64)))
+    close, _ = store.load("X")
+    assert len(close) == 200
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_get_prices_fetches_exact_window_for_as_of(monkeypatch):
+    calls = []
+
+    def fake_download(*args, **kwargs):
+        calls.append(kwargs)
+        idx = pd.bdate_range(start=kwargs["start"], end=pd.Timestamp(kwargs["end"]) - pd.Timedelta(days=1))
+        return _panel(kwargs["tickers"], idx)
+
+    _install_fake_yf(monkeypatch, fake_download)
+    as_of = date(2025, 6, 30)
+    prices, volumes = MarketDataClient().get_prices(["A", "B"], lookback_days=260, as_of=as_of)
+
+    # period ではなく [as_of - lookback_days, as_of] を明示して取得する
+    assert calls[0]["start"] == (as_of - timedelta(days=260)).isoformat()
+    assert calls[0]["end"] == (as_of + timedelta(days=1)).isoformat()
+    assert "period" not in calls[0]
+    assert prices.index[-1].date() == as_of
+    assert prices.index[0].date() >= as_of - timedelta(days=260)
+    assert volumes.shape == prices.shape
+
+
+def test_get_prices_reuses_per_ticker_cache_for_subsets(monkeypatch):
+    end = _last_bday()
+    idx = pd.bdate_range(end=end, periods=30)
+    requested = []
+
+    def fake_download(*args, **kwargs):
+        tickers = kwargs["tickers"]
+        requested.append(list(tickers))
+        return _panel(tickers, idx)
+
+    _install_fake_yf(monkeypatch, fake_download)
+    cli = MarketDataClient()
+
+    cli.get_prices(["A", "B", "C"], lookback_days=20)
+    # ユニバースの部分集合はキャッシュから組み立てられる
+    prices, volumes = cli.get_prices(["C", "A"], lookback_days=20)
+    assert list(prices.columns) == ["C", "A"]
+    assert list(volumes.columns) == ["C", "A"]
+    assert requested == [["A", "B", "C"]]
+
+    # 未取得のティッカーのみダウンロードされる
+    prices, _ = cli.get_prices(["A", "D"], lookback_days=20)
+    assert requested[-1] == ["D"]
+    assert list(prices.columns) == ["A", "D"]
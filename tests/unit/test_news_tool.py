@@ -5,7 +5,7 @@ from src.tools.news import NewsClient
 def test_news_returns_list_of_items(monkeypatch):
     client = NewsClient()
 
-    def mock_fetch(tickers, since):
+    def mock_fetch(tickers, since, cancel=None):
         return [
             {"ticker": tickers[0], "title": "Earnings beat", "url": "https://example.com/a", "date": str(since)},
             {"ticker": tickers[0], "title": "Guide raised", "url": "https://example.com/b", "date": str(since + timedelta(days=1))},
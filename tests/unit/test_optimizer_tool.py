@@ -16,3 +16,141 @@ def test_optimize_mean_variance_bounds_and_sum():
     assert (w >= -1e-9).all() and (w <= 0.1 + 1e-9).all()
     assert np.sum(w) <= 1.0 + 1e-6
 
+
+def test_optimize_mean_variance_matches_finite_difference_solution():
+    from scipy.optimize import minimize
+
+    rng = np.random.default_rng(0)
+    n = 30
+    tickers = [f"T{i}" for i in range(n)]
+    regions = [["US", "JP", "EU"][i % 3] for i in range(n)]
+    x = rng.normal(0, 0.01, (200, n))
+    cov = pd.DataFrame(np.cov(x.T) * 252, index=tickers, columns=tickers)
+    mu = pd.Series(rng.normal(0.08, 0.05, n), index=tickers)
+    limits = {"US": 0.5, "JP": 0.3, "EU": 0.3}
+    cfg = MVConfig(region_limits=limits, risk_aversion=2.0, target_vol=0.15)
+
+    w = optimize_mean_variance(tickers, regions, mu, cov, cfg)
+
+    # 勾配なし（差分近似）の SLSQP で同じ問題を解いた参照解と目的関数値が一致する
+    s, m = cov.values, mu.values
+    idx = {r: [i for i, rr in enumerate(regions) if rr == r] for r in limits}
+    cons = [
+        {"type": "ineq", "fun": lambda v: 1.0 - v.sum()},
+        {"type": "ineq", "fun": lambda v: v.sum() - 0.9},
+        {"type": "ineq", "fun": lambda v: 0.15 ** 2 - v @ s @ v},
+    ] + [{"type": "ineq", "fun": lambda v, i=i, c=c: c - v[i].sum()} for r, i in idx.items() for c in [limits[r]]]
+    ref = minimize(lambda v: v @ s @ v - 2.0 * (m @ v), np.full(n, 1.0 / n), method="SLSQP",
+                   bounds=[(0.0, 0.07)] * n, constraints=cons, options={"maxiter": 500}).x
+    obj = lambda v: v @ s @ v - 2.0 * (m @ v)
+    assert obj(w) <= obj(ref) + 1e-6
+    assert w @ s @ w <= 0.15 ** 2 + 1e-8
+    for r, i in idx.items():
+        assert w[i].sum() <= limits[r] + 1e-8
+
+
+def _random_problem(n, seed=0):
+    rng = np.random.default_rng(seed)
+    tickers = [f"T{i}" for i in range(n)]
+    regions = [["US", "JP", "EU", "CN"][i % 4] for i in range(n)]
+    f = rng.normal(0, 0.01, (300, 3))
+    x = f @ rng.normal(1, 0.3, (3, n)) / 3 + rng.normal(0, 0.01, (300, n))
+    cov = pd.DataFrame(np.cov(x.T) * 252, index=tickers, columns=tickers)
+    mu = pd.Series(rng.normal(0.08, 0.05, n), index=tickers)
+    return tickers, regions, mu, cov
+
+
+def test_admm_solver_matches_slsqp():
+    from src.tools.optimizer_tool import solve_mean_variance
+
+    tickers, regions, mu, cov = _random_problem(60)
+    limits = {"US": 0.5, "JP": 0.3, "EU": 0.3, "CN": 0.2}
+    for kw in ({}, {"risk_aversion": 2.0}, {"target": "max_return"}, {"risk_aversion": 5.0, "target_vol": 0.07}):
+        ref = solve_mean_variance(tickers, regions, mu, cov, MVConfig(region_limits=limits, **kw))
+        res = solve_mean_variance(tickers, regions, mu, cov, MVConfig(region_limits=limits, solver="admm", **kw))
+        assert res.solver == "admm" and res.success and res.status == "solved"
+        assert res.iterations > 0
+        assert res.objective <= ref.objective + 1e-6
+        w = res.weights
+        assert (w >= 0).all() and (w <= 0.07 + 1e-9).all()
+        assert 0.9 - 1e-8 <= w.sum() <= 1.0 + 1e-8
+        if "target_vol" in kw:
+            assert w @ cov.values @ w <= 0.07 ** 2 * (1 + 1e-5)
+
+
+def test_admm_falls_back_to_slsqp_when_vol_cap_infeasible():
+    from src.tools.optimizer_tool import solve_mean_variance
+
+    tickers, regions, mu, cov = _random_problem(20)
+    cfg = MVConfig(region_limits={"US": 0.5, "JP": 0.5, "EU": 0.5, "CN": 0.5}, position_limit=0.2,
+                   risk_aversion=1.0, target_vol=0.001, solver="admm")
+    res = solve_mean_variance(tickers, regions, mu, cov, cfg)
+    assert res.solver == "slsqp"
+    assert res.status.startswith("admm vol_cap_infeasible -> slsqp")
+    assert not res.success
+
+
+def test_mv_config_rejects_unknown_solver():
+    import pytest
+
+    with pytest.raises(ValueError):
+        MVConfig(solver="cvx")
+
+
+def test_linear_constraints_stack_budget_region_and_group_caps():
+    from src.tools.optimizer_tool import build_linear_constraints, solve_mean_variance
+
+    tickers, regions, mu, cov = _random_problem(40)
+    sectors = [["Tech", "Fin", "Energy"][i % 3] for i in range(40)]
+    cfg = MVConfig(region_limits={"US": 0.5, "JP": 0.3}, group_limits={"sector": {"Tech": 0.2}},
+                   position_limit=0.1, risk_aversion=3.0)
+    lin = build_linear_constraints(regions, cfg, {"sector": sectors})
+    assert lin.labels[0] == "invest" and "sector:Tech" in lin.labels
+    assert lin.A.shape == (1 + 4 + 3, 40)
+    # 片側形式は上限4+3行・投資上下限2行
+    assert lin.G.shape == (9, 40)
+
+    tech = np.array([s == "Tech" for s in sectors])
+    for solver in ("slsqp", "admm"):
+        res = solve_mean_variance(tickers, regions, mu, cov, MVConfig(**{**cfg.__dict__, "solver": solver}),
+                                  groups={"sector": sectors})
+        assert res.success
+        assert res.weights[tech].sum() <= 0.2 + 1e-8
+        assert (lin.slack(res.weights) >= -1e-8).all()
+
+
+def test_optimize_frontier_matches_independent_solves():
+    from src.tools.optimizer_tool import optimize_frontier, solve_mean_variance
+
+    tickers, regions, mu, cov = _random_problem(40)
+    cfg = MVConfig(region_limits={"US": 0.5, "JP": 0.3, "EU": 0.3, "CN": 0.2})
+    points = [(5.0, None), (0.0, None), (1.0, 0.12), (2.0, None), (5.0, 0.1)]
+    for workers in (1, 2):
+        frontier = optimize_frontier(tickers, regions, mu, cov, cfg, points, workers=workers)
+        assert [(p.risk_aversion, p.target_vol) for p in frontier] == points
+        for pt, (ra, tv) in zip(frontier, points):
+            ref = solve_mean_variance(tickers, regions, mu, cov, MVConfig(**{**cfg.__dict__, "risk_aversion": ra, "target_vol": tv}))
+            assert pt.success
+            # 目的関数値（a·分散 - b·期待リターン）が独立に解いた場合と一致する
+            b = ra if ra > 0 else 0.0
+            assert pt.volatility ** 2 - b * pt.expected_return <= ref.objective + 1e-6
+    # リスク許容度を上げると期待リターンは下がらない
+    free = sorted((p for p in frontier if p.target_vol is None), key=lambda p: p.risk_aversion)
+    assert all(a.expected_return <= b.expected_return + 1e-8 for a, b in zip(free, free[1:]))
+
+
+def test_frontier_builds_dense_factor_covariance_once(monkeypatch):
+    from src.tools.covariance import FactorCovariance, factor_covariance
+    from src.tools.optimizer_tool import optimize_frontier
+
+    tickers, regions, mu, _ = _random_problem(30)
+    rets = pd.DataFrame(np.random.default_rng(3).normal(0, 0.01, (200, 30)), columns=tickers)
+    risk = factor_covariance(rets, n_factors=3)
+    calls = []
+    original = FactorCovariance.dense
+    monkeypatch.setattr(FactorCovariance, "dense", lambda self: calls.append(1) or original(self))
+
+    cfg = MVConfig(region_limits={"US": 0.5, "JP": 0.5, "EU": 0.5, "CN": 0.5}, solver="admm")
+    frontier = optimize_frontier(tickers, regions, mu, risk, cfg, [(0.0, None), (1.0, None), (2.0, 0.15), (5.0, None)])
+    assert all(p.success for p in frontier)
+    assert len(calls) == 1
@@ -0,0 +1,91 @@
+import json
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from src.agents.optimizer import map_previous_weights, optimize_portfolio
+from src.io.loaders import find_previous_portfolio, load_portfolio_weights
+from src.tools.optimizer_tool import MVConfig, solve_mean_variance
+
+
+def _problem(n, seed=0):
+    rng = np.random.default_rng(seed)
+    tickers = [f"T{i}" for i in range(n)]
+    regions = [["US", "JP", "EU"][i % 3] for i in range(n)]
+    x = rng.normal(0, 0.01, (300, n))
+    cov = pd.DataFrame(np.cov(x.T) * 252, index=tickers, columns=tickers)
+    mu = pd.Series(rng.normal(0.08, 0.05, n), index=tickers)
+    return tickers, regions, mu, cov
+
+
+def test_warm_start_from_previous_optimum_needs_fewer_iterations():
+    tickers, regions, mu, cov = _problem(60)
+    cfg = MVConfig(region_limits={"US": 0.5, "JP": 0.4, "EU": 0.4}, risk_aversion=2.0)
+    cold = solve_mean_variance(tickers, regions, mu, cov, cfg)
+    # 翌週: 期待リターンが少しだけ変わった問題を前回解から解く
+    mu2 = mu + np.random.default_rng(1).normal(0, 0.002, len(mu))
+    ref = solve_mean_variance(tickers, regions, mu2, cov, cfg)
+    warm = solve_mean_variance(tickers, regions, mu2, cov, cfg, x0=cold.weights)
+    assert warm.success
+    assert warm.iterations < ref.iterations
+    assert abs(warm.objective - ref.objective) < 1e-6
+
+
+def test_turnover_penalty_keeps_weights_close_to_previous():
+    tickers, regions, mu, cov = _problem(30)
+    limits = {"US": 0.5, "JP": 0.5, "EU": 0.5}
+    prev = np.full(30, 0.95 / 30)
+    free = solve_mean_variance(tickers, regions, mu, cov, MVConfig(region_limits=limits, risk_aversion=1.0))
+    for solver in ("slsqp", "admm"):
+        cfg = MVConfig(region_limits=limits, risk_aversion=1.0, turnover_penalty=5.0, solver=solver)
+        res = solve_mean_variance(tickers, regions, mu, cov, cfg, x0=prev, prev_weights=prev)
+        assert res.success
+        assert np.abs(res.weights - prev).sum() < np.abs(free.weights - prev).sum()
+
+
+def test_map_previous_weights_handles_new_and_dropped_tickers():
+    previous = {"A": 0.3, "B": 0.5, "Z": 0.15}  # Z は今回の候補から外れた
+    x0, held = map_previous_weights(["A", "B", "C", "D"], previous, 0.4, 0.9, 1.0)
+    assert held.tolist() == [0.3, 0.5, 0.0, 0.0]
+    # B は上限 0.4 でクリップ、残り 0.95 - 0.7 を新規 C, D で等分
+    assert np.allclose(x0, [0.3, 0.4, 0.125, 0.125])
+
+
+def test_optimize_portfolio_records_warm_start(tmp_path):
+    candidates = [
+        {"region": r, "candidates": [{"ticker": f"{r}{i}"} for i in range(4)]} for r in ("US", "JP")
+    ]
+    prev = {"weights": [{"ticker": "US0", "region": "US", "weight": 0.5},
+                        {"ticker": "OLD", "region": "JP", "weight": 0.45}]}
+    out = optimize_portfolio(
+        candidates,
+        {"region_limits": {"US": 0.6, "JP": 0.6}, "position_limit": 0.3,
+         "prev_portfolio": prev, "turnover_penalty": 1.0},
+    )
+    assert "warm_start=prev" in out["notes"] and "turnover_penalty=1.0" in out["notes"]
+
+
+def test_find_previous_portfolio_picks_latest_before_date(tmp_path):
+    for d in ("20250801", "20250808", "20250815"):
+        (tmp_path / f"portfolio_{d}.json").write_text(json.dumps({"weights": [{"ticker": "A", "weight": 0.1}]}))
+    (tmp_path / "portfolio_latest.json").write_text("{}")
+    assert find_previous_portfolio(tmp_path, date(2025, 8, 15)).name == "portfolio_20250808.json"
+    assert find_previous_portfolio(tmp_path, date(2025, 8, 1)) is None
+    assert load_portfolio_weights(tmp_path / "portfolio_20250801.json") == {"A": 0.1}
+
+
+def test_failed_solve_projects_warm_start_onto_constraints():
+    tickers, regions, mu, cov = _problem(30)
+    cfg = MVConfig(region_limits={"US": 0.3, "JP": 0.4, "EU": 0.4}, position_limit=0.05, risk_aversion=1.0, max_iter=1)
+    # 前回は US に集中（今回の地域上限・銘柄上限を超える）
+    x0 = np.array([0.09 if r == "US" else 0.0 for r in regions])
+    res = solve_mean_variance(tickers, regions, mu, cov, cfg, x0=x0)
+    assert not res.success
+    assert res.status.endswith("-> projected initial weights")
+    w = res.weights
+    tol = 1e-6
+    assert w.min() >= -tol and w.max() <= 0.05 + tol
+    us = sum(wi for wi, r in zip(w, regions) if r == "US")
+    assert us <= 0.3 + tol
+    assert 0.9 - tol <= w.sum() <= 1.0 + tol
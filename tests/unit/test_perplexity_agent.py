@@ -20,7 +20,7 @@ def test_is_perplexity_configured(monkeypatch):
     assert is_perplexity_configured()
 
 
-@patch("src.agents.perplexity_agent.requests.post")
+@patch("src.agents.perplexity_agent.requests.Session.post")
 def test_generate_thesis_and_risks(mock_post, monkeypatch):
     monkeypatch.setenv("PPLX_API_KEY", "dummy")
     mock_resp = MagicMock()
@@ -51,7 +51,7 @@ def test_region_agent_uses_perplexity(
     assert result["candidates"][0]["thesis"] == "Test thesis"
 
 
-@patch("src.agents.perplexity_agent.requests.post")
+@patch("src.agents.perplexity_agent.requests.Session.post")
 def test_generate_thesis_and_risks_json_parsing(mock_post, monkeypatch):
     """JSONで返ってきたときに堅牢にパースできること。"""
     monkeypatch.setenv("PPLX_API_KEY", "dummy")
@@ -73,7 +73,7 @@ def test_generate_thesis_and_risks_json_parsing(mock_post, monkeypatch):
     assert risks[:2] == ["需給悪化", "規制"]
 
 
-@patch("src.agents.perplexity_agent.requests.post")
+@patch("src.agents.perplexity_agent.requests.Session.post")
 def test_perplexity_payload_has_max_tokens_and_longer_instruction(mock_post, monkeypatch):
     monkeypatch.setenv("PPLX_API_KEY", "dummy")
 
@@ -100,3 +100,26 @@ def test_perplexity_payload_has_max_tokens_and_longer_instruction(mock_post, mon
     # systemに長めの指示（2-4文程度/過度に短すぎない）が含まれていることを緩く確認
     system_msg = captured_payload.get("messages", [{}])[0].get("content", "")
     assert "過度に短すぎない" in system_msg
+
+
+def test_perplexity_session_is_shared_and_pooled(monkeypatch):
+    from src.agents import perplexity_agent
+
+    monkeypatch.setenv("LLM_HTTP_POOL_SIZE", "32")
+    monkeypatch.setattr(perplexity_agent, "_session", None)
+    session = perplexity_agent._get_session()
+    assert perplexity_agent._get_session() is session
+    assert session.get_adapter(perplexity_agent.API_URL)._pool_maxsize == 32
+
+
+def test_perplexity_prompt_uses_shared_ticker_lines():
+    from src.agents import perplexity_agent
+    from src.agents.llm_batch import ticker_lines
+
+    args = ("TEST", "Test Corp", "US", {"fundamental": 0.71234, "growth": 0.6}, {"mom_1m": 0.05, "rsi": 61.23456})
+    prompts = []
+    with patch.object(perplexity_agent, "_chat", side_effect=lambda system, user: prompts.append(user) or ""):
+        generate_thesis_and_risks(*args)
+
+    # OpenAI と同じ整形（同じ丸め）で指標を渡す
+    assert prompts[0].startswith("\n".join(ticker_lines(*args)) + "\n")
@@ -0,0 +1,128 @@
+import threading
+import time
+from datetime import date
+
+from src.tools.fundamentals import FundamentalsClient
+from src.tools.marketdata import MarketDataClient
+from src.tools.news import NewsClient
+from src.tools.ratelimit import (
+    AdaptiveRateLimiter,
+    RateLimiter,
+    configure_shared_limiter,
+    get_shared_limiter,
+)
+
+
+def test_token_bucket_paces_requests():
+    limiter = RateLimiter(rate=50.0, burst=1, max_in_flight=4)
+    start = time.monotonic()
+    for _ in range(6):
+        with limiter.acquire():
+            pass
+    # 1件目はバーストで即時、残り5件は 1/50 秒間隔
+    assert time.monotonic() - start >= 5 / 50.0 * 0.9
+
+
+def test_max_in_flight_is_enforced():
+    limiter = RateLimiter(rate=1000.0, burst=100, max_in_flight=2)
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal active, peak
+        with limiter.acquire():
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak == 2
+
+
+def test_clients_share_process_wide_limiter():
+    shared = configure_shared_limiter(rate=10.0, max_in_flight=3)
+    assert get_shared_limiter() is shared
+    assert MarketDataClient().limiter is shared
+    assert FundamentalsClient().limiter is shared
+    assert NewsClient().limiter is shared
+
+    own = RateLimiter()
+    assert MarketDataClient(limiter=own).limiter is own
+    configure_shared_limiter()
+
+
+def test_adaptive_limiter_increases_on_success_and_backs_off_on_failure():
+    limiter = AdaptiveRateLimiter(rate=2.0, max_in_flight=8, max_rate=3.0, increase=0.5, cooldown=0.0)
+    start_concurrency = limiter.concurrency
+    for _ in range(20):
+        limiter.record_success()
+    assert limiter.stats()["rate"] == 3.0  # max_rate で頭打ち
+    assert limiter.concurrency > start_concurrency
+
+    before = limiter.concurrency
+    limiter.record_failure()
+    stats = limiter.stats()
+    assert stats["rate"] == 1.5
+    assert limiter.concurrency == max(1, before // 2)
+    assert stats["failures"] == 1 and stats["successes"] == 20
+
+
+def test_adaptive_limiter_decreases_at_most_once_per_cooldown():
+    limiter = AdaptiveRateLimiter(rate=4.0, min_rate=0.5, cooldown=60.0)
+    for _ in range(5):
+        limiter.record_failure()
+    assert limiter.rate == 2.0
+    assert limiter.failures == 5
+
+
+def test_retry_failures_are_reported_to_shared_controller(monkeypatch):
+    import builtins
+    import types
+
+    limiter = AdaptiveRateLimiter(rate=100.0, cooldown=0.0)
+    responses = {"news": None}
+
+    def fake_ticker(symbol):
+        if responses["news"] is None:
+            raise ConnectionError("HTTP 429")
+        return types.SimpleNamespace(news=responses["news"])
+
+    original_import = builtins.__import__
+
+    def fake_import(name, *args, **kwargs):
+        if name == "yfinance":
+            return types.SimpleNamespace(Ticker=fake_ticker)
+        return original_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", fake_import)
+    client = NewsClient(retry_attempts=2, limiter=limiter)
+    assert client._fetch_single_ticker_with_retry("AAPL", date(2025, 1, 1)) == []
+    assert limiter.failures == 2
+    assert limiter.rate < 100.0
+
+    # ニュースが無いだけの銘柄は失敗として数えない（共有 limiter を減速させない）
+    responses["news"] = []
+    rate = limiter.rate
+    assert client._fetch_single_ticker_with_retry("XYZ", date(2025, 1, 1)) == []
+    assert limiter.failures == 2
+    assert limiter.rate >= rate
+
+
+def test_adaptive_limiter_tolerates_sporadic_failures():
+    limiter = AdaptiveRateLimiter(rate=4.0, cooldown=0.0, tolerance=0.1)
+    for _ in range(50):
+        limiter.record_success()
+    rate = limiter.rate
+    limiter.record_failure()
+    assert limiter.rate == rate  # 散発的な失敗では減速しない
+    for _ in range(5):
+        limiter.record_failure()
+    assert limiter.rate < rate  # 失敗が続けば減速する
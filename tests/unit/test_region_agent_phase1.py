@@ -76,7 +76,7 @@ def test_etf_fundamentals_are_skipped():
 	assert _is_etf("MSFT") == False
 	
 	# ETFを含む銘柄リストでテスト
-	client = FundamentalsClient(max_workers=1, request_interval=0.1)
+	client = FundamentalsClient(max_workers=1)
 	etf_tickers = ["SPY", "QQQ", "AAPL"]
 	
 	# ETFはスキップされることを確認（実際のAPI呼び出しは行わない）
@@ -0,0 +1,38 @@
+"""RegionAgent の投資仮説生成（重複排除・並行実行）のテスト"""
+
+import threading
+import time
+from datetime import date
+from unittest.mock import patch
+
+from src.agents.regions import RegionAgent
+
+
+def test_theses_are_generated_once_per_ticker_concurrently():
+    calls: list[str] = []
+    lock = threading.Lock()
+    active = {"now": 0, "peak": 0}
+
+    def fake_generate(ticker, name, region, features, technical_indicators):
+        with lock:
+            calls.append(ticker)
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.02)
+        with lock:
+            active["now"] -= 1
+        return f"thesis {ticker}", ["risk"]
+
+    agent = RegionAgent("TEST", "dummy", {}, llm_workers=4)
+    with patch("src.agents.regions.load_universe", side_effect=Exception("dummy")), \
+         patch("src.agents.regions.is_openai_configured", return_value=True), \
+         patch("src.agents.regions.generate_thesis_and_risks_openai", side_effect=fake_generate):
+        result = agent.run(date(2025, 8, 15), top_n=20)
+
+    tickers = {c["ticker"] for c in result["candidates"]} | {c["ticker"] for c in result["growth_candidates"]}
+    # 総合上位と成長上位で重複する銘柄も LLM 呼び出しは1回
+    assert sorted(calls) == sorted(tickers)
+    assert len(calls) < len(result["candidates"]) + len(result["growth_candidates"])
+    assert 1 < active["peak"] <= 4
+    for c in result["candidates"] + result["growth_candidates"]:
+        assert c["thesis"] == f"thesis {c['ticker']}"
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+from src.agents.optimizer import optimize_portfolio
+from src.tools.covariance import ewma_covariance
+from src.tools.return_stats import RollingReturnStats, sync_return_stats
+from src.tools.risk_tool import compute_returns, risk_metrics
+
+
+def _prices(n=5, days=300, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2024-01-01", periods=days)
+    cols = [f"T{i}" for i in range(n)]
+    return pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (days, n)), axis=0)), index=idx, columns=cols)
+
+
+def test_incremental_updates_match_full_recomputation():
+    px = _prices(6)
+    px.iloc[40:50, 1] = np.nan  # 欠損（ペアワイズ）
+    px.iloc[:150, 5] = np.nan  # 途中から上場
+    window = 100
+    stats = RollingReturnStats.from_prices(px.iloc[:120, :5], window, halflife=20)
+    # 日次（重なりのある短いパネル）で追加し、新しい銘柄 T5 も途中で加わる
+    for end in list(range(121, 300, 5)) + [300]:
+        stats.update(px.iloc[end - 20:end])
+
+    ref = compute_returns(px, method="pct").iloc[-window:]
+    assert stats.tickers == list(px.columns) and len(stats.dates) == window
+    assert np.allclose(stats.mean().values, ref.mean().values * 252)
+    assert np.allclose(stats.cov().values, ref.cov().values * 252, atol=1e-14)
+    assert np.allclose(stats.corr().values, ref.corr().values, atol=1e-12)
+    assert np.allclose(stats.vol().values, ref.std().values * np.sqrt(252))
+    full = ["T0", "T2", "T3"]
+    assert np.allclose(stats.cov(full, method="ewma").values, ewma_covariance(ref[full], halflife=20).matrix)
+
+
+def test_tickers_without_data_in_window_are_dropped():
+    px = _prices(3)
+    stats = RollingReturnStats.from_prices(px.iloc[:100], window=30)
+    stats.update(px.iloc[99:160, :2])  # T2 はユニバースから外れた
+    assert stats.tickers == ["T0", "T1"]
+
+
+def test_sync_persists_and_rebuilds(tmp_path):
+    px = _prices(4)
+    path = tmp_path / "stats.npz"
+    sync_return_stats(path, px.iloc[:200], window=60)
+    stats = sync_return_stats(path, px.iloc[150:210], window=60)
+    assert stats.last_date == np.datetime64(px.index[209].date())
+    loaded = RollingReturnStats.load(path)
+    assert np.allclose(loaded.cov().values, stats.cov().values)
+
+    # 過去日付の実行は保存を上書きしない
+    past = sync_return_stats(path, px.iloc[:150], window=60)
+    assert past.last_date == np.datetime64(px.index[149].date())
+    assert RollingReturnStats.load(path).last_date == stats.last_date
+    # 重ならないパネル・窓の変更では作り直す
+    fresh = sync_return_stats(path, px.iloc[250:], window=40)
+    assert fresh.window == 40 and len(fresh.dates) == 40
+
+
+def test_optimizer_and_risk_read_from_stats():
+    px = _prices(8)
+    stats = RollingReturnStats.from_prices(px, window=400)
+    candidates = [{"region": "US", "candidates": [{"ticker": t} for t in px.columns]}]
+    constraints = {"region_limits": {"US": 1.0}, "position_limit": 0.2, "risk_aversion": 1.0}
+    plain = optimize_portfolio(candidates, constraints, prices_df=px)
+    fast = optimize_portfolio(candidates, constraints, prices_df=px, return_stats=stats)
+    assert [w["weight"] for w in fast["weights"]] == [w["weight"] for w in plain["weights"]]
+
+    rets = compute_returns(px, method="pct")
+    a, b = risk_metrics(rets), risk_metrics(rets, return_stats=stats)
+    for key in ("covariance", "correlation"):
+        assert np.allclose(pd.DataFrame(a[key]).values, pd.DataFrame(b[key]).values)
+    assert np.allclose(pd.Series(a["volatility"]).values, pd.Series(b["volatility"]).values)
+
+
+def test_returns_panel_uses_stats_only_for_matching_rows():
+    from src.tools.risk_tool import ReturnsPanel
+
+    px = _prices(4, days=120)
+    other = _prices(4, days=120, seed=1)  # 同じ日付・銘柄で値の違う統計
+    panel_px = px.iloc[-60:]
+    expected = compute_returns(panel_px, method="pct").mean() * 252
+
+    # 窓が価格パネルより長い（過去の実行で溜まった）統計は使わない
+    longer = RollingReturnStats.from_prices(other, window=100)
+    assert np.allclose(ReturnsPanel.from_prices(panel_px, return_stats=longer).mean().values, expected.values)
+
+    # 窓の日付がリターンの行と一致すれば統計から読む
+    same_rows = RollingReturnStats.from_prices(other.iloc[-60:], window=100)
+    used = ReturnsPanel.from_prices(panel_px, return_stats=same_rows).mean()
+    assert np.allclose(used.values, same_rows.mean().values)
+
+
+def test_sync_keeps_window_aligned_with_panel_across_runs(tmp_path):
+    from src.tools.risk_tool import ReturnsPanel
+
+    px = _prices(6, days=330)
+    px.iloc[200] = np.nan  # 全地域の休場日（統合パネルで全欠損の行）
+    px.iloc[:230, 5] = np.nan  # 途中から上場
+    path = tmp_path / "stats.npz"
+    # 週次の実行: 基準日から一定の暦日数をさかのぼったパネル（窓の上限よりリターンの行が少ない）
+    for end in range(300, 331, 5):
+        as_of = px.index[end - 1]
+        panel_px = px.loc[as_of - pd.Timedelta(days=260):as_of]
+        stats = sync_return_stats(path, panel_px, window=252)
+        panel = ReturnsPanel.from_prices(panel_px, return_stats=stats)
+        assert panel._stats_for(panel.tickers) is stats
+        assert stats.updates > 0 or end == 300  # 2回目以降は作り直さず逐次更新
+        assert np.allclose(panel.mean().values, panel.returns.mean().values * 252)
+        assert np.allclose(panel.cov().values, panel.returns.cov().values * 252, atol=1e-14, equal_nan=True)
+
+
+def test_run_output_does_not_depend_on_stats_history(tmp_path, monkeypatch):
+    import json
+
+    from typer.testing import CliRunner
+
+    import src.tools.backends as backends
+    import src.tools.ratelimit as ratelimit
+    from src.app import app
+
+    monkeypatch.setattr(backends, "_backend", None)
+    monkeypatch.setattr(ratelimit, "_shared_limiter", None)
+    for key in ("OPENAI_API_KEY", "PPLX_API_KEY", "RETURN_STATS_PATH"):
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setenv("MARKETDATA_BACKEND", "local")
+    monkeypatch.setenv("PRICE_STORE_DIR", str(tmp_path / "prices"))
+    monkeypatch.setenv("LLM_CACHE_DIR", "")
+    for key in ("DATA_RATE_LIMIT", "DATA_RATE_MAX", "DATA_MAX_IN_FLIGHT"):
+        monkeypatch.setenv(key, "1000")
+
+    def run(outdir, run_date="2025-08-12"):
+        result = CliRunner().invoke(
+            app, ["run", "--regions", "JP,US,EU", "--date", run_date, "--output", str(tmp_path / outdir), "--top-n", "40"],
+            catch_exceptions=False,
+        )
+        assert result.exit_code == 0
+        return json.loads((tmp_path / outdir / f"portfolio_{run_date.replace('-', '')}.json").read_text())["weights"]
+
+    default = run("default")
+    # 以前の実行の統計ファイルを逐次更新して使っても結果は変わらない
+    stats_path = tmp_path / "return_stats.npz"
+    monkeypatch.setenv("RETURN_STATS_PATH", str(stats_path))
+    run("seed", run_date="2025-08-05")
+    seeded = RollingReturnStats.load(stats_path)
+    with_stats = run("with_stats")
+    stats = RollingReturnStats.load(stats_path)
+    # 窓は1週間分進み、作り直さずに更新されている
+    assert stats.dates[0] > seeded.dates[0] and stats.last_date > seeded.last_date
+    assert stats.updates > 0
+    assert with_stats == default
@@ -30,3 +30,32 @@ def test_max_drawdown_negative():
     dd = max_drawdown(s)
     assert dd <= 0.0
 
+
+def test_returns_panel_shared_between_optimizer_and_risk(monkeypatch):
+    from src.agents.optimizer import optimize_portfolio
+    from src.agents.risk import RiskAgent
+    from src.tools.risk_tool import ReturnsPanel
+
+    rng = np.random.default_rng(1)
+    idx = pd.date_range("2024-01-01", periods=200, freq="B")
+    cols = [f"T{i}" for i in range(12)]
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (200, 12)), axis=0)), index=idx, columns=cols)
+    panel = ReturnsPanel.from_prices(prices)
+
+    # 共分散はパネル全体で1度だけ計算される
+    calls = []
+    original = pd.DataFrame.cov
+    monkeypatch.setattr(pd.DataFrame, "cov", lambda self, *a, **k: calls.append(1) or original(self, *a, **k))
+    candidates = [{"region": "US", "candidates": [{"ticker": t} for t in cols]}]
+    constraints = {"region_limits": {"US": 1.0}, "position_limit": 0.2}
+    shared = optimize_portfolio(candidates, constraints, prices_df=prices, returns_panel=panel)
+    risk = RiskAgent().run({}, combined_prices=prices, returns_panel=panel)["metrics"]
+    assert len(calls) == 1
+    monkeypatch.setattr(pd.DataFrame, "cov", original)
+
+    assert shared["weights"] == optimize_portfolio(candidates, constraints, prices_df=prices)["weights"]
+    rets = compute_returns(prices, method="pct")
+    # 相関・ボラは共分散から導いた値（欠損がなければ pandas の corr / std と一致）
+    assert np.allclose(pd.DataFrame(risk["correlation"]).values, rets.corr().values)
+    assert np.allclose(pd.Series(risk["volatility"]).values, rets.std().values * np.sqrt(252))
+    assert risk["max_drawdown"] == {c: max_drawdown(rets[c]) for c in cols}
@@ -3,7 +3,7 @@ import pandas as pd
 import pytest
 
 from src.scoring.normalize import normalize_features, normalize_growth_rate
-from src.scoring.scoring import ScoreWeights, score_candidates
+from src.scoring.scoring import ScoreWeights, score_candidates, score_scenarios, select_top_n
 
 
 def test_normalize_features_handles_constant_and_nan():
@@ -55,3 +55,68 @@ def test_normalize_growth_rate():
     # NaN処理
     assert normalize_growth_rate(float("nan")) == 0.5
 
+
+def test_normalize_features_methods_and_inplace():
+    df = pd.DataFrame({
+        "ticker": ["A", "B", "C", "D"],
+        "name": ["A", "B", "C", "D"],
+        "value": [1.0, 2.0, 4.0, float("nan")],
+        "_raw_value": [1.0, 2.0, 4.0, 8.0],  # 内部列は正規化しない
+    })
+
+    ranked = normalize_features(df, method="rank")
+    assert list(ranked["value"]) == [0.0, 0.5, 1.0, 0.5]  # NaN は 0.5
+    assert list(ranked["_raw_value"]) == [1.0, 2.0, 4.0, 8.0]
+
+    z = normalize_features(df, method="zscore")
+    assert z["value"].between(0.0, 1.0).all()
+    assert z["value"].iloc[0] < z["value"].iloc[1] < z["value"].iloc[2]
+    assert z["value"].iloc[3] == 0.5
+
+    with pytest.raises(ValueError):
+        normalize_features(df, method="unknown")
+
+    out = normalize_features(df, inplace=True)
+    assert out is df
+    assert list(df["value"]) == [0.0, pytest.approx(1 / 3), 1.0, pytest.approx(1 / 3)]  # NaN は中央値(2.0)で補完
+
+
+def test_score_scenarios_matches_score_candidates():
+    df = pd.DataFrame({
+        "ticker": ["A", "B", "C"],
+        "fundamental_roic": [0.8, 0.2, float("nan")],  # NaN は平均から除外
+        "fundamental_fcf_margin": [0.9, 0.1, 0.4],
+        "technical_mom_12m": [0.7, 0.3, 0.5],
+        "technical_volume_trend": [0.6, 0.4, 0.5],
+        "quality_dilution": [0.5, 0.5, 0.2],
+        "news_signal": [0.4, 0.6, 0.9],
+    })
+    scenarios = {
+        "base": ScoreWeights(),
+        "momentum": ScoreWeights(fundamental=0.1, technical=0.7, quality=0.1, news=0.1, growth=0.0),
+    }
+    out = score_scenarios(df, scenarios)
+
+    assert list(out.columns) == ["base", "momentum"]
+    assert list(out.index) == ["A", "B", "C"]
+    for name, w in scenarios.items():
+        expected = score_candidates(df, w)["score_overall"].to_numpy()
+        np.testing.assert_allclose(out[name].to_numpy(), expected)
+    # C のファンダは fcf_margin のみの平均
+    assert score_candidates(df, ScoreWeights())["score_fundamental"].iloc[2] == pytest.approx(0.4)
+
+    with pytest.raises(KeyError):
+        score_scenarios(df.drop(columns=["news_signal"]), scenarios)
+
+
+def test_select_top_n_matches_full_sort():
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 5, 200).astype(float)  # 同値を多く含む
+    values[rng.random(200) < 0.1] = np.nan
+    df = pd.DataFrame({"ticker": [f"T{i}" for i in range(200)], "a": values, "b": -values})
+
+    for n in (0, 1, 7, 150, 250):
+        tops = select_top_n(df, ["a", "b"], n)
+        for col in ("a", "b"):
+            expected = df.sort_values(col, ascending=False, kind="stable").head(n)
+            assert list(tops[col]["ticker"]) == list(expected["ticker"])
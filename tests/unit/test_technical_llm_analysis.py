@@ -5,7 +5,7 @@ import pytest
 from unittest.mock import patch, MagicMock
 
 from src.agents.openai_agent import generate_thesis_and_risks
-from src.scoring.features import build_features_from_dummy
+from src.scoring.features import RAW_TECHNICAL_COLUMNS, build_features_from_dummy, raw_technical_records
 from src.agents.regions import RegionAgent
 from datetime import date
 
@@ -45,13 +45,14 @@ class TestTechnicalLLMAnalysis:
         """ダミーデータに生のテクニカル指標が含まれることをテスト"""
         df = build_features_from_dummy("TEST", date(2025, 8, 15), size=5)
         
-        # 基本構造の確認
+        # 基本構造の確認（生の指標は float 列で保持）
         assert len(df) == 5
-        assert "_raw_technical" in df.columns
+        for col in RAW_TECHNICAL_COLUMNS:
+            assert col in df.columns
+            assert df[col].dtype == float
         
         # 生のテクニカル指標の確認
-        for _, row in df.iterrows():
-            raw_tech = row["_raw_technical"]
+        for raw_tech in raw_technical_records(df):
             assert isinstance(raw_tech, dict)
             assert "mom_12m" in raw_tech
             assert "mom_6m" in raw_tech
@@ -117,25 +118,17 @@ class TestTechnicalLLMAnalysis:
     def test_technical_indicators_formatting(self):
         """テクニカル指標の値の形式をテスト"""
         # 実際のテクニカル指標データをシミュレート
-        mock_row = pd.Series({
-            "_raw_technical": {
-                "mom_12m": 0.15,
-                "mom_6m": 0.08,
-                "mom_3m": None,  # 欠損値
-                "mom_1m": float("nan"),  # NaN
-                "volume_trend": 1.25,
-            }
+        mock_df = pd.DataFrame({
+            "ticker": ["AAA"],
+            "_raw_mom_12m": [0.15],
+            "_raw_mom_6m": [0.08],
+            "_raw_mom_3m": [None],  # 欠損値
+            "_raw_mom_1m": [float("nan")],  # NaN
+            "_raw_volume_trend": [1.25],
         })
         
-        # RegionAgentの処理をシミュレート
-        raw_technical = mock_row.get("_raw_technical", {})
-        technical_indicators = {}
-        if raw_technical:
-            for k, v in raw_technical.items():
-                if v is not None and not pd.isna(v):
-                    technical_indicators[k] = float(v)
-                else:
-                    technical_indicators[k] = None
+        # RegionAgentと同じビューで変換
+        technical_indicators = raw_technical_records(mock_df)[0]
         
         # 正しい変換を確認
         assert technical_indicators["mom_12m"] == 0.15